@@ -0,0 +1,6 @@
+"""
+/ws 端点压测与延迟基准
+
+    load_generator  并发回放音频的负载生成器，输出吞吐、RTF 与延迟分位数（JSON）
+    stub_server     使用合成识别后端（asr_backend=synthetic）启动服务，用于单独评估服务端开销
+"""
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/ws 端点负载生成器
+按实时（或 N 倍实时）节奏，在大量并发 WebSocket 会话上回放 WAV/PCM 音频，
+支持阿里云 StartTranscription 与旧版 run-task 两种协议，
+以 JSON 输出吞吐、RTF、首个中间结果延迟与最终结果延迟的分位数
+
+用法：
+    python -m benchmarks.load_generator --url ws://127.0.0.1:8000/ws --audio test.wav \\
+        --sessions 50 --concurrency 20 --speed 1 --protocol mixed --output report.json
+
+延迟定义（均为客户端观测值）：
+    start_ms          发送开始指令到收到开始事件
+    first_partial_ms  发送第一帧音频到收到第一个识别结果事件
+    final_ms          发送结束指令到收到结束事件（TranscriptionCompleted / task-finished）
+    rtf               首帧发送到收到结束事件的耗时 / 音频时长，N 倍速回放时下限为 1/N
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import websockets
+
+
+STARTED_EVENTS = ("TranscriptionStarted", "task-started")
+RESULT_EVENTS = ("TranscriptionResultChanged", "SentenceEnd", "result-generated")
+FINISHED_EVENTS = ("TranscriptionCompleted", "task-finished")
+FAILED_EVENTS = ("TaskFailed", "task-failed")
+
+
+def load_audio(path: Optional[str], sample_rate: int = 16000, seconds: float = 5.0) -> Tuple[bytes, int]:
+    """读取 16bit PCM 音频
+
+    WAV 文件按文件头的采样率读取并下混为单声道；其他文件视为裸 PCM（sample_rate 指定采样率）；
+    未指定文件时生成一段合成音频，便于离线压测。
+
+    Returns:
+        (PCM 字节, 采样率)
+    """
+    if path is None:
+        t = np.arange(int(sample_rate * seconds)) / sample_rate
+        signal = np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t))
+        return (signal * 8000).astype(np.int16).tobytes(), sample_rate
+
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"Only 16-bit WAV files are supported: {path}")
+            channels = wav.getnchannels()
+            sample_rate = wav.getframerate()
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        return samples.tobytes(), sample_rate
+
+    with open(path, "rb") as f:
+        data = f.read()
+    return data[:len(data) // 2 * 2], sample_rate
+
+
+def build_start_command(protocol: str, task_id: str, sample_rate: int, response_mode: str) -> str:
+    if protocol == "aliyun":
+        return json.dumps({
+            "header": {
+                "message_id": uuid.uuid4().hex,
+                "task_id": task_id,
+                "namespace": "SpeechTranscriber",
+                "name": "StartTranscription",
+                "appkey": "benchmark",
+            },
+            "payload": {
+                "format": "pcm",
+                "sample_rate": sample_rate,
+                "enable_intermediate_result": True,
+                "enable_punctuation_prediction": True,
+                "response_mode": response_mode,
+            },
+        })
+    return json.dumps({
+        "header": {"action": "run-task", "task_id": task_id, "streaming": "duplex"},
+        "payload": {
+            "task_group": "audio",
+            "task": "asr",
+            "function": "recognition",
+            "model": "paraformer-realtime-v2",
+            "parameters": {"format": "pcm", "sample_rate": sample_rate, "response_mode": response_mode},
+            "input": {},
+        },
+    })
+
+
+def build_stop_command(protocol: str, task_id: str) -> str:
+    if protocol == "aliyun":
+        return json.dumps({
+            "header": {
+                "message_id": uuid.uuid4().hex,
+                "task_id": task_id,
+                "namespace": "SpeechTranscriber",
+                "name": "StopTranscription",
+                "appkey": "benchmark",
+            },
+        })
+    return json.dumps({
+        "header": {"action": "finish-task", "task_id": task_id, "streaming": "duplex"},
+        "payload": {"input": {}},
+    })
+
+
+def event_name(message: Dict[str, Any]) -> str:
+    header = message.get("header", {})
+    return header.get("name") or header.get("event") or ""
+
+
+async def run_session(
+    url: str,
+    protocol: str,
+    pcm: bytes,
+    sample_rate: int,
+    chunk_ms: int,
+    speed: float,
+    response_mode: str,
+    timeout: float
+) -> Dict[str, Any]:
+    """运行一个完整会话并返回其计时结果"""
+    task_id = uuid.uuid4().hex
+    chunk_bytes = int(sample_rate * chunk_ms / 1000) * 2
+    result: Dict[str, Any] = {
+        "task_id": task_id,
+        "protocol": protocol,
+        "audio_seconds": len(pcm) / 2 / sample_rate,
+        "ok": False,
+        "error": None,
+        "results": 0,
+    }
+
+    try:
+        async with websockets.connect(url, max_size=None, open_timeout=timeout) as ws:
+            sent_start = time.perf_counter()
+            await ws.send(build_start_command(protocol, task_id, sample_rate, response_mode))
+            started = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            name = event_name(started)
+            if name not in STARTED_EVENTS:
+                header = started.get("header", {})
+                result["error"] = header.get("error_code") or header.get("status_message") or name
+                return result
+            result["start_ms"] = (time.perf_counter() - sent_start) * 1000
+
+            first_audio: List[float] = []
+            stop_sent: List[float] = []
+            finished = asyncio.get_running_loop().create_future()
+
+            async def receive():
+                async for raw in ws:
+                    now = time.perf_counter()
+                    message = json.loads(raw)
+                    name = event_name(message)
+                    if name in RESULT_EVENTS:
+                        result["results"] += 1
+                        if "first_partial_ms" not in result and first_audio:
+                            result["first_partial_ms"] = (now - first_audio[0]) * 1000
+                    elif name in FINISHED_EVENTS:
+                        finished.set_result(now)
+                        return
+                    elif name in FAILED_EVENTS:
+                        header = message.get("header", {})
+                        finished.set_exception(RuntimeError(header.get("error_code") or header.get("status_message") or name))
+                        return
+                if not finished.done():
+                    finished.set_exception(RuntimeError("connection closed before task finished"))
+
+            receiver = asyncio.create_task(receive())
+            try:
+                # 按绝对时间表发送，避免逐帧 sleep 累积漂移
+                interval = chunk_ms / 1000 / speed
+                schedule_start = time.perf_counter()
+                for index, offset in enumerate(range(0, len(pcm), chunk_bytes)):
+                    delay = schedule_start + index * interval - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if not first_audio:
+                        first_audio.append(time.perf_counter())
+                    await ws.send(pcm[offset:offset + chunk_bytes])
+                    if finished.done():
+                        break
+
+                stop_sent.append(time.perf_counter())
+                await ws.send(build_stop_command(protocol, task_id))
+                finished_at = await asyncio.wait_for(finished, timeout)
+            finally:
+                receiver.cancel()
+
+            result["final_ms"] = (finished_at - stop_sent[0]) * 1000
+            if result["audio_seconds"] > 0:
+                result["rtf"] = (finished_at - first_audio[0]) / result["audio_seconds"]
+            result["ok"] = True
+    except asyncio.TimeoutError:
+        result["error"] = "timeout"
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    data = np.asarray(values, dtype=np.float64)
+    p50, p90, p95, p99 = np.percentile(data, [50, 90, 95, 99])
+    return {
+        "count": len(values),
+        "mean": round(float(data.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(data.max()), 3),
+    }
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float, config: Dict[str, Any]) -> Dict[str, Any]:
+    succeeded = [r for r in results if r["ok"]]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if not r["ok"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    audio_seconds = sum(r["audio_seconds"] for r in succeeded)
+    return {
+        "config": config,
+        "sessions": {
+            "total": len(results),
+            "succeeded": len(succeeded),
+            "failed": len(results) - len(succeeded),
+            "errors": errors,
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "audio_seconds": round(audio_seconds, 3),
+        "throughput": {
+            "audio_seconds_per_second": round(audio_seconds / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+            "sessions_per_second": round(len(succeeded) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        },
+        "latency_ms": {
+            "start": percentiles([r["start_ms"] for r in succeeded]),
+            "first_partial": percentiles([r["first_partial_ms"] for r in succeeded if "first_partial_ms" in r]),
+            "final": percentiles([r["final_ms"] for r in succeeded]),
+        },
+        "rtf": percentiles([r["rtf"] for r in succeeded if "rtf" in r]),
+    }
+
+
+async def run_load(args, pcm: bytes, sample_rate: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    protocols = ["aliyun", "legacy"] if args.protocol == "mixed" else [args.protocol]
+
+    async def one(index: int) -> Dict[str, Any]:
+        # 在 ramp_up 时间内均匀启动会话，避免所有连接同时握手
+        if args.ramp_up > 0:
+            await asyncio.sleep(args.ramp_up * index / args.sessions)
+        async with semaphore:
+            return await run_session(
+                args.url,
+                protocols[index % len(protocols)],
+                pcm,
+                sample_rate,
+                args.chunk_ms,
+                args.speed,
+                args.response_mode,
+                args.timeout
+            )
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(args.sessions)))
+    wall_seconds = time.perf_counter() - started
+
+    config = {
+        "url": args.url,
+        "audio": args.audio or "synthetic",
+        "sample_rate": sample_rate,
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "speed": args.speed,
+        "chunk_ms": args.chunk_ms,
+        "protocol": args.protocol,
+        "response_mode": args.response_mode,
+    }
+    report = summarize(list(results), wall_seconds, config)
+    if args.per_session:
+        report["per_session"] = list(results)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the ASR /ws endpoint")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws")
+    parser.add_argument("--audio", help="16-bit WAV or raw PCM file; a synthetic signal is used when omitted")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="sample rate of raw PCM input")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of the synthetic signal")
+    parser.add_argument("--sessions", type=int, default=10, help="total number of sessions")
+    parser.add_argument("--concurrency", type=int, default=10, help="maximum concurrent sessions")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 1 = real time")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="audio frame length")
+    parser.add_argument("--protocol", choices=["aliyun", "legacy", "mixed"], default="aliyun")
+    parser.add_argument("--response-mode", choices=["fast", "balanced", "accurate"], default="balanced")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which sessions are started")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-step timeout in seconds")
+    parser.add_argument("--per-session", action="store_true", help="include per-session results in the report")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    pcm, sample_rate = load_audio(args.audio, args.sample_rate, args.seconds)
+    report = asyncio.run(run_load(args, pcm, sample_rate))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0 if report["sessions"]["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
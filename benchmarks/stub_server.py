@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+使用合成识别后端启动 ASR 服务
+服务端的协议解析、音频管线、调度与序列化照常运行，只把模型替换为 synthetic 后端，
+用于在没有模型文件和 GPU 的环境中单独评估服务端开销
+
+用法：
+    python -m benchmarks.stub_server --port 8765 --latency-ms 5 --rtf 0.05
+等价于设置环境变量 ASR_BACKEND=synthetic 后启动 main.py
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+from config import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the ASR server with the synthetic backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=settings.synthetic_latency_ms, help="base cost per model call")
+    parser.add_argument("--jitter-ms", type=float, default=settings.synthetic_latency_jitter_ms, help="latency jitter")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "lognormal"],
+                        default=settings.synthetic_latency_distribution)
+    parser.add_argument("--rtf", type=float, default=settings.synthetic_rtf, help="model cost per second of audio")
+    parser.add_argument("--log-level", default="warning")
+    return parser.parse_args()
+
+
+def run():
+    args = parse_args()
+    settings.asr_backend = "synthetic"
+    settings.synthetic_latency_ms = args.latency_ms
+    settings.synthetic_latency_jitter_ms = args.jitter_ms
+    settings.synthetic_latency_distribution = args.distribution
+    settings.synthetic_rtf = args.rtf
+
+    import main
+    logging.getLogger().setLevel(args.log_level.upper())
+    uvicorn.run(main.app, host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    run()
@@ -16,22 +16,80 @@ class Settings(BaseSettings):
     model_path: str = "paraformer-zh-streaming"  # 模型路径，支持本地路径或 ModelScope 模型名称
     model_revision: str = "v2.0.4"  # 模型版本号，对应 ModelScope 上的模型版本
     device: str = "cuda:0"  # 模型运行设备，可选值："cpu" 或 "cuda:0"（使用 GPU）
+    quantize_int8: bool = False  # INT8 推理：funasr 后端对 Linear 层做动态量化（仅 CPU），onnx 后端加载 *_quant.onnx
     model_dir: str = "models"  # 模型缓存目录
+    model_snapshot_path: str = ""  # funasr 后端的模型快照文件（由 scripts/preload_model.py --snapshot 生成），存在时内存映射加载，跳过模型构建
     
     # 模型内置功能配置（性能优化配置）
     semantic_punctuation_enabled: bool = False  # 是否启用语义标点预测（关闭以提升速度）
     max_sentence_silence: int = 200  # 句子最大静音时长（毫秒），最小值200ms以获得最快响应
-    enable_punctuation_model: bool = False  # 是否启用标点模型（关闭以大幅提升速度）
+    enable_punctuation_model: bool = False  # 是否启用标点服务：句末文本批量加标点，仅对请求了标点（enable_punctuation_prediction）的会话生效
+    punctuation_backend: str = "funasr"  # 标点后端：funasr（标点模型）或 synthetic（只补句号，用于压测）
+    punctuation_model: str = "ct-punc"  # funasr 标点模型
+    punctuation_workers: int = 1  # 标点模型推理线程数，与流式推理线程池相互独立
+    punctuation_batch_window_ms: int = 20  # 跨会话汇集句子的批处理窗口（毫秒）
+    punctuation_max_batch_size: int = 16  # 单个批次的最大句子数
+    punctuation_timeout_ms: int = 1000  # 等待标点结果的最长时间（毫秒），超时发送无标点文本
     default_response_mode: str = "fast"  # 默认响应模式：fast（最快）、balanced（平衡）、accurate（准确）
     
+    # 语音活动检测（VAD）配置
+    vad_enabled: bool = False  # 在识别模型前启用流式 VAD：静音段不做推理，语音结束时以 is_final 完成该句识别
+    vad_backend: str = "energy"  # VAD 实现：energy（向量化能量/过零率检测，无额外依赖）或 fsmn（FunASR fsmn-vad 流式模型）
+    vad_model: str = "fsmn-vad"  # vad_backend 为 fsmn 时加载的模型
+    vad_energy_threshold_db: float = -45.0  # energy 检测的帧能量下限（dBFS），实际阈值随噪声底自适应抬高
+    vad_noise_margin_db: float = 10.0  # energy 检测中语音帧需高出噪声底的幅度（dB）
+    vad_pre_speech_ms: int = 300  # 检测到语音时一并送入模型的前导音频时长（毫秒）
+    
+    # 离线识别与两遍识别配置
+    offline_backend: str = "funasr"  # 离线（整句）识别后端：funasr 或 synthetic
+    offline_model: str = "paraformer-zh"  # funasr 离线识别模型
+    offline_workers: int = 1  # 离线模型推理线程数，与流式推理线程池相互独立
+    two_pass_enabled: bool = False  # 两遍识别：句末用离线模型重新识别整句音频，结果替换 SentenceEnd 中的流式文本
+    two_pass_batch_window_ms: int = 50  # 跨会话汇集句子的批处理窗口（毫秒）
+    two_pass_max_batch_size: int = 8  # 单个批次的最大句子数
+    two_pass_timeout_ms: int = 3000  # 等待离线结果的最长时间（毫秒），超时发送流式结果
+    two_pass_max_sentence_seconds: int = 60  # 超过此时长的句子不做第二遍识别（未启用 VAD 时整个会话为一句）
+    
+    # HTTP 文件转写配置（POST /v1/transcribe，使用离线识别模型）
+    file_transcription_enabled: bool = False  # 是否启用文件转写接口，启用时加载离线识别模型
+    transcribe_workers: int = 2  # 文件转写推理线程数，与流式推理、两遍识别线程池相互独立
+    transcribe_batch_size: int = 8  # 单次离线批量识别的语音片段数
+    transcribe_max_segment_seconds: float = 30.0  # VAD 切分的单个语音片段最大时长（秒），超过时强制切分
+    transcribe_end_silence_ms: int = 500  # VAD 切分时判定片段结束的连续静音时长（毫秒）
+    transcribe_spool_max_mb: int = 16  # 请求体在内存中缓存的上限（MB），超过后写入临时文件并内存映射读取
+    transcribe_max_file_mb: int = 2048  # 转写请求体的最大大小（MB），按 Content-Length 预先检查并在接收时累计检查，超过返回 413
+    
+    # 识别后端配置
+    asr_backend: str = "funasr"  # 识别后端：funasr（AutoModel）、onnx（onnxruntime 流式引擎）或 synthetic（合成后端，不加载模型，用于压测服务端开销）
+    onnx_model_dir: str = ""  # onnx 后端的导出模型目录（model.onnx、decoder.onnx、config.yaml、am.mvn、tokens.json）
+    onnx_intra_op_threads: int = 4  # onnx 后端每个推理会话的算子内线程数
+    synthetic_latency_ms: float = 20.0  # 合成后端每次推理的基础耗时（毫秒）
+    synthetic_latency_jitter_ms: float = 0.0  # 耗时抖动（毫秒），uniform 为半宽，lognormal 为标准差
+    synthetic_latency_distribution: str = "fixed"  # 耗时分布：fixed、uniform、lognormal
+    synthetic_rtf: float = 0.0  # 每秒音频额外增加的推理耗时（秒）
+    synthetic_text: str = "合成识别结果"  # 合成后端循环输出的文本
+    synthetic_chars_per_second: float = 4.0  # 每秒音频输出的字数
+    synthetic_seed: int = 0  # 耗时抽样的随机种子，保证结果可复现
+    
     # 音频配置
     default_sample_rate: int = 16000  # 默认音频采样率（Hz），推荐值：16000
+    model_sample_rate: int = 16000  # 模型输入采样率（Hz），其他采样率的音频在服务端流式重采样
     default_format: str = "pcm"  # 默认音频格式，支持："pcm"（推荐）、"wav" 等
     chunk_size: int = 3200  # 音频缓冲区大小（字节），16000Hz 采样率下对应 100ms 音频
+    audio_buffer_seconds: int = 30  # 每个会话音频环形缓冲区容量（秒）
+    audio_buffer_overflow: str = "drop_oldest"  # 缓冲区溢出策略：drop_oldest、drop_newest、error
+    audio_buffer_dtype: str = "float32"  # 缓冲区存储类型：float32 或 int16（int16 内存减半，推理前再转换）
+    audio_queue_size: int = 50  # 每个会话接收队列的最大帧数
+    audio_queue_policy: str = "block"  # 推理跟不上时的队列策略：block（阻塞接收）、coalesce（合并帧）、drop（丢弃并上报）
+    max_coalesce_ms: int = 2000  # 积压时单次推理最多合并的音频时长（毫秒）
     
     # 连接配置
-    max_connections: int = 10  # 最大并发连接数
+    max_connections: int = 10  # 最大并发识别会话数：准入控制按会话计数（每个连接同一时刻最多一个会话），空闲连接不占名额
     connection_timeout: int = 300  # 连接超时时间（秒），超过此时间无活动将被断开
+    admission_queue_timeout: float = 0.0  # 会话数达到上限时新会话的排队等待时间（秒），0 表示直接拒绝
+    idle_reap_interval: int = 10  # 空闲会话回收检查间隔（秒）
+    max_session_cache_mb: float = 0.0  # 单个会话流式 cache 的内存上限（MB），超过时在下一个句末压缩；超过两倍仍未到句末时先以 is_final 结束当前句子再压缩，0 表示不限制
+    cache_compaction_enabled: bool = True  # 在句子边界压缩会话流式 cache，避免长会话内存持续增长；句末即 is_final 结果，需启用 VAD 断句（vad_enabled）或由结束指令的最终解码产生
     
     # 性能优化配置
     torch_threads: int = 4  # PyTorch线程数，建议设置为CPU核心数
@@ -42,6 +100,25 @@ class Settings(BaseSettings):
     enable_cudnn_deterministic: bool = False  # 启用cuDNN确定性算法（影响性能但保证可重复性）
     memory_fraction: float = 0.9  # GPU内存分配比例（0.0-1.0）
     
+    fast_serializer: bool = True  # 使用预构建模板序列化协议事件（输出与 pydantic 序列化一致）
+    
+    # 推理执行器配置
+    inference_workers: int = 2  # 推理线程池大小，模型推理在独立线程中执行，不阻塞事件循环
+    enable_batching: bool = False  # 启用跨会话动态微批调度（onnx 后端把同形状的块堆叠为一次前向）
+    batch_window_ms: int = 20  # 微批收集窗口（毫秒）：推理线程全忙时新到的块最多等待此时长凑批，有空闲线程时立即派发
+    max_batch_size: int = 8  # 单个批次的最大音频块数量
+    model_workers: int = 0  # 推理进程数，0 表示在主进程内加载模型；大于 0 时每个进程各加载一份模型
+    worker_torch_threads: int = 0  # 每个推理进程的PyTorch线程数，0 表示沿用默认值
+    worker_ring_seconds: int = 30  # 每个推理进程共享内存音频环形缓冲区容量（秒）
+    worker_ring_wait_timeout: float = 5.0  # 环形缓冲区满时等待推理进程消费的最长时间（秒），超时以错误结束会话
+    
+    # 启动配置
+    warmup_enabled: bool = True  # 启动时对每种响应模式的 chunk 配置执行一次预热推理，预热完成后 /ready 才返回就绪
+    warmup_audio_seconds: float = 1.0  # 每种响应模式的预热音频时长（秒）
+    
+    # 监控配置
+    enable_metrics: bool = True  # 在 /metrics 以 Prometheus 文本格式导出服务指标
+    
     class Config:
         env_file = ".env"  # 环境变量文件路径
         case_sensitive = False  # 环境变量大小写不敏感
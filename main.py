@@ -1,13 +1,28 @@
+import asyncio
+import json
 import logging
 import os
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from config import settings
-from src.asr.model import ASRModel
+from src.asr.backend import create_asr_backend
+from src.asr.executor import InferenceExecutor
+from src.asr.batching import BatchScheduler
+from src.asr.offline import create_offline_model
+from src.asr.file_transcription import FileTranscriber
+from src.asr.rescoring import SentenceRescorer
+from src.asr.punctuation import PunctuationService, create_punctuation_model
+from src.asr.worker_pool import ModelWorkerPool
+from src.audio.file_loader import AudioFileReader, AudioSpool, MultipartAudioExtractor
+from src.audio.vad import load_fsmn_vad_model
 from src.state.session import SessionManager
 from src.websocket.handler import WebSocketHandler
+from src.monitoring.metrics import CONTENT_TYPE, render_metrics
 
 
 logging.basicConfig(
@@ -76,42 +91,239 @@ def optimize_pytorch_performance():
 
 asr_model = None
 session_manager = None
+inference_executor = None
+batch_scheduler = None
+worker_pool = None
+vad_model = None
+offline_executor = None
+rescorer = None
+punctuation_executor = None
+punctuator = None
+file_executor = None
+file_transcriber = None
 ws_handler = None
+reaper_task = None
+startup_task = None
 
+# 启动状态：ready 表示模型已加载并完成预热，可以接收流量；failed 表示启动失败
+startup_state = {"ready": False, "failed": False, "phases": {}, "warmup": {}}
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global asr_model, session_manager, ws_handler
-    
-    logger.info("Starting ASR Server...")
-    
-    # 应用PyTorch性能优化
-    optimize_pytorch_performance()
-    
+
+@contextmanager
+def startup_phase(name: str):
+    """统计并记录一个启动阶段的耗时"""
+    started = time.perf_counter()
     try:
-        asr_model = ASRModel(
-            model_path=settings.model_path,
-            model_revision=settings.model_revision,
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        startup_state["phases"][name] = round(elapsed_ms, 1)
+        logger.info(f"Startup phase '{name}' took {elapsed_ms:.1f}ms")
+
+
+def build_model_kwargs(backend: str) -> dict:
+    """根据识别后端构造模型参数"""
+    if backend == "synthetic":
+        return dict(
+            latency_ms=settings.synthetic_latency_ms,
+            latency_jitter_ms=settings.synthetic_latency_jitter_ms,
+            latency_distribution=settings.synthetic_latency_distribution,
+            rtf=settings.synthetic_rtf,
+            text=settings.synthetic_text,
+            chars_per_second=settings.synthetic_chars_per_second,
+            seed=settings.synthetic_seed,
+            sample_rate=settings.model_sample_rate,
+            default_response_mode=settings.default_response_mode
+        )
+    if backend == "onnx":
+        return dict(
+            model_dir=settings.onnx_model_dir,
+            quantize=settings.quantize_int8,
+            intra_op_threads=settings.onnx_intra_op_threads,
             device=settings.device,
-            semantic_punctuation_enabled=settings.semantic_punctuation_enabled,
-            max_sentence_silence=settings.max_sentence_silence,
-            model_dir=settings.model_dir,
-            enable_punctuation_model=settings.enable_punctuation_model,
             default_response_mode=settings.default_response_mode
         )
-        logger.info("ASR model loaded successfully with performance optimizations")
+    return dict(
+        model_path=settings.model_path,
+        model_revision=settings.model_revision,
+        device=settings.device,
+        semantic_punctuation_enabled=settings.semantic_punctuation_enabled,
+        max_sentence_silence=settings.max_sentence_silence,
+        model_dir=settings.model_dir,
+        default_response_mode=settings.default_response_mode,
+        quantize=settings.quantize_int8,
+        snapshot_path=settings.model_snapshot_path
+    )
+
+
+def build_offline_model_kwargs(backend: str) -> dict:
+    """根据离线识别后端构造模型参数"""
+    if backend == "synthetic":
+        return build_model_kwargs(backend)
+    return dict(
+        model_path=settings.offline_model,
+        device=settings.device,
+        model_dir=settings.model_dir
+    )
+
+
+async def initialize():
+    """后台启动流程：加载模型、预热并创建服务组件，完成后标记就绪
+
+    在后台任务中执行，服务在模型加载期间即可响应 /live，/ready 在预热完成前返回 503。
+    """
+    global asr_model, session_manager, inference_executor, batch_scheduler, worker_pool, vad_model, ws_handler, reaper_task
+    global offline_executor, rescorer, punctuation_executor, punctuator, file_executor, file_transcriber
+    
+    started = time.perf_counter()
+    warmup_seconds = settings.warmup_audio_seconds if settings.warmup_enabled else 0.0
+    try:
+        # 应用PyTorch性能优化（首次导入 torch 较慢，放到线程中执行）
+        with startup_phase("torch_config"):
+            await asyncio.to_thread(optimize_pytorch_performance)
+        
+        model_kwargs = build_model_kwargs(settings.asr_backend)
+        with startup_phase("model_load"):
+            if settings.model_workers > 0:
+                # 多进程模式：每个推理进程各自加载一份模型并在进程内预热，主进程不加载
+                worker_pool = ModelWorkerPool(
+                    settings.model_workers,
+                    model_kwargs,
+                    ring_seconds=settings.worker_ring_seconds,
+                    sample_rate=settings.default_sample_rate,
+                    torch_threads=settings.worker_torch_threads,
+                    backend=settings.asr_backend,
+                    warmup_seconds=warmup_seconds,
+                    model_sample_rate=settings.model_sample_rate,
+                    ring_wait_timeout=settings.worker_ring_wait_timeout
+                )
+                await asyncio.to_thread(worker_pool.start)
+                logger.info(f"ASR model loaded in {settings.model_workers} worker processes")
+            else:
+                asr_model = await asyncio.to_thread(create_asr_backend, settings.asr_backend, **model_kwargs)
+                logger.info("ASR model loaded successfully with performance optimizations")
+        
+        if asr_model is not None and warmup_seconds > 0:
+            with startup_phase("warmup"):
+                startup_state["warmup"] = await asyncio.to_thread(
+                    asr_model.warmup, warmup_seconds, settings.model_sample_rate
+                )
+        
+        if settings.vad_enabled and settings.vad_backend == "fsmn":
+            with startup_phase("vad_model"):
+                vad_model = await asyncio.to_thread(load_fsmn_vad_model, settings.vad_model, settings.device)
+        
+        offline_model = None
+        if settings.two_pass_enabled or settings.file_transcription_enabled:
+            with startup_phase("offline_model"):
+                offline_model = await asyncio.to_thread(
+                    create_offline_model, settings.offline_backend, **build_offline_model_kwargs(settings.offline_backend)
+                )
+        
+        if settings.two_pass_enabled:
+            # 离线模型使用独立的推理线程池，不与流式推理争用线程
+            offline_executor = InferenceExecutor(max_workers=settings.offline_workers, thread_name_prefix="asr-offline")
+            rescorer = SentenceRescorer(
+                offline_model,
+                offline_executor,
+                max_batch_size=settings.two_pass_max_batch_size,
+                batch_window_ms=settings.two_pass_batch_window_ms
+            )
+        
+        if settings.enable_punctuation_model:
+            with startup_phase("punctuation_model"):
+                punctuation_model = await asyncio.to_thread(
+                    create_punctuation_model,
+                    settings.punctuation_backend,
+                    **({} if settings.punctuation_backend == "synthetic" else dict(
+                        model_path=settings.punctuation_model,
+                        device=settings.device,
+                        model_dir=settings.model_dir
+                    ))
+                )
+                punctuation_executor = InferenceExecutor(max_workers=settings.punctuation_workers, thread_name_prefix="asr-punc")
+                punctuator = PunctuationService(
+                    punctuation_model,
+                    punctuation_executor,
+                    max_batch_size=settings.punctuation_max_batch_size,
+                    batch_window_ms=settings.punctuation_batch_window_ms
+                )
+        
+        if settings.file_transcription_enabled:
+            # 文件转写与两遍识别共享离线模型，但使用各自的线程池，批量转写不影响句末重识别的延迟
+            file_executor = InferenceExecutor(max_workers=settings.transcribe_workers, thread_name_prefix="asr-file")
+            file_transcriber = FileTranscriber(
+                offline_model,
+                file_executor,
+                batch_size=settings.transcribe_batch_size,
+                max_inflight=2 * settings.transcribe_workers,
+                punctuator=punctuator,
+                sample_rate=settings.model_sample_rate,
+                end_silence_ms=settings.transcribe_end_silence_ms,
+                max_segment_seconds=settings.transcribe_max_segment_seconds,
+                pre_speech_ms=settings.vad_pre_speech_ms,
+                threshold_db=settings.vad_energy_threshold_db,
+                noise_margin_db=settings.vad_noise_margin_db
+            )
+        
+        with startup_phase("services"):
+            session_manager = SessionManager(
+                max_sessions=settings.max_connections,
+                admission_queue_timeout=settings.admission_queue_timeout,
+                max_cache_bytes=int(settings.max_session_cache_mb * 1024 * 1024)
+            )
+            inference_executor = InferenceExecutor(max_workers=settings.inference_workers)
+            if settings.enable_batching and asr_model is not None:
+                batch_scheduler = BatchScheduler(
+                    asr_model,
+                    inference_executor,
+                    max_batch_size=settings.max_batch_size,
+                    batch_window_ms=settings.batch_window_ms
+                )
+            ws_handler = WebSocketHandler(asr_model, session_manager, inference_executor, batch_scheduler, worker_pool, vad_model, rescorer, punctuator)
+            reaper_task = asyncio.create_task(
+                ws_handler.run_idle_reaper(settings.connection_timeout, settings.idle_reap_interval)
+            )
     except Exception as e:
-        logger.error(f"Failed to load ASR model: {e}")
-        raise
+        startup_state["failed"] = True
+        logger.error(f"Failed to start ASR Server: {e}", exc_info=True)
+        return
     
-    session_manager = SessionManager()
-    ws_handler = WebSocketHandler(asr_model, session_manager)
+    startup_state["ready"] = True
+    logger.info(f"ASR Server ready in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global startup_task
     
-    logger.info("ASR Server started successfully")
+    logger.info("Starting ASR Server...")
+    startup_task = asyncio.create_task(initialize())
     
     yield
     
     logger.info("Shutting down ASR Server...")
+    startup_state["ready"] = False
+    if not startup_task.done():
+        startup_task.cancel()
+    if reaper_task:
+        reaper_task.cancel()
+    if batch_scheduler:
+        await batch_scheduler.shutdown()
+    if rescorer:
+        await rescorer.shutdown()
+    if offline_executor:
+        offline_executor.shutdown(wait=False)
+    if punctuator:
+        await punctuator.shutdown()
+    if punctuation_executor:
+        punctuation_executor.shutdown(wait=False)
+    if file_executor:
+        file_executor.shutdown(wait=False)
+    if inference_executor:
+        inference_executor.shutdown(wait=False)
+    if worker_pool:
+        worker_pool.shutdown()
 
 
 app = FastAPI(
@@ -145,8 +357,139 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/live")
+async def live():
+    """存活探针：进程与事件循环正常即返回 200，启动失败时返回 503 以便编排系统重启实例"""
+    if startup_state["failed"]:
+        return JSONResponse(status_code=503, content={"status": "failed"})
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+async def ready():
+    """就绪探针：模型加载并完成预热后才返回 200，之前返回 503，避免滚动发布时过早接入流量"""
+    if not startup_state["ready"]:
+        status = "failed" if startup_state["failed"] else "starting"
+        return JSONResponse(status_code=503, content={"status": status, "phases": startup_state["phases"]})
+    return {"status": "ready", "phases": startup_state["phases"], "warmup": startup_state["warmup"]}
+
+
+if settings.enable_metrics:
+    @app.get("/metrics")
+    async def metrics():
+        # 多进程推理模式下模型推理耗时在推理进程内统计，此处以 asr_chunk_latency_seconds 为准
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/stats")
+async def stats():
+    """会话与流式 cache 内存统计"""
+    if session_manager is None:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return session_manager.get_stats()
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+async def spool_request_audio(request: Request) -> AudioSpool:
+    """边接收边把请求中的音频写入 AudioSpool（小文件留在内存，大文件落盘）
+
+    multipart/form-data 流式解析并只保留 file 字段；其他内容类型把请求体视为原始音频。
+    请求体大小先按 Content-Length 检查，接收过程中再按实际字节数累计检查，超限立即停止接收。
+
+    Raises:
+        RequestTooLarge: 请求体超过 transcribe_max_file_mb
+        ValueError: multipart 表单无效、被截断或缺少 file 字段
+    """
+    max_bytes = settings.transcribe_max_file_mb * 1024 * 1024
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise RequestTooLarge()
+
+    spool = AudioSpool(max_memory=settings.transcribe_spool_max_mb * 1024 * 1024)
+    try:
+        content_type = request.headers.get("content-type", "")
+        extractor = MultipartAudioExtractor(content_type, spool) if content_type.startswith("multipart/form-data") else None
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise RequestTooLarge()
+            if extractor is not None:
+                extractor.write(chunk)
+            else:
+                spool.write(chunk)
+        if extractor is not None:
+            extractor.finish()
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+@app.post("/v1/transcribe")
+async def transcribe_file(
+    request: Request,
+    audio_format: Optional[str] = Query(None, alias="format"),
+    sample_rate: int = Query(settings.default_sample_rate),
+    enable_punctuation: bool = Query(False),
+    response_format: str = Query("ndjson")
+):
+    """整段音频文件转写
+
+    请求体为原始音频（pcm/wav/mulaw/alaw，未指定 format 时按 RIFF 头识别 WAV），或 multipart/form-data 的 file 字段。
+    音频按 VAD 切分为语音片段，离线模型批量识别，按片段顺序流式返回：
+    response_format=ndjson 时每行一个 JSON，sse 时为 Server-Sent Events（result / completed / error 事件）。
+    """
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    if file_transcriber is None:
+        return JSONResponse(status_code=503, content={"error": "File transcription is not enabled"})
+    if response_format not in ("ndjson", "sse"):
+        return JSONResponse(status_code=400, content={"error": f"Unsupported response_format: {response_format}"})
+    
+    try:
+        spool = await spool_request_audio(request)
+    except RequestTooLarge:
+        return JSONResponse(status_code=413, content={"error": f"File exceeds {settings.transcribe_max_file_mb} MB"})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    
+    try:
+        # 读取器校验内容（WAV 头、是否有音频数据），失败时已关闭 spool
+        reader = AudioFileReader(spool, audio_format, sample_rate, target_sample_rate=settings.model_sample_rate)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    logger.info(f"File transcription request: {reader.nbytes} bytes, format={reader.audio_format}, "
+                f"sample_rate={sample_rate}, response_format={response_format}")
+    
+    def encode(event: str, payload: dict) -> bytes:
+        if response_format == "sse":
+            return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+        return (json.dumps(dict(payload, type=event), ensure_ascii=False) + "\n").encode("utf-8")
+    
+    async def results():
+        try:
+            async for result in file_transcriber.transcribe(reader.iter_chunks(), punctuate=enable_punctuation):
+                yield encode("result" if "index" in result else "completed", result)
+        except Exception as e:
+            logger.error(f"File transcription failed: {e}", exc_info=True)
+            yield encode("error", {"error": str(e)})
+        finally:
+            reader.close()
+    
+    media_type = "text/event-stream" if response_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(results(), media_type=media_type)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    if not startup_state["ready"]:
+        # 1013 Try Again Later：服务尚未就绪
+        await websocket.close(code=1013)
+        return
     await ws_handler.handle_connection(websocket)
 
 
@@ -157,7 +500,7 @@ if __name__ == "__main__":
         "host": settings.host,
         "port": settings.port,
         "reload": True,
-        "workers": 1,  # 使用单个worker，因为模型是单例的
+        "workers": 1,  # 使用单个worker；多核扩展通过 model_workers 推理进程池实现
         "log_level": "info",
         "access_log": True,
         "timeout_keep_alive": 300,
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频转换微基准
+对比旧版 int16→float32 转换（frombuffer().astype() / 32768.0）与
+直接写入环形缓冲区的转换路径，统计每帧分配字节数与耗时
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.audio.ring_buffer import AudioRingBuffer
+
+
+def legacy_convert(frame, buffer):
+    buffer.append(np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0)
+    if len(buffer) > 64:
+        buffer.clear()
+
+
+def ring_convert(frame, ring):
+    ring.append_pcm16(frame)
+    if len(ring) >= ring.capacity // 2:
+        ring.clear()
+
+
+def measure(name, fn, frames, target):
+    # 预热
+    for frame in frames[:10]:
+        fn(frame, target)
+
+    # 逐帧统计转换过程中的峰值分配字节数
+    tracemalloc.start()
+    allocated = 0
+    for frame in frames:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(frame, target)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += max(peak - current, 0)
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame, target)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<16} alloc/frame={allocated / len(frames):>10.1f} B  "
+          f"time/frame={elapsed / len(frames) * 1e6:>8.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int16→float32 audio conversion micro-benchmark")
+    parser.add_argument("--frames", type=int, default=2000, help="number of frames")
+    parser.add_argument("--frame-ms", type=int, default=100, help="frame length in milliseconds")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="sample rate")
+    args = parser.parse_args()
+
+    samples = args.sample_rate * args.frame_ms // 1000
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(-32768, 32767, samples, dtype=np.int16).tobytes() for _ in range(args.frames)]
+    capacity = args.sample_rate * 30
+
+    print(f"frames={args.frames}, samples/frame={samples}, raw bytes/frame={samples * 2}")
+    measure("legacy (list)", legacy_convert, frames, [])
+    measure("ring float32", ring_convert, frames, AudioRingBuffer(capacity, np.float32))
+    measure("ring int16", ring_convert, frames, AudioRingBuffer(capacity, np.int16))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指令解析耗时对比
+对四种客户端指令分别比较基于 pydantic 的 parse_command 与快速路径 parse 的解析耗时，
+并检查两者解析出的关键字段一致
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.protocol import parser as parser_module
+from src.protocol.parser import ProtocolParser
+
+
+TASK_ID = "0123456789abcdef0123456789abcdef"
+
+MESSAGES = {
+    "StartTranscription": json.dumps({
+        "header": {
+            "message_id": "f" * 32,
+            "task_id": TASK_ID,
+            "namespace": "SpeechTranscriber",
+            "name": "StartTranscription",
+            "appkey": "default",
+        },
+        "payload": {
+            "format": "pcm",
+            "sample_rate": 16000,
+            "enable_intermediate_result": True,
+            "enable_punctuation_prediction": True,
+            "enable_inverse_text_normalization": True,
+            "max_sentence_silence": 800,
+        },
+    }),
+    "StopTranscription": json.dumps({
+        "header": {
+            "message_id": "f" * 32,
+            "task_id": TASK_ID,
+            "namespace": "SpeechTranscriber",
+            "name": "StopTranscription",
+        },
+    }),
+    "run-task": json.dumps({
+        "header": {"action": "run-task", "task_id": TASK_ID, "streaming": "duplex"},
+        "payload": {
+            "task_group": "audio",
+            "task": "asr",
+            "function": "recognition",
+            "model": "paraformer-realtime-v2",
+            "parameters": {"format": "pcm", "sample_rate": 16000, "response_mode": "fast"},
+            "input": {},
+        },
+    }),
+    "finish-task": json.dumps({
+        "header": {"action": "finish-task", "task_id": TASK_ID, "streaming": "duplex"},
+        "payload": {"input": {}},
+    }),
+}
+
+
+def task_id_of(command) -> str:
+    if isinstance(command, dict):
+        return command["task_id"]
+    return command.header.task_id
+
+
+def check_equivalence():
+    for name, message in MESSAGES.items():
+        legacy = ProtocolParser.parse_command(message)
+        fast = ProtocolParser.parse(message)
+        assert legacy is not None and fast is not None, f"{name}: failed to parse"
+        assert task_id_of(legacy) == fast.task_id, f"{name}: task_id mismatch"
+    for invalid in ("not json", "[]", '{"header": {"action": "run-task", "task_id": 1}}',
+                    '{"header": {"action": "run-task", "task_id": "x"}, "payload": {}}'):
+        assert ProtocolParser.parse(invalid) is None, f"expected rejection: {invalid}"
+    print("parse results match parse_command for all command types")
+
+
+def benchmark(iterations: int = 20000):
+    print(f"json decoder: {parser_module._json_loads.__module__}")
+    for name, message in MESSAGES.items():
+        timings = []
+        for parse in (ProtocolParser.parse_command, ProtocolParser.parse):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                parse(message)
+            timings.append((time.perf_counter() - start) / iterations * 1e6)
+        print(f"{name:<19} parse_command: {timings[0]:7.2f} us  parse: {timings[1]:7.2f} us")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    check_equivalence()
+    benchmark()
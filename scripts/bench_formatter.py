@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件序列化耗时对比
+给出 FastProtocolFormatter 与基于 pydantic 的 ProtocolFormatter 的序列化耗时，
+两者输出的一致性由 tests/test_fast_formatter.py 检查
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.protocol.formatter import ProtocolFormatter
+from src.protocol.fast_formatter import FastProtocolFormatter
+
+
+def benchmark(iterations: int = 20000):
+    kwargs = {
+        "task_id": "0123456789abcdef0123456789abcdef",
+        "text": "今天天气怎么样",
+        "begin_time": 0,
+        "end_time": 1500,
+        "sentence_end": False,
+        "protocol": "aliyun",
+        "sentence_index": 2,
+    }
+    for name, formatter in (("pydantic", ProtocolFormatter), ("fast", FastProtocolFormatter)):
+        for protocol in ("aliyun", "legacy"):
+            kwargs["protocol"] = protocol
+            start = time.perf_counter()
+            for _ in range(iterations):
+                formatter.create_result_generated_event(**kwargs)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<9} {protocol:<7} result event: {elapsed / iterations * 1e6:7.2f} us/event")
+
+
+if __name__ == "__main__":
+    benchmark()
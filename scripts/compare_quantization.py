@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+INT8 量化精度/延迟对比
+在本地测试集上分别用 FP32 与 INT8 动态量化的模型做流式识别（按服务端相同的步长切块），
+输出两者的字错误率（CER）、推理耗时与实时率（RTF）
+
+测试集为 TSV 文件，每行 "wav 路径<TAB>参考文本"，wav 路径可相对于 TSV 所在目录：
+    python scripts/compare_quantization.py --testset data/test.tsv --response-mode fast --threads 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import wave
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from src.asr.model import ASRModel, get_chunk_stride_samples
+from src.audio.resampler import StreamingResampler
+
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 计算 CER 前去掉标点与空白
+_IGNORED_CHARS = re.compile(r"[\s　-〿＀-／：-＠‐-⁯!-/:-@\[-`{-~]")
+
+
+def load_testset(path: str) -> List[Tuple[str, str]]:
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            wav_path, _, reference = line.partition("\t")
+            if not os.path.isabs(wav_path):
+                wav_path = os.path.join(base, wav_path)
+            items.append((wav_path, reference))
+    return items
+
+
+def load_wav(path: str, target_rate: int) -> np.ndarray:
+    """读取 16bit WAV 为单声道 float32，必要时重采样到模型采样率"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit WAV files are supported: {path}")
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if sample_rate != target_rate:
+        samples = StreamingResampler(sample_rate, target_rate).process(samples)
+    return samples
+
+
+def normalize_text(text: str) -> str:
+    return _IGNORED_CHARS.sub("", text).lower()
+
+
+def edit_distance(reference: str, hypothesis: str) -> int:
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char))
+        previous = current
+    return previous[-1]
+
+
+def transcribe(model: ASRModel, audio: np.ndarray, response_mode: str) -> Tuple[str, float]:
+    """按服务端的流式步长切块识别，返回 (最终文本, 推理耗时秒数)"""
+    stride = get_chunk_stride_samples(response_mode)
+    cache: Dict = {}
+    text = ""
+    elapsed = 0.0
+    for offset in range(0, len(audio), stride):
+        chunk = audio[offset:offset + stride]
+        started = time.perf_counter()
+        result = model.recognize(chunk, cache, is_final=offset + stride >= len(audio), response_mode=response_mode)
+        elapsed += time.perf_counter() - started
+        text += result["text"]
+    return text, elapsed
+
+
+def evaluate(model: ASRModel, testset: List[Tuple[str, str]], response_mode: str, sample_rate: int) -> Dict:
+    errors = 0
+    reference_chars = 0
+    inference_seconds = 0.0
+    audio_seconds = 0.0
+    latencies_ms: List[float] = []
+    for wav_path, reference in testset:
+        audio = load_wav(wav_path, sample_rate)
+        hypothesis, elapsed = transcribe(model, audio, response_mode)
+        reference_norm = normalize_text(reference)
+        errors += edit_distance(reference_norm, normalize_text(hypothesis))
+        reference_chars += len(reference_norm)
+        inference_seconds += elapsed
+        audio_seconds += len(audio) / sample_rate
+        latencies_ms.append(elapsed * 1000)
+        logger.info(f"{os.path.basename(wav_path)}: ref='{reference}' hyp='{hypothesis}'")
+    return {
+        "files": len(testset),
+        "audio_seconds": round(audio_seconds, 2),
+        "cer": round(errors / reference_chars, 4) if reference_chars else 0.0,
+        "inference_seconds": round(inference_seconds, 3),
+        "rtf": round(inference_seconds / audio_seconds, 4) if audio_seconds else 0.0,
+        "p50_file_ms": round(float(np.percentile(latencies_ms, 50)), 1) if latencies_ms else 0.0,
+        "p95_file_ms": round(float(np.percentile(latencies_ms, 95)), 1) if latencies_ms else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FP32 and INT8 dynamic-quantized CPU inference")
+    parser.add_argument("--testset", required=True, help="TSV file: wav path<TAB>reference text")
+    parser.add_argument("--response-mode", choices=["fast", "balanced", "accurate"], default="balanced")
+    parser.add_argument("--threads", type=int, default=settings.torch_threads, help="PyTorch intra-op threads")
+    parser.add_argument("--limit", type=int, default=0, help="evaluate at most this many files")
+    parser.add_argument("--verbose", action="store_true", help="log every hypothesis")
+    args = parser.parse_args()
+
+    if args.verbose:
+        logger.setLevel(logging.INFO)
+
+    import torch
+    torch.set_num_threads(args.threads)
+
+    testset = load_testset(args.testset)
+    if args.limit > 0:
+        testset = testset[:args.limit]
+
+    report = {"response_mode": args.response_mode, "threads": args.threads}
+    for name, quantize in (("fp32", False), ("int8", True)):
+        model = ASRModel(
+            model_path=settings.model_path,
+            model_revision=settings.model_revision,
+            device="cpu",
+            semantic_punctuation_enabled=settings.semantic_punctuation_enabled,
+            max_sentence_silence=settings.max_sentence_silence,
+            model_dir=settings.model_dir,
+            quantize=quantize
+        )
+        # 预热一次，排除首次调用的内存分配与算子初始化开销
+        transcribe(model, np.zeros(settings.model_sample_rate, dtype=np.float32), args.response_mode)
+        report[name] = evaluate(model, testset, args.response_mode, settings.model_sample_rate)
+        del model
+
+    if report["fp32"]["inference_seconds"] > 0 and report["int8"]["inference_seconds"] > 0:
+        report["speedup"] = round(report["fp32"]["inference_seconds"] / report["int8"]["inference_seconds"], 2)
+        report["cer_delta"] = round(report["int8"]["cer"] - report["fp32"]["cer"], 4)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
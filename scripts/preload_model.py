@@ -3,8 +3,13 @@
 """
 模型预加载脚本
 用于提前下载和缓存模型，减少服务启动时间
+
+指定 --snapshot（或配置 model_snapshot_path）时，额外将构建完成的模型保存为快照文件，
+服务启动时内存映射加载快照，跳过配置解析与模型构建，多个推理进程共享权重内存：
+    python scripts/preload_model.py --snapshot models/paraformer.snapshot
 """
 
+import argparse
 import logging
 import os
 import sys
@@ -23,9 +28,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def preload_model():
+def preload_model(snapshot_path: str = ""):
     """
     预加载模型
+    
+    Args:
+        snapshot_path: 模型快照输出路径，为空时只下载缓存模型
     """
     logger.info("Starting model preload process...")
     logger.info(f"Model path: {settings.model_path}")
@@ -40,9 +48,13 @@ def preload_model():
             device=settings.device,
             semantic_punctuation_enabled=settings.semantic_punctuation_enabled,
             max_sentence_silence=settings.max_sentence_silence,
-            model_dir=settings.model_dir
+            model_dir=settings.model_dir,
+            quantize=settings.quantize_int8
         )
         
+        if snapshot_path:
+            asr_model.save_snapshot(snapshot_path)
+        
         logger.info("Model preload completed successfully!")
         logger.info("Models are now cached locally, service startup will be faster.")
         
@@ -52,4 +64,7 @@ def preload_model():
 
 
 if __name__ == "__main__":
-    preload_model()
+    parser = argparse.ArgumentParser(description="Download the ASR model and optionally write a model snapshot")
+    parser.add_argument("--snapshot", default=settings.model_snapshot_path, help="write a memory-mappable model snapshot to this path")
+    args = parser.parse_args()
+    preload_model(args.snapshot)
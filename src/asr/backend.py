@@ -0,0 +1,163 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..monitoring.metrics import MODEL_INFERENCE_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_cache_nbytes(value: Any) -> int:
+    """递归统计 cache 中张量与数组（torch.Tensor、numpy.ndarray）占用的字节数，其他对象忽略"""
+    if isinstance(value, dict):
+        return sum(estimate_cache_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_cache_nbytes(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "element_size") and hasattr(value, "nelement"):
+        return value.element_size() * value.nelement()
+    return 0
+
+
+class ASRBackend:
+    """流式识别后端接口
+
+    recognize / finalize 为同步调用，由推理执行器或推理进程在独立线程中执行。
+    cache 是会话级的流式状态，由调用方按会话保存并在每次调用时传回。
+    结果字典包含 text、cache、timestamp、sentence_info、is_partial、is_final。
+    """
+
+    # 预热期间的推理不计入推理耗时指标
+    _warming_up = False
+
+    def _record_inference(self, response_mode: str, seconds: float):
+        """记录一次推理耗时（asr_model_inference_seconds），预热期间忽略"""
+        if not self._warming_up:
+            MODEL_INFERENCE_SECONDS.labels(response_mode).observe(seconds)
+
+    def recognize(self, audio_data: np.ndarray, cache: Optional[Dict[str, Any]] = None, is_final: bool = False,
+                  enable_punctuation: bool = True, response_mode: str = "balanced") -> Dict[str, Any]:
+        """识别会话的一个音频块
+
+        text 约定为增量：只包含本次调用新解码出的文本（与 FunASR 流式 generate 一致），
+        不重复之前调用已返回的内容；没有新文本时为空字符串。
+        调用方按会话拼接增量得到当前句子的完整文本，在 is_final 结果处结束该句。
+
+        Args:
+            audio_data: 模型采样率的 float32 音频
+            cache: 会话的流式 cache，原地更新
+            is_final: 是否句子/会话的最后一块，为 True 时输出剩余文本
+            enable_punctuation: 是否启用标点
+            response_mode: 响应模式，决定 chunk_size
+
+        Returns:
+            结果字典，text 为本次调用新增的文本
+        """
+        raise NotImplementedError
+
+    def recognize_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量识别多个会话的音频块
+
+        每个请求字典包含 recognize 的参数（audio_data、cache、is_final、enable_punctuation、response_mode）。
+        默认在同一次推理任务内依次执行，省去逐块的线程切换与调度开销；
+        支持真正批量前向的后端可以覆盖此方法。
+
+        Returns:
+            与 requests 一一对应的识别结果列表
+        """
+        return [self.recognize(**request) for request in requests]
+
+    def finalize(self, cache: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def cache_nbytes(self, cache: Optional[Dict[str, Any]]) -> int:
+        """会话流式 cache 中张量占用的字节数"""
+        return estimate_cache_nbytes(cache) if cache else 0
+
+    def compact_cache(self, cache: Optional[Dict[str, Any]]):
+        """在句子边界压缩会话流式 cache
+
+        句子结束后的语音不再依赖之前的编码器/解码器上下文，默认原地清空流式状态，
+        下一次 recognize 时重新初始化；需要跨句保留状态的后端可以覆盖此方法。
+        只能在 is_final 结果之后调用：句中清空会丢弃尚未输出文本的音频与解码上下文。
+        """
+        if cache:
+            cache.clear()
+
+    def warmup(self, audio_seconds: float = 1.0, sample_rate: int = 16000) -> Dict[str, float]:
+        """预热推理：对每种响应模式按服务端相同的步长流式识别一段低幅噪声，最后一块以 is_final=True 结束
+
+        首次推理的算子初始化、内存分配与 JIT 开销在此处消耗，不会落到第一个真实请求上；
+        预热调用不计入推理耗时指标。
+
+        Args:
+            audio_seconds: 每种响应模式的预热音频时长（秒）
+            sample_rate: 音频采样率
+
+        Returns:
+            各响应模式的预热耗时（毫秒）
+        """
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(max(1, int(audio_seconds * sample_rate))) * 0.01).astype(np.float32)
+        self._warming_up = True
+        try:
+            return self._warmup_modes(audio)
+        finally:
+            self._warming_up = False
+
+    def _warmup_modes(self, audio: np.ndarray) -> Dict[str, float]:
+        from .model import RESPONSE_MODE_CHUNK_SIZES, get_chunk_stride_samples
+
+        timings: Dict[str, float] = {}
+        for response_mode in RESPONSE_MODE_CHUNK_SIZES:
+            stride = get_chunk_stride_samples(response_mode)
+            cache: Dict[str, Any] = {}
+            started = time.perf_counter()
+            offsets = range(0, len(audio), stride)
+            for offset in offsets:
+                # 与真实会话一致，最后一块以 is_final=True 识别，预热尾部刷新路径
+                self.recognize(audio[offset:offset + stride], cache, is_final=offset == offsets[-1],
+                               response_mode=response_mode)
+            timings[response_mode] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"Warmup for response_mode={response_mode} finished in {timings[response_mode]:.1f}ms")
+        return timings
+
+
+def _load_funasr_backend() -> Callable[..., ASRBackend]:
+    from .model import ASRModel
+    return ASRModel
+
+
+def _load_synthetic_backend() -> Callable[..., ASRBackend]:
+    from .synthetic import SyntheticASRModel
+    return SyntheticASRModel
+
+
+def _load_onnx_backend() -> Callable[..., ASRBackend]:
+    from .onnx_engine import OnnxASRModel
+    return OnnxASRModel
+
+
+# 后端名称到实现类加载函数的映射，实现类按需导入，未使用的后端不会导入其依赖
+ASR_BACKENDS: Dict[str, Callable[[], Callable[..., ASRBackend]]] = {
+    "funasr": _load_funasr_backend,
+    "synthetic": _load_synthetic_backend,
+    "onnx": _load_onnx_backend,
+}
+
+
+def create_asr_backend(backend: str = "funasr", **kwargs) -> ASRBackend:
+    """根据配置创建识别后端
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    loader = ASR_BACKENDS.get((backend or "funasr").lower())
+    if loader is None:
+        raise ValueError(f"Unknown ASR backend: {backend}")
+    logger.info(f"Creating ASR backend: {backend}")
+    return loader()(**kwargs)
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .executor import InferenceExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+class _MicroBatcher:
+    """微批调度的公共部分：请求队列、凑批、并发派发与关闭
+
+    凑批策略：推理执行器有空闲线程时立即派发已到达的请求，不为凑批额外等待；
+    所有线程都在推理时，新请求在 batch_window_ms 内继续累积，线程空出后以更大的批次执行。
+    低负载时不增加延迟，高负载时自然形成批次。
+
+    子类实现 _run_batch（在推理线程中执行一个批次），可覆盖 _split 把一次收集的请求拆分为多个批次、
+    覆盖 _keys 声明请求所属的会话；共享会话的批次按顺序执行，其余批次并发派发，并行度由执行器线程数限制。
+    """
+
+    def __init__(self, inference_executor: InferenceExecutor, max_batch_size: int = 8,
+                 batch_window_ms: int = 20, name: str = "batcher"):
+        self.inference_executor = inference_executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = max(0, batch_window_ms) / 1000.0
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: set = set()
+        logger.info(f"{name} configured: max_batch_size={self.max_batch_size}, window={batch_window_ms}ms")
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _enqueue(self, item) -> Any:
+        self._ensure_started()
+        await self._queue.put(item)
+        return await item.future
+
+    def _has_idle_worker(self) -> bool:
+        return len(self._dispatches) < self.inference_executor.max_workers
+
+    async def _collect(self) -> List[Any]:
+        first = await self._queue.get()
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            if self._has_idle_worker():
+                break
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _split(self, pending: List[Any]) -> List[List[Any]]:
+        return [pending]
+
+    def _keys(self, batch: List[Any]) -> List[str]:
+        return []
+
+    def _run_batch(self, batch: List[Any]) -> List[Any]:
+        raise NotImplementedError
+
+    async def _run(self):
+        while True:
+            try:
+                pending = await self._collect()
+            except asyncio.CancelledError:
+                break
+
+            # 同一次收集中共享会话的批次依次执行（保证会话 cache 按顺序更新），其余并发派发
+            running: Dict[str, asyncio.Task] = {}
+            for batch in self._split(pending):
+                keys = self._keys(batch)
+                after = {running[key] for key in keys if key in running}
+                task = asyncio.create_task(self._dispatch(batch, after))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+                for key in keys:
+                    running[key] = task
+
+    async def _dispatch(self, batch: List[Any], after: set):
+        if after:
+            await asyncio.gather(*after, return_exceptions=True)
+        logger.debug(f"{self.name} dispatching batch: size={len(batch)}, "
+                     f"max_wait={(time.perf_counter() - batch[0].enqueued_at) * 1000:.1f}ms")
+        try:
+            results = await self.inference_executor.submit(None, self._run_batch, batch)
+        except Exception as e:
+            logger.error(f"{self.name} batch error: {e}", exc_info=True)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, result in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+    async def shutdown(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._dispatches):
+            task.cancel()
+        logger.info(f"{self.name} shut down")
+
+
+class _PendingChunk:
+    """等待批处理的音频块"""
+
+    __slots__ = ("session_key", "audio", "cache", "is_final", "enable_punctuation", "response_mode", "future", "enqueued_at")
+
+    def __init__(self, session_key: str, audio: np.ndarray, cache: Dict[str, Any], is_final: bool,
+                 enable_punctuation: bool, response_mode: str, future: asyncio.Future):
+        self.session_key = session_key
+        self.audio = audio
+        self.cache = cache
+        self.is_final = is_final
+        self.enable_punctuation = enable_punctuation
+        self.response_mode = response_mode
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchScheduler(_MicroBatcher):
+    """跨会话动态微批调度器
+
+    收集所有活跃会话提交的音频块，按 response_mode 分组（同组的 chunk_size 配置一致），
+    每组作为一个批次调用一次 ASRBackend.recognize_batch，然后把结果分发回各会话的 future。
+    onnx 后端在 recognize_batch 中把同形状的块堆叠为一次编码器/解码器前向，其他后端逐块执行。
+
+    同一会话在一个批次中最多出现一次，保证会话的流式 cache 按顺序更新。
+    """
+
+    def __init__(self, asr_model, inference_executor: InferenceExecutor,
+                 max_batch_size: int = 8, batch_window_ms: int = 20):
+        super().__init__(inference_executor, max_batch_size, batch_window_ms, name="Batch scheduler")
+        self.asr_model = asr_model
+
+    async def submit(self, session_key: str, audio: np.ndarray, cache: Dict[str, Any], is_final: bool = False,
+                     enable_punctuation: bool = True, response_mode: str = "balanced") -> Dict[str, Any]:
+        """提交一个音频块并等待识别结果
+
+        Args:
+            session_key: 会话标识（task_id）
+            audio: 音频数据
+            cache: 会话的流式 cache
+            is_final: 是否最后一块
+            enable_punctuation: 是否启用标点
+            response_mode: 响应模式
+
+        Returns:
+            与 ASRBackend.recognize 相同格式的结果字典
+        """
+        future = asyncio.get_running_loop().create_future()
+        return await self._enqueue(_PendingChunk(
+            session_key, audio, cache, is_final, enable_punctuation, response_mode, future
+        ))
+
+    def _split(self, pending: List[_PendingChunk]) -> List[List[_PendingChunk]]:
+        """按 response_mode 分组，并保证同一会话在一个批次中只出现一次"""
+        groups: List[List[_PendingChunk]] = []
+        index: Dict[str, List[List[_PendingChunk]]] = {}
+        for item in pending:
+            candidates = index.setdefault(item.response_mode, [])
+            for group in candidates:
+                if all(other.session_key != item.session_key for other in group):
+                    group.append(item)
+                    break
+            else:
+                group = [item]
+                candidates.append(group)
+                groups.append(group)
+        return groups
+
+    def _keys(self, batch: List[_PendingChunk]) -> List[str]:
+        return [item.session_key for item in batch]
+
+    def _run_batch(self, batch: List[_PendingChunk]) -> List[Dict[str, Any]]:
+        return self.asr_model.recognize_batch([
+            {
+                "audio_data": item.audio,
+                "cache": item.cache,
+                "is_final": item.is_final,
+                "enable_punctuation": item.enable_punctuation,
+                "response_mode": item.response_mode,
+            }
+            for item in batch
+        ])
+
+
+class _PendingItem:
+    """等待无状态批处理的请求"""
+
+    __slots__ = ("payload", "future", "enqueued_at")
+
+    def __init__(self, payload: Any, future: asyncio.Future):
+        self.payload = payload
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class WindowedBatcher(_MicroBatcher):
+    """跨会话的无状态微批服务
+
+    收集所有会话提交的请求，合并为一次 batch_fn(payloads) 调用，在给定的推理执行器中执行。
+    与 BatchScheduler 不同，请求之间没有流式 cache 依赖，批次之间没有顺序约束。
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], inference_executor: InferenceExecutor,
+                 max_batch_size: int = 8, batch_window_ms: int = 50, name: str = "batcher"):
+        super().__init__(inference_executor, max_batch_size, batch_window_ms, name=name)
+        self.batch_fn = batch_fn
+
+    async def submit(self, payload: Any) -> Any:
+        """提交一个请求并等待 batch_fn 返回的对应结果"""
+        future = asyncio.get_running_loop().create_future()
+        return await self._enqueue(_PendingItem(payload, future))
+
+    def _run_batch(self, batch: List[_PendingItem]) -> List[Any]:
+        return self.batch_fn([item.payload for item in batch])
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """推理执行器
+
+    将同步的模型推理调用（ASRModel.recognize / finalize）从 asyncio 事件循环中
+    移到独立的线程池执行，避免单个连接的推理阻塞其他连接的收发与心跳。
+
+    同一会话的任务通过会话级锁串行执行，保证同一个流式 cache 不会被
+    两个工作线程同时访问；不同会话之间的任务可以并行执行。
+    """
+
+    def __init__(self, max_workers: int = 2, thread_name_prefix: str = "asr-infer"):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._closed = False
+        logger.info(f"Inference executor started: workers={self.max_workers}")
+
+    def _get_lock(self, session_key: str) -> asyncio.Lock:
+        lock = self._session_locks.get(session_key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_key] = lock
+        return lock
+
+    async def submit(self, session_key: Optional[str], fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """提交推理任务并等待结果
+
+        Args:
+            session_key: 会话标识（通常为 task_id），同一会话的任务按提交顺序串行执行；
+                为 None 时不做会话级串行
+            fn: 需要在工作线程中执行的同步函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            fn 的返回值
+        """
+        if self._closed:
+            raise RuntimeError("Inference executor is closed")
+
+        loop = asyncio.get_running_loop()
+        call = lambda: fn(*args, **kwargs)
+
+        if session_key is None:
+            return await loop.run_in_executor(self._executor, call)
+
+        # asyncio.Lock 按获取顺序（FIFO）唤醒等待者，保证会话内任务顺序
+        async with self._get_lock(session_key):
+            return await loop.run_in_executor(self._executor, call)
+
+    def release_session(self, session_key: str):
+        """释放会话级锁，会话结束后调用"""
+        lock = self._session_locks.get(session_key)
+        if lock is not None and not lock.locked():
+            del self._session_locks[session_key]
+
+    def shutdown(self, wait: bool = True):
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=wait)
+        self._session_locks.clear()
+        logger.info("Inference executor shut down")
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from .executor import InferenceExecutor
+from ..audio.vad import EnergyVAD, StreamingVADGate
+from ..monitoring.metrics import FILE_AUDIO_SECONDS, FILE_TRANSCRIPTION_RTF
+
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechSegment:
+    """VAD 切分出的一段语音，时间以毫秒计（相对文件开头）"""
+
+    __slots__ = ("index", "begin_ms", "end_ms", "audio")
+
+    def __init__(self, index: int, begin_ms: int, end_ms: int, audio: np.ndarray):
+        self.index = index
+        self.begin_ms = begin_ms
+        self.end_ms = end_ms
+        self.audio = audio
+
+
+def split_speech_segments(chunks: Iterable[np.ndarray], sample_rate: int = 16000, end_silence_ms: int = 500,
+                          max_segment_seconds: float = 30.0, pre_speech_ms: int = 200,
+                          threshold_db: float = -45.0, noise_margin_db: float = 10.0) -> Iterator[SpeechSegment]:
+    """用能量 VAD 把整段音频切分为语音片段，静音部分不产出
+
+    复用流式 VAD 闸门：闸门返回的音频与输入块在时间上连续，据此换算片段起止时间。
+    片段在连续静音达到 end_silence_ms 或时长超过 max_segment_seconds 时结束，
+    后者保证离线模型单次输入有上限，批内各段长度相近。
+    """
+    gate = StreamingVADGate(EnergyVAD(sample_rate, threshold_db=threshold_db, noise_margin_db=noise_margin_db),
+                            sample_rate, pre_speech_ms=pre_speech_ms, end_silence_ms=end_silence_ms)
+    max_samples = max(1, int(max_segment_seconds * sample_rate))
+    parts: List[np.ndarray] = []
+    part_samples = 0
+    begin = 0
+    position = 0
+    index = 0
+
+    def emit(end: int) -> SpeechSegment:
+        nonlocal parts, part_samples, index
+        audio = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        segment = SpeechSegment(index, begin * 1000 // sample_rate, end * 1000 // sample_rate, audio)
+        index += 1
+        parts = []
+        part_samples = 0
+        return segment
+
+    for chunk in chunks:
+        position += len(chunk)
+        audio, speech_end = gate.process(chunk)
+        if len(audio):
+            if not parts:
+                begin = position - len(audio)
+            parts.append(audio)
+            part_samples += len(audio)
+        if parts and (speech_end or part_samples >= max_samples):
+            yield emit(begin + part_samples)
+    if parts:
+        yield emit(begin + part_samples)
+
+
+class FileTranscriber:
+    """整段音频文件转写：VAD 切分 -> 离线模型批量识别 -> 按顺序产出结果
+
+    切分在线程中逐段推进，凑满 batch_size 段即提交一次 transcribe_batch；
+    最多 max_inflight 个批次同时在推理执行器中运行，结果按片段顺序产出，
+    先完成的后续批次等待前序批次，不打乱顺序。
+    """
+
+    def __init__(self, offline_model, inference_executor: InferenceExecutor, batch_size: int = 8,
+                 max_inflight: int = 2, punctuator=None, sample_rate: int = 16000, end_silence_ms: int = 500,
+                 max_segment_seconds: float = 30.0, pre_speech_ms: int = 200,
+                 threshold_db: float = -45.0, noise_margin_db: float = 10.0):
+        self.offline_model = offline_model
+        self.inference_executor = inference_executor
+        self.batch_size = max(1, batch_size)
+        self.max_inflight = max(1, max_inflight)
+        self.punctuator = punctuator
+        self.sample_rate = sample_rate
+        self.segment_options = dict(
+            sample_rate=sample_rate, end_silence_ms=end_silence_ms, max_segment_seconds=max_segment_seconds,
+            pre_speech_ms=pre_speech_ms, threshold_db=threshold_db, noise_margin_db=noise_margin_db
+        )
+        logger.info(f"File transcriber configured: batch_size={self.batch_size}, max_inflight={self.max_inflight}")
+
+    async def _next_batch(self, segments: Iterator[SpeechSegment]) -> List[SpeechSegment]:
+        # 解码、重采样与 VAD 都是 CPU 计算，放到线程中推进，不阻塞事件循环
+        def take() -> List[SpeechSegment]:
+            batch = []
+            for segment in segments:
+                batch.append(segment)
+                if len(batch) >= self.batch_size:
+                    break
+            return batch
+        return await asyncio.to_thread(take)
+
+    async def _finish_batch(self, batch: List[SpeechSegment], future: asyncio.Future,
+                            punctuate: bool) -> List[Dict[str, Any]]:
+        texts = await future
+        if punctuate and self.punctuator:
+            texts = await asyncio.gather(*(self._punctuate(text) for text in texts))
+        return [
+            {"index": segment.index, "begin_time": segment.begin_ms, "end_time": segment.end_ms, "text": text}
+            for segment, text in zip(batch, texts)
+        ]
+
+    async def _punctuate(self, text: str) -> str:
+        if not text:
+            return text
+        try:
+            return await self.punctuator.punctuate(text)
+        except Exception as e:
+            logger.warning(f"Punctuation failed during file transcription: {e}")
+            return text
+
+    async def transcribe(self, chunks: Iterable[np.ndarray], punctuate: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """转写整段音频，逐段产出 {"index", "begin_time", "end_time", "text"}，最后产出汇总信息
+
+        Args:
+            chunks: 模型采样率的 float32 音频块，按时间顺序
+            punctuate: 是否对每段文本加标点（需启用标点服务）
+
+        Yields:
+            片段结果，以及末尾一条 {"segments", "speech_time", "duration", "processing_time", "rtf"} 汇总
+        """
+        started = time.perf_counter()
+        counted = _CountingChunks(chunks)
+        segments = split_speech_segments(counted, **self.segment_options)
+        inflight: deque = deque()
+        total_segments = 0
+        speech_samples = 0
+        try:
+            exhausted = False
+            while True:
+                # 流水线未满时继续切分并提交批次，切分与已提交批次的推理并行
+                while not exhausted and len(inflight) < self.max_inflight:
+                    batch = await self._next_batch(segments)
+                    exhausted = len(batch) < self.batch_size
+                    if batch:
+                        total_segments += len(batch)
+                        speech_samples += sum(len(segment.audio) for segment in batch)
+                        future = asyncio.ensure_future(self.inference_executor.submit(
+                            None, self.offline_model.transcribe_batch, [segment.audio for segment in batch]
+                        ))
+                        inflight.append((batch, future))
+                    if inflight and inflight[0][1].done():
+                        break
+                if not inflight:
+                    break
+                batch, future = inflight.popleft()
+                for result in await self._finish_batch(batch, future, punctuate):
+                    yield result
+        finally:
+            for _, future in inflight:
+                future.cancel()
+
+        elapsed = time.perf_counter() - started
+        duration = counted.samples / self.sample_rate
+        rtf = elapsed / duration if duration > 0 else 0.0
+        FILE_AUDIO_SECONDS.inc(duration)
+        if duration > 0:
+            FILE_TRANSCRIPTION_RTF.observe(rtf)
+        logger.info(f"File transcribed: duration={duration:.1f}s, segments={total_segments}, "
+                    f"speech={speech_samples / self.sample_rate:.1f}s, elapsed={elapsed:.2f}s, rtf={rtf:.4f}")
+        yield {
+            "segments": total_segments,
+            "speech_time": int(speech_samples * 1000 / self.sample_rate),
+            "duration": int(duration * 1000),
+            "processing_time": int(elapsed * 1000),
+            "rtf": round(rtf, 4),
+        }
+
+
+class _CountingChunks:
+    """统计经过的音频样本数，用于计算文件总时长"""
+
+    def __init__(self, chunks: Iterable[np.ndarray]):
+        self._chunks = chunks
+        self.samples = 0
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for chunk in self._chunks:
+            self.samples += len(chunk)
+            yield chunk
@@ -1,33 +1,65 @@
 import logging
 import os
-from funasr import AutoModel
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 import numpy as np
 
+from .backend import ASRBackend
+
 
 logger = logging.getLogger(__name__)
 
 
-class ASRModel:
+# 各响应模式对应的 Paraformer 流式 chunk_size 配置 [0, chunk, look_back]，单位为 60ms 帧
+RESPONSE_MODE_CHUNK_SIZES = {
+    "fast": [0, 3, 1],  # 180ms出字，60ms前瞻
+    "balanced": [0, 5, 2],  # 300ms出字，120ms前瞻
+    "accurate": [0, 8, 4],  # 480ms出字，240ms前瞻
+}
+
+# chunk_size 中一帧对应的采样点数（16kHz 下 60ms）
+SAMPLES_PER_CHUNK_FRAME = 960
+
+
+def get_chunk_size(response_mode: str) -> list:
+    """返回响应模式对应的 chunk_size，未知模式按 balanced 处理"""
+    return RESPONSE_MODE_CHUNK_SIZES.get(response_mode, RESPONSE_MODE_CHUNK_SIZES["balanced"])
+
+
+def get_chunk_stride_samples(response_mode: str) -> int:
+    """返回响应模式下模型每次前向处理的音频步长（采样点数）
+
+    FunASR 流式 Paraformer 在一次 generate 调用内按该步长切分输入并依次推理，
+    不足一个步长的尾部样本留在 cache 中等待下一次调用。
+    """
+    return get_chunk_size(response_mode)[1] * SAMPLES_PER_CHUNK_FRAME
+
+
+class ASRModel(ASRBackend):
+    """基于 funasr.AutoModel 的流式识别后端"""
     
-    def __init__(self, model_path: str = "paraformer-zh-streaming", model_revision: str = "v2.0.4", device: str = "cpu", semantic_punctuation_enabled: bool = True, max_sentence_silence: int = 800, model_dir: str = "models", enable_punctuation_model: bool = False, default_response_mode: str = "fast"):
+    def __init__(self, model_path: str = "paraformer-zh-streaming", model_revision: str = "v2.0.4", device: str = "cpu", semantic_punctuation_enabled: bool = True, max_sentence_silence: int = 800, model_dir: str = "models", default_response_mode: str = "fast", quantize: bool = False, snapshot_path: str = ""):
         self.model_path = model_path
         self.model_revision = model_revision
         self.device = device
         self.semantic_punctuation_enabled = semantic_punctuation_enabled
         self.max_sentence_silence = max_sentence_silence
         self.model_dir = model_dir
-        self.enable_punctuation_model = enable_punctuation_model
         self.default_response_mode = default_response_mode
+        self.quantize = quantize
+        self.snapshot_path = snapshot_path
         self.model = None
-        self._load_model()
+        if not self._load_snapshot():
+            self._load_model()
     
     def _load_model(self):
+        # 延迟导入 funasr，使用其他后端时无需安装
+        from funasr import AutoModel
+        
         try:
             logger.info(f"Loading ASR model: {self.model_path} (revision: {self.model_revision})")
             logger.info(f"Semantic punctuation: {self.semantic_punctuation_enabled}")
             logger.info(f"Max sentence silence: {self.max_sentence_silence}ms")
-            logger.info(f"Punctuation model: {self.enable_punctuation_model}")
             logger.info(f"Default response mode: {self.default_response_mode}")
             
             # 正确加载模型，包含标点模型
@@ -54,32 +86,85 @@ class ASRModel:
             else:
                 model_path = self.model_path
             
-            # 根据配置决定是否加载标点模型
-            if self.enable_punctuation_model:
-                self.model = AutoModel(
-                    model=model_path,
-                    model_revision=self.model_revision,
-                    device=self.device,
-                    punc_model="ct-punc",
-                    disable_update=True,
-                    trust_remote_code=False
-                )
-                logger.info("ASR model loaded successfully with punctuation model")
-            else:
-                self.model = AutoModel(
-                    model=model_path,
-                    model_revision=self.model_revision,
-                    device=self.device,
-                    disable_update=True,
-                    trust_remote_code=False
-                )
-                logger.info("ASR model loaded successfully without punctuation model (optimized for speed)")
+            # 标点由独立的 PunctuationService 在句末批量处理，流式模型不挂载标点模型
+            self.model = AutoModel(
+                model=model_path,
+                model_revision=self.model_revision,
+                device=self.device,
+                disable_update=True,
+                trust_remote_code=False
+            )
+            logger.info("ASR model loaded successfully")
+            
+            if self.quantize:
+                self._quantize_model()
         except Exception as e:
             logger.error(f"Failed to load ASR model: {e}")
             import traceback
             traceback.print_exc()
             raise
     
+    def _snapshot_metadata(self) -> Dict[str, Any]:
+        """快照校验信息：模型来源、版本或量化配置变化后旧快照失效"""
+        return {
+            "model_path": self.model_path,
+            "model_revision": self.model_revision,
+            "quantize": self.quantize,
+        }
+    
+    def _load_snapshot(self) -> bool:
+        """从快照加载模型，快照未配置、不存在或已过期时返回 False 回退到正常加载"""
+        if not self.snapshot_path:
+            return False
+        if not os.path.exists(self.snapshot_path):
+            logger.warning(f"Model snapshot {self.snapshot_path} not found, building model from {self.model_path}")
+            return False
+        
+        from .snapshot import load_model_snapshot
+        
+        started = time.perf_counter()
+        try:
+            self.model = load_model_snapshot(self.snapshot_path, self._snapshot_metadata())
+        except Exception as e:
+            logger.warning(f"Failed to load model snapshot {self.snapshot_path}: {e}, building model from {self.model_path}")
+            self.model = None
+            return False
+        
+        if not str(self.device).startswith("cpu"):
+            # 快照权重映射在 CPU 上，迁移到目标设备后不再共享页缓存
+            self.model.model.to(self.device)
+            self.model.kwargs["device"] = self.device
+        logger.info(f"ASR model loaded from snapshot {self.snapshot_path} in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return True
+    
+    def save_snapshot(self, path: str):
+        """将当前已加载（及量化）的模型保存为快照文件，供后续启动内存映射加载"""
+        from .snapshot import save_model_snapshot
+        
+        save_model_snapshot(self.model, path, self._snapshot_metadata())
+    
+    def _quantize_model(self):
+        """对 ASR 模型的 Linear 层做 PyTorch 动态 INT8 量化
+        
+        权重离线量化为 int8，激活在推理时按批动态量化，无需校准数据。
+        动态量化只有 CPU 内核，非 CPU 设备上跳过。
+        """
+        if not str(self.device).startswith("cpu"):
+            logger.warning(f"INT8 dynamic quantization is only supported on CPU, skipping for device {self.device}")
+            return
+        
+        import torch
+        
+        network = getattr(self.model, "model", None)
+        if not isinstance(network, torch.nn.Module):
+            logger.warning("Loaded model does not expose a torch.nn.Module, skipping INT8 quantization")
+            return
+        
+        linear_layers = sum(1 for module in network.modules() if isinstance(module, torch.nn.Linear))
+        self.model.model = torch.quantization.quantize_dynamic(network, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model.model.eval()
+        logger.info(f"Applied INT8 dynamic quantization to {linear_layers} Linear layers")
+    
     def recognize(self, audio_data: np.ndarray, cache: Optional[Dict[str, Any]] = None, is_final: bool = False, 
                   enable_punctuation: bool = True, response_mode: str = "balanced") -> Dict[str, Any]:
         if self.model is None:
@@ -92,18 +177,12 @@ class ASRModel:
             logger.debug(f"Recognizing audio: shape={audio_data.shape}, dtype={audio_data.dtype}, is_final={is_final}, response_mode={response_mode}")
             
             # 根据响应模式选择不同的chunk_size
-            if response_mode == "fast":
-                chunk_size = [0, 3, 1]  # 180ms出字，60ms前瞻
-                logger.debug("Using fast response mode: chunk_size=[0, 3, 1]")
-            elif response_mode == "accurate":
-                chunk_size = [0, 8, 4]  # 480ms出字，240ms前瞻
-                logger.debug("Using accurate response mode: chunk_size=[0, 8, 4]")
-            else:  # balanced
-                chunk_size = [0, 5, 2]  # 300ms出字，120ms前瞻
-                logger.debug("Using balanced response mode: chunk_size=[0, 5, 2]")
+            chunk_size = get_chunk_size(response_mode)
+            logger.debug(f"Using {response_mode} response mode: chunk_size={chunk_size}")
             
             # 正确的 FunASR 流式推理参数
             logger.debug(f"Calling model.generate with chunk_size={chunk_size}, max_sentence_silence={self.max_sentence_silence}, semantic_punctuation_enabled={self.semantic_punctuation_enabled}")
+            started = time.perf_counter()
             result = self.model.generate(
                 input=audio_data,
                 cache=cache,
@@ -116,6 +195,7 @@ class ASRModel:
                 semantic_punctuation_enabled=self.semantic_punctuation_enabled,
                 disable_pbar=True
             )
+            self._record_inference(response_mode, time.perf_counter() - started)
             
             logger.debug(f"Model result: {result}")
             
@@ -0,0 +1,74 @@
+import logging
+import os
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class OfflineASRModel:
+    """基于 funasr.AutoModel 的离线（非流式）识别模型
+
+    对整句或整段音频一次性识别，精度高于流式模型；多段音频合并为一次批量 generate 调用。
+    """
+
+    def __init__(self, model_path: str = "paraformer-zh", model_revision: str = "", device: str = "cpu",
+                 model_dir: str = "models"):
+        # 延迟导入 funasr，使用其他后端时无需安装
+        from funasr import AutoModel
+
+        if not os.path.isabs(model_dir):
+            model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), model_dir)
+        os.makedirs(model_dir, exist_ok=True)
+        os.environ['MODELSCOPE_CACHE'] = model_dir
+
+        self.model_path = model_path
+        kwargs = {"model_revision": model_revision} if model_revision else {}
+        logger.info(f"Loading offline ASR model: {model_path}")
+        self.model = AutoModel(model=model_path, device=device, disable_update=True, trust_remote_code=False, **kwargs)
+        logger.info("Offline ASR model loaded successfully")
+
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """批量识别多段完整音频（16kHz float32）
+
+        Returns:
+            与 audios 一一对应的识别文本
+        """
+        if not audios:
+            return []
+        started = time.perf_counter()
+        results = self.model.generate(input=list(audios), batch_size=len(audios), disable_pbar=True)
+        logger.debug(f"Offline batch of {len(audios)} segments decoded in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return [result.get("text", "") for result in results]
+
+
+def _load_funasr_offline_model() -> Callable[..., OfflineASRModel]:
+    return OfflineASRModel
+
+
+def _load_synthetic_offline_model() -> Callable:
+    from .synthetic import SyntheticASRModel
+    return SyntheticASRModel
+
+
+# 离线模型后端名称到实现类加载函数的映射，与流式后端的 ASR_BACKENDS 对应
+OFFLINE_BACKENDS: Dict[str, Callable[[], Callable]] = {
+    "funasr": _load_funasr_offline_model,
+    "synthetic": _load_synthetic_offline_model,
+}
+
+
+def create_offline_model(backend: str = "funasr", **kwargs):
+    """根据配置创建离线识别模型，返回的对象提供 transcribe_batch(audios) -> List[str]
+
+    Raises:
+        ValueError: 不支持离线识别的后端名称
+    """
+    loader = OFFLINE_BACKENDS.get((backend or "funasr").lower())
+    if loader is None:
+        raise ValueError(f"Offline ASR is not available for backend: {backend}")
+    logger.info(f"Creating offline ASR model: {backend}")
+    return loader()(**kwargs)
@@ -0,0 +1,520 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .backend import ASRBackend
+from .model import get_chunk_size, SAMPLES_PER_CHUNK_FRAME
+
+
+logger = logging.getLogger(__name__)
+
+
+# 不输出到识别文本的特殊符号
+_SPECIAL_TOKENS = {"<s>", "</s>", "<unk>", "<OOV>", "<blank>"}
+# 解码时过滤的符号ID：0 为 blank，2 为 eos
+_FILTERED_TOKEN_IDS = (0, 2)
+
+
+def load_cmvn(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """读取 Kaldi nnet 文本格式的 am.mvn，返回 (shift, scale)，特征归一化为 (x + shift) * scale"""
+    shift: List[str] = []
+    scale: List[str] = []
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    for index, line in enumerate(lines[:-1]):
+        items = line.split()
+        if not items:
+            continue
+        following = lines[index + 1].split()
+        if not following or following[0] != "<LearnRateCoef>":
+            continue
+        # <LearnRateCoef> 0 [ v1 v2 ... ]
+        if items[0] == "<AddShift>":
+            shift = following[3:-1]
+        elif items[0] == "<Rescale>":
+            scale = following[3:-1]
+    return np.asarray(shift, dtype=np.float32), np.asarray(scale, dtype=np.float32)
+
+
+def sentence_postprocess(tokens: List[str]) -> str:
+    """把模型输出的字/子词序列拼接为文本
+
+    中文字符直接拼接；英文子词以 "@@" 结尾表示与下一个子词相连，完整单词之间以空格分隔。
+    """
+    pieces: List[str] = []
+    for token in tokens:
+        if token in _SPECIAL_TOKENS:
+            continue
+        if token.endswith("@@"):
+            pieces.append(token[:-2])
+        elif token.isascii() and token.isalpha():
+            pieces.append(token)
+            pieces.append(" ")
+        else:
+            # 中文等非字母符号紧跟在英文单词之后时去掉单词后的空格
+            if pieces and pieces[-1] == " ":
+                pieces.pop()
+            pieces.append(token)
+    return "".join(pieces).strip()
+
+
+def _mel_scale(freq: np.ndarray) -> np.ndarray:
+    return 1127.0 * np.log(1.0 + freq / 700.0)
+
+
+def _kaldi_mel_banks(num_bins: int, sample_rate: int, fft_size: int,
+                     low_freq: float = 20.0, high_freq: float = 0.0) -> np.ndarray:
+    """与 Kaldi MelBanks 一致的三角滤波器组，形状 (num_bins, fft_size // 2)"""
+    nyquist = sample_rate / 2
+    if high_freq <= 0:
+        high_freq += nyquist
+    num_fft_bins = fft_size // 2
+    mel_low = _mel_scale(np.float64(low_freq))
+    mel_high = _mel_scale(np.float64(high_freq))
+    mel_delta = (mel_high - mel_low) / (num_bins + 1)
+    fft_mels = _mel_scale(np.arange(num_fft_bins) * sample_rate / fft_size)
+
+    banks = np.zeros((num_bins, num_fft_bins), dtype=np.float64)
+    for b in range(num_bins):
+        left = mel_low + b * mel_delta
+        center = left + mel_delta
+        right = center + mel_delta
+        rising = (fft_mels > left) & (fft_mels <= center)
+        falling = (fft_mels > center) & (fft_mels < right)
+        banks[b, rising] = (fft_mels[rising] - left) / (center - left)
+        banks[b, falling] = (right - fft_mels[falling]) / (right - center)
+    return banks.astype(np.float32)
+
+
+def _window(window_type: str, length: int) -> np.ndarray:
+    n = np.arange(length)
+    a = 2 * np.pi / (length - 1)
+    if window_type == "hamming":
+        return (0.54 - 0.46 * np.cos(a * n)).astype(np.float32)
+    if window_type == "hanning":
+        return (0.5 - 0.5 * np.cos(a * n)).astype(np.float32)
+    if window_type == "povey":
+        return ((0.5 - 0.5 * np.cos(a * n)) ** 0.85).astype(np.float32)
+    if window_type == "rectangular":
+        return np.ones(length, dtype=np.float32)
+    raise ValueError(f"Unsupported window type: {window_type}")
+
+
+class StreamingFbankFrontend:
+    """流式特征前端：Kaldi 兼容 fbank + LFR 拼帧 + CMVN
+
+    与 Paraformer 训练时的 WavFrontend 一致（snip_edges、去直流、0.97 预加重、
+    512 点 FFT、功率谱、log-mel），逐块处理时在会话状态中保留不足一帧的采样点
+    和 LFR 拼帧所需的历史帧，输出与整段处理一致。全部计算按帧向量化。
+    """
+
+    def __init__(self, cmvn: Tuple[np.ndarray, np.ndarray], fs: int = 16000, n_mels: int = 80,
+                 frame_length: int = 25, frame_shift: int = 10, lfr_m: int = 7, lfr_n: int = 6,
+                 window: str = "hamming", dither: float = 0.0, **kwargs):
+        self.fs = fs
+        self.n_mels = n_mels
+        self.frame_samples = fs * frame_length // 1000
+        self.shift_samples = fs * frame_shift // 1000
+        self.fft_size = 1 << (self.frame_samples - 1).bit_length()
+        self.lfr_m = lfr_m
+        self.lfr_n = lfr_n
+        self.window = _window(window, self.frame_samples)
+        self.mel_banks_t = np.ascontiguousarray(_kaldi_mel_banks(n_mels, fs, self.fft_size).T)
+        self.cmvn_shift, self.cmvn_scale = cmvn
+        self._frame_offsets = np.arange(self.frame_samples)
+        # 推理时不加抖动，保证结果可复现
+        if dither:
+            logger.debug(f"Ignoring frontend dither={dither} for inference")
+
+    @property
+    def output_dim(self) -> int:
+        return self.n_mels * self.lfr_m
+
+    def init_state(self) -> Dict[str, Any]:
+        return {"samples": np.zeros(0, dtype=np.float32), "splice": None}
+
+    def fbank(self, waveform: np.ndarray) -> np.ndarray:
+        """计算 log-mel fbank，waveform 为 [-1, 1] 的 float32，返回 (帧数, n_mels)"""
+        num_frames = (len(waveform) - self.frame_samples) // self.shift_samples + 1
+        if num_frames <= 0:
+            return np.zeros((0, self.n_mels), dtype=np.float32)
+        index = self._frame_offsets[None, :] + self.shift_samples * np.arange(num_frames)[:, None]
+        frames = waveform[index] * np.float32(32768.0)
+        frames -= frames.mean(axis=1, keepdims=True)
+        frames[:, 1:] -= np.float32(0.97) * frames[:, :-1]
+        frames[:, 0] *= np.float32(1 - 0.97)
+        frames *= self.window
+        spectrum = np.fft.rfft(frames, n=self.fft_size)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        mel = power[:, :self.fft_size // 2] @ self.mel_banks_t
+        return np.log(np.maximum(mel, np.finfo(np.float32).eps))
+
+    def _apply_lfr(self, feats: np.ndarray, is_final: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """LFR 拼帧：每 lfr_n 帧取一次、拼接 lfr_m 帧；非结束块中不完整的拼帧留到下一块"""
+        total = len(feats)
+        num_lfr = int(np.ceil((total - (self.lfr_m - 1) // 2) / self.lfr_n))
+        outputs = []
+        splice_index = max(num_lfr, 0)
+        for i in range(max(num_lfr, 0)):
+            start = i * self.lfr_n
+            if self.lfr_m <= total - start:
+                outputs.append(feats[start:start + self.lfr_m].reshape(-1))
+            elif is_final:
+                padding = np.repeat(feats[-1:], self.lfr_m - (total - start), axis=0)
+                outputs.append(np.concatenate((feats[start:], padding)).reshape(-1))
+            else:
+                splice_index = i
+                break
+        remainder = feats[min(total - 1, splice_index * self.lfr_n):]
+        if not outputs:
+            return np.zeros((0, self.output_dim), dtype=np.float32), remainder
+        return np.vstack(outputs).astype(np.float32), remainder
+
+    def _apply_cmvn(self, feats: np.ndarray) -> np.ndarray:
+        dim = feats.shape[1]
+        return (feats + self.cmvn_shift[:dim]) * self.cmvn_scale[:dim]
+
+    def extract(self, samples: np.ndarray, state: Dict[str, Any], is_final: bool = False) -> np.ndarray:
+        """处理一块音频，返回本块可以确定的 LFR 特征 (帧数, n_mels * lfr_m)"""
+        buffered = np.concatenate((state["samples"], samples.astype(np.float32, copy=False)))
+        feats = self.fbank(buffered)
+        state["samples"] = buffered[len(feats) * self.shift_samples:]
+
+        empty = np.zeros((0, self.output_dim), dtype=np.float32)
+        outputs = empty
+        if len(feats):
+            if state["splice"] is None:
+                # 句首按 LFR 左侧上下文复制第一帧
+                state["splice"] = np.repeat(feats[:1], (self.lfr_m - 1) // 2, axis=0)
+            if len(feats) + len(state["splice"]) >= self.lfr_m:
+                outputs, state["splice"] = self._apply_lfr(np.concatenate((state["splice"], feats)), is_final)
+                outputs = self._apply_cmvn(outputs)
+            else:
+                state["splice"] = np.concatenate((state["splice"], feats))
+                return empty
+        elif is_final and state["splice"] is not None and len(state["splice"]):
+            outputs, _ = self._apply_lfr(state["splice"], is_final)
+            outputs = self._apply_cmvn(outputs) if len(outputs) else outputs
+
+        if is_final:
+            state.update(self.init_state())
+        return outputs
+
+
+class OnnxASRModel(ASRBackend):
+    """基于 onnxruntime 的流式 Paraformer 推理引擎
+
+    加载 FunASR 导出的流式 Paraformer（model.onnx 编码器+CIF 预测器、decoder.onnx 解码器、
+    config.yaml、am.mvn、tokens.json），特征前端、CIF 与流式状态全部在本类中显式管理：
+    会话 cache 保存未满一个步长的采样点、前端状态、位置编码偏移、重叠特征帧、
+    CIF 累积量与解码器各层 FSMN 记忆张量。每个音频块只执行两次 ONNX 推理，
+    不经过 AutoModel.generate 的参数解析与前端初始化，线程数由 intra_op_threads 控制。
+    返回结果与 ASRModel.recognize 相同格式（text 为本次调用新增的文本）。
+    """
+
+    def __init__(self, model_dir: str, quantize: bool = False, intra_op_threads: int = 4,
+                 device: str = "cpu", default_response_mode: str = "fast"):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError("ONNX engine requires the onnxruntime package") from e
+        try:
+            import yaml
+        except ImportError as e:
+            raise RuntimeError("ONNX engine requires the PyYAML package to read config.yaml") from e
+
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.default_response_mode = default_response_mode
+
+        with open(os.path.join(model_dir, "config.yaml"), encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        with open(os.path.join(model_dir, "tokens.json"), encoding="utf-8") as f:
+            self.tokens: List[str] = json.load(f)
+
+        frontend_conf = config.get("frontend_conf", {})
+        self.frontend = StreamingFbankFrontend(load_cmvn(os.path.join(model_dir, "am.mvn")), **frontend_conf)
+        self.sample_rate = self.frontend.fs
+        self.encoder_output_size = config["encoder_conf"]["output_size"]
+        self.fsmn_layers = config["decoder_conf"]["num_blocks"]
+        self.fsmn_lorder = config["decoder_conf"]["kernel_size"] - 1
+        self.cif_threshold = config["predictor_conf"].get("threshold", 1.0)
+        self.tail_threshold = config["predictor_conf"].get("tail_threshold", 0.45)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        if str(device).startswith("cuda") and "CUDAExecutionProvider" in onnxruntime.get_available_providers():
+            device_id = int(device.split(":")[1]) if ":" in device else 0
+            providers.insert(0, ("CUDAExecutionProvider", {"device_id": device_id}))
+
+        suffix = "_quant" if quantize else ""
+        encoder_path = os.path.join(model_dir, f"model{suffix}.onnx")
+        decoder_path = os.path.join(model_dir, f"decoder{suffix}.onnx")
+        logger.info(f"Loading ONNX streaming Paraformer: encoder={encoder_path}, decoder={decoder_path}, "
+                    f"intra_op_threads={intra_op_threads}, providers={providers}")
+        self.encoder = onnxruntime.InferenceSession(encoder_path, options, providers=providers)
+        self.decoder = onnxruntime.InferenceSession(decoder_path, options, providers=providers)
+        self._encoder_inputs = [i.name for i in self.encoder.get_inputs()]
+        self._decoder_inputs = [i.name for i in self.decoder.get_inputs()]
+        # FunASR 导出的模型 batch 维为动态维度，可以把多个会话的块堆叠推理
+        self.stackable = not isinstance(self.encoder.get_inputs()[0].shape[0], int) and \
+            not isinstance(self.decoder.get_inputs()[0].shape[0], int)
+        logger.info("ONNX streaming Paraformer loaded successfully")
+
+    def _init_cache(self, cache: Dict[str, Any], response_mode: str):
+        chunk_size = get_chunk_size(response_mode)
+        cache.clear()
+        cache["response_mode"] = response_mode
+        cache["chunk_size"] = list(chunk_size)
+        cache["prev_samples"] = np.zeros(0, dtype=np.float32)
+        cache["frontend"] = self.frontend.init_state()
+        cache["start_idx"] = 0
+        cache["is_final"] = False
+        cache["last_chunk"] = False
+        cache["feats"] = np.zeros((1, chunk_size[0] + chunk_size[2], self.frontend.output_dim), dtype=np.float32)
+        cache["cif_hidden"] = np.zeros((1, 1, self.encoder_output_size), dtype=np.float32)
+        cache["cif_alphas"] = np.zeros((1, 1), dtype=np.float32)
+        cache["decoder_fsmn"] = [
+            np.zeros((1, self.encoder_output_size, self.fsmn_lorder), dtype=np.float32)
+            for _ in range(self.fsmn_layers)
+        ]
+
+    def _position_encode(self, feats: np.ndarray, start_idx: int) -> np.ndarray:
+        """正弦位置编码，位置从会话开始累计，保证分块编码与整段一致"""
+        depth = feats.shape[-1]
+        positions = np.arange(start_idx + 1, start_idx + feats.shape[1] + 1, dtype=np.float32)
+        log_increment = np.log(np.float32(10000)) / (depth / 2 - 1)
+        inv_timescales = np.exp(np.arange(depth // 2, dtype=np.float32) * -log_increment)
+        scaled = positions[:, None] * inv_timescales[None, :]
+        encoding = np.concatenate((np.sin(scaled), np.cos(scaled)), axis=1).astype(np.float32)
+        return feats + encoding[None]
+
+    def _add_overlap(self, feats: np.ndarray, cache: Dict[str, Any]) -> np.ndarray:
+        """拼接上一块保留的左侧上下文与前瞻帧，并更新保留帧"""
+        chunk_size = cache["chunk_size"]
+        overlap = np.concatenate((cache["feats"], feats), axis=1)
+        if cache["is_final"]:
+            cache["feats"] = overlap[:, -chunk_size[0]:, :] if chunk_size[0] else overlap[:, :0, :]
+            if not cache["last_chunk"]:
+                padding = sum(chunk_size) - overlap.shape[1]
+                overlap = np.pad(overlap, ((0, 0), (0, max(padding, 0)), (0, 0)))
+        else:
+            cache["feats"] = overlap[:, -(chunk_size[0] + chunk_size[2]):, :]
+        return overlap
+
+    def _cif_search(self, hidden: np.ndarray, alphas: np.ndarray, cache: Dict[str, Any]) -> np.ndarray:
+        """CIF 积分发放：按 alpha 累积编码器输出，每累计满阈值发放一个声学嵌入，余量留在 cache 中"""
+        chunk_size = cache["chunk_size"]
+        alphas = alphas.copy()
+        alphas[:, :chunk_size[0]] = 0.0
+        alphas[:, sum(chunk_size[:2]):] = 0.0
+        hidden = np.concatenate((cache["cif_hidden"], hidden), axis=1)
+        alphas = np.concatenate((cache["cif_alphas"], alphas), axis=1)
+        if cache["last_chunk"]:
+            hidden = np.concatenate((hidden, np.zeros((1, 1, hidden.shape[2]), dtype=np.float32)), axis=1)
+            alphas = np.concatenate((alphas, np.full((1, 1), self.tail_threshold, dtype=np.float32)), axis=1)
+
+        integrate = 0.0
+        frame = np.zeros(hidden.shape[2], dtype=np.float32)
+        fired: List[np.ndarray] = []
+        for alpha, vector in zip(alphas[0].tolist(), hidden[0]):
+            if alpha + integrate < self.cif_threshold:
+                integrate += alpha
+                frame += alpha * vector
+            else:
+                frame += (self.cif_threshold - integrate) * vector
+                fired.append(frame)
+                integrate += alpha - self.cif_threshold
+                frame = integrate * vector
+
+        cache["cif_alphas"] = np.full((1, 1), integrate, dtype=np.float32)
+        cache["cif_hidden"] = (frame / integrate if integrate > 0.0 else frame).reshape(1, 1, -1).astype(np.float32)
+        if not fired:
+            return np.zeros((1, 0, hidden.shape[2]), dtype=np.float32)
+        return np.stack(fired)[None].astype(np.float32)
+
+    def _infer(self, feats: np.ndarray, cache: Dict[str, Any]) -> List[str]:
+        return self._infer_batch([feats], [cache])[0]
+
+    def _infer_batch(self, feats_list: List[np.ndarray], caches: List[Dict[str, Any]]) -> List[List[str]]:
+        """对多个会话的特征块推理
+
+        导出模型的 batch 维为动态维度时，形状相同的特征块堆叠为一次编码器前向，
+        发放 token 数相同的块再堆叠为一次解码器前向（各层 FSMN 记忆沿 batch 维拼接）；
+        CIF 发放按会话逐个执行。batch 维固定为 1 的模型逐块推理。
+        """
+        tokens: List[List[str]] = [[] for _ in feats_list]
+        encode_groups: Dict[Any, List[int]] = {}
+        for i, feats in enumerate(feats_list):
+            encode_groups.setdefault(feats.shape if self.stackable else i, []).append(i)
+
+        decode_groups: Dict[Any, List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]] = {}
+        for rows in encode_groups.values():
+            feats = np.concatenate([feats_list[i] for i in rows]) if len(rows) > 1 else feats_list[rows[0]]
+            feats_len = np.full(len(rows), feats.shape[1], dtype=np.int32)
+            enc, enc_lens, cif_alphas = self.encoder.run(None, dict(zip(self._encoder_inputs, (feats, feats_len))))[:3]
+            for row, i in enumerate(rows):
+                acoustic_embeds = self._cif_search(enc[row:row + 1], cif_alphas[row:row + 1], caches[i])
+                if acoustic_embeds.shape[1] == 0:
+                    continue
+                key = (enc.shape[1], acoustic_embeds.shape[1]) if self.stackable else i
+                decode_groups.setdefault(key, []).append((i, enc[row:row + 1], enc_lens[row:row + 1], acoustic_embeds))
+
+        for members in decode_groups.values():
+            token_num = members[0][3].shape[1]
+            decoder_args = [
+                np.concatenate([member[1] for member in members]),
+                np.concatenate([member[2] for member in members]),
+                np.concatenate([member[3] for member in members]),
+                np.full(len(members), token_num, dtype=np.int32),
+            ] + [
+                np.concatenate([caches[member[0]]["decoder_fsmn"][layer] for member in members])
+                for layer in range(self.fsmn_layers)
+            ]
+            outputs = self.decoder.run(None, dict(zip(self._decoder_inputs, decoder_args)))
+            logits = outputs[0]
+            for row, member in enumerate(members):
+                caches[member[0]]["decoder_fsmn"] = [state[row:row + 1, :, -self.fsmn_lorder:] for state in outputs[2:]]
+                token_ids = logits[row, :token_num].argmax(axis=-1).tolist()
+                tokens[member[0]] = [self.tokens[t] for t in token_ids if t not in _FILTERED_TOKEN_IDS]
+        return tokens
+
+    def _extract_features(self, samples: np.ndarray, cache: Dict[str, Any], is_final: bool) -> np.ndarray:
+        """提取一个步长的特征并加位置编码，返回 (1, 帧数, 维度)，帧数可能为 0"""
+        feats = self.frontend.extract(samples, cache["frontend"], is_final)
+        if len(feats) == 0:
+            return np.zeros((1, 0, self.frontend.output_dim), dtype=np.float32)
+        feats = feats[None] * np.float32(self.encoder_output_size ** 0.5)
+        feats = self._position_encode(feats, cache["start_idx"])
+        cache["start_idx"] += feats.shape[1]
+        cache["is_final"] = is_final
+        return feats
+
+    def _decode_chunk(self, samples: np.ndarray, cache: Dict[str, Any], is_final: bool) -> List[str]:
+        """处理一个步长的音频"""
+        chunk_size = cache["chunk_size"]
+        if is_final and len(samples) < SAMPLES_PER_CHUNK_FRAME:
+            # 剩余音频不足一帧：只用保留的前瞻帧收尾
+            cache["last_chunk"] = True
+            return self._infer(cache["feats"], cache)
+
+        feats = self._extract_features(samples, cache, is_final)
+        if feats.shape[1] == 0:
+            return []
+
+        if not is_final:
+            return self._infer(self._add_overlap(feats, cache), cache)
+        if feats.shape[1] + chunk_size[2] <= chunk_size[1]:
+            cache["last_chunk"] = True
+            return self._infer(self._add_overlap(feats, cache), cache)
+        # 结束块超过一个块长：先按普通块推理，再单独处理尾部
+        tokens = self._infer(self._add_overlap(feats[:, :chunk_size[1], :], cache), cache)
+        cache["last_chunk"] = True
+        tail = feats[:, -(feats.shape[1] + chunk_size[2] - chunk_size[1]):, :]
+        return tokens + self._infer(self._add_overlap(tail, cache), cache)
+
+    def _result(self, text: str, cache: Dict[str, Any], is_final: bool) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "cache": cache,
+            "timestamp": [],
+            "sentence_info": [],
+            "is_partial": not is_final,
+            "is_final": is_final
+        }
+
+    def recognize(self, audio_data: np.ndarray, cache: Optional[Dict[str, Any]] = None, is_final: bool = False,
+                  enable_punctuation: bool = True, response_mode: str = "balanced") -> Dict[str, Any]:
+        if cache is None:
+            cache = {}
+        try:
+            started = time.perf_counter()
+            if not cache:
+                self._init_cache(cache, response_mode)
+            stride = cache["chunk_size"][1] * SAMPLES_PER_CHUNK_FRAME
+            samples = np.concatenate((cache["prev_samples"], np.asarray(audio_data, dtype=np.float32).reshape(-1)))
+
+            # 与 AutoModel 流式推理一致：按步长切块，不足一个步长的余量留到下一次调用
+            num_chunks = len(samples) // stride + int(is_final)
+            tokens: List[str] = []
+            for i in range(num_chunks):
+                chunk = samples[i * stride:(i + 1) * stride]
+                tokens.extend(self._decode_chunk(chunk, cache, is_final and i == num_chunks - 1))
+            cache["prev_samples"] = np.zeros(0, dtype=np.float32) if is_final else samples[num_chunks * stride:]
+            if is_final:
+                cache.clear()
+            self._record_inference(response_mode, time.perf_counter() - started)
+            return self._result(sentence_postprocess(tokens), cache, is_final)
+        except Exception as e:
+            logger.error(f"ONNX recognition error: {e}", exc_info=True)
+            return self._result("", cache, is_final)
+
+    def recognize_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量识别多个会话的音频块
+
+        各会话的音频按步长切块，第 k 个非结束块在同一轮中堆叠推理（见 _infer_batch）；
+        结束块的收尾逻辑因会话而异，在所有轮次之后逐会话处理。结果与逐个调用 recognize 相同。
+        """
+        started = time.perf_counter()
+        jobs = []
+        try:
+            for request in requests:
+                cache = request.get("cache")
+                if cache is None:
+                    cache = {}
+                response_mode = request.get("response_mode", "balanced")
+                is_final = request.get("is_final", False)
+                if not cache:
+                    self._init_cache(cache, response_mode)
+                stride = cache["chunk_size"][1] * SAMPLES_PER_CHUNK_FRAME
+                audio = np.asarray(request["audio_data"], dtype=np.float32).reshape(-1)
+                samples = np.concatenate((cache["prev_samples"], audio))
+                num_chunks = len(samples) // stride + int(is_final)
+                jobs.append({
+                    "cache": cache, "response_mode": response_mode, "is_final": is_final, "tokens": [],
+                    "chunks": [samples[i * stride:(i + 1) * stride] for i in range(num_chunks)],
+                    "rest": np.zeros(0, dtype=np.float32) if is_final else samples[num_chunks * stride:],
+                })
+
+            rounds = max((len(job["chunks"]) - int(job["is_final"]) for job in jobs), default=0)
+            for k in range(rounds):
+                batch_jobs, batch_feats = [], []
+                for job in jobs:
+                    if k >= len(job["chunks"]) - int(job["is_final"]):
+                        continue
+                    feats = self._extract_features(job["chunks"][k], job["cache"], False)
+                    if feats.shape[1]:
+                        batch_jobs.append(job)
+                        batch_feats.append(self._add_overlap(feats, job["cache"]))
+                for job, tokens in zip(batch_jobs, self._infer_batch(batch_feats, [job["cache"] for job in batch_jobs])):
+                    job["tokens"].extend(tokens)
+
+            results = []
+            for job in jobs:
+                cache = job["cache"]
+                if job["is_final"]:
+                    job["tokens"].extend(self._decode_chunk(job["chunks"][-1], cache, True))
+                cache["prev_samples"] = job["rest"]
+                if job["is_final"]:
+                    cache.clear()
+                results.append(self._result(sentence_postprocess(job["tokens"]), cache, job["is_final"]))
+        except Exception as e:
+            logger.error(f"ONNX batch recognition error: {e}", exc_info=True)
+            return [self._result("", request.get("cache") or {}, request.get("is_final", False)) for request in requests]
+
+        elapsed = time.perf_counter() - started
+        for job in jobs:
+            self._record_inference(job["response_mode"], elapsed)
+        return results
+
+    def finalize(self, cache: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not cache:
+            return self._result("", cache if cache is not None else {}, True)
+        return self.recognize(np.zeros(0, dtype=np.float32), cache, is_final=True, response_mode=cache["response_mode"])
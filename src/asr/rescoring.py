@@ -0,0 +1,22 @@
+import numpy as np
+
+from .batching import WindowedBatcher
+from .executor import InferenceExecutor
+
+
+class SentenceRescorer(WindowedBatcher):
+    """两遍识别的第二遍：句末用离线模型重新识别整句音频
+
+    汇集各会话同时提交的句子（推理线程全忙时最多等待 batch_window_ms），合并为一次 transcribe_batch 调用，
+    在独立的推理执行器中执行，不占用流式推理的线程与会话锁。
+    """
+
+    def __init__(self, offline_model, inference_executor: InferenceExecutor,
+                 max_batch_size: int = 8, batch_window_ms: int = 50):
+        super().__init__(offline_model.transcribe_batch, inference_executor, max_batch_size, batch_window_ms,
+                         name="Sentence rescorer")
+        self.offline_model = offline_model
+
+    async def rescore(self, audio: np.ndarray) -> str:
+        """提交一句完整音频并等待离线识别文本"""
+        return await self.submit(audio)
@@ -0,0 +1,75 @@
+import logging
+import os
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+# 快照格式版本，快照结构变化时递增，旧版本快照会被忽略并回退到正常加载
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def save_model_snapshot(auto_model: Any, path: str, metadata: Dict[str, Any]):
+    """将构建完成的 funasr.AutoModel（网络权重、tokenizer、前端等）保存为单个快照文件
+
+    使用 torch.save 的 zip 格式，张量数据按页对齐存放，加载时可直接内存映射。
+    先写入临时文件再原子替换，避免并发启动的进程读到写了一半的快照。
+
+    Args:
+        auto_model: 已加载（及量化）的 AutoModel 实例
+        path: 快照文件路径
+        metadata: 模型来源信息（模型名、版本、量化等），加载时用于校验快照是否过期
+    """
+    import torch
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    snapshot = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "metadata": dict(metadata, torch_version=torch.__version__),
+        "auto_model": auto_model,
+    }
+    try:
+        torch.save(snapshot, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Saved model snapshot to {path} ({os.path.getsize(path) / (1024 ** 2):.1f} MB)")
+
+
+def load_model_snapshot(path: str, metadata: Dict[str, Any]) -> Any:
+    """内存映射方式加载模型快照
+
+    权重张量直接映射快照文件（写时复制），多个推理进程加载同一快照时共享页缓存中的物理页，
+    不再重复解析配置、构建网络和拷贝权重。动态量化层的打包权重在加载时会重新打包，不共享内存。
+
+    Args:
+        path: 快照文件路径
+        metadata: 期望的模型来源信息，与快照中记录的不一致时视为过期
+
+    Returns:
+        快照中的 AutoModel 实例（权重位于 CPU）
+
+    Raises:
+        ValueError: 快照格式版本或模型来源信息与当前配置不一致
+    """
+    import torch
+
+    try:
+        snapshot = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+    except TypeError:
+        # torch < 2.1 不支持 mmap 参数，退化为普通加载
+        logger.warning("This PyTorch version does not support mmap loading, reading snapshot into memory")
+        snapshot = torch.load(path, map_location="cpu")
+
+    if snapshot.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {snapshot.get('format_version')}")
+    saved = snapshot.get("metadata", {})
+    mismatched = [key for key, value in metadata.items() if saved.get(key) != value]
+    if mismatched:
+        details = ", ".join(f"{key}: {saved.get(key)!r} != {metadata[key]!r}" for key in mismatched)
+        raise ValueError(f"Model snapshot does not match current configuration ({details})")
+    return snapshot["auto_model"]
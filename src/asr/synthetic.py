@@ -0,0 +1,123 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .backend import ASRBackend
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticASRModel(ASRBackend):
+    """确定性的合成识别后端
+
+    不加载任何模型，用于在没有模型文件和 GPU 的机器上压测 WebSocket、协议与音频管线。
+    每次调用的耗时 = 基础耗时（按 latency_distribution 抽样）+ 音频时长 * rtf，
+    在调用线程中 sleep，与真实推理一样不占用事件循环。
+    输出文本按已处理音频时长循环截取 text，每秒音频 chars_per_second 个字；
+    与真实后端一样每次调用只返回新增的字（cache 中记录已输出的字数）。
+    随机数生成器随会话 cache 创建并以 seed 初始化，同样的音频与调用顺序得到同样的耗时序列。
+
+    耗时分布：
+        fixed: 恒为 latency_ms
+        uniform: latency_ms ± latency_jitter_ms 均匀分布
+        lognormal: 均值 latency_ms、标准差 latency_jitter_ms 的对数正态分布（长尾）
+    """
+
+    LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        latency_jitter_ms: float = 0.0,
+        latency_distribution: str = "fixed",
+        rtf: float = 0.0,
+        text: str = "合成识别结果",
+        chars_per_second: float = 4.0,
+        seed: int = 0,
+        sample_rate: int = 16000,
+        default_response_mode: str = "fast"
+    ):
+        if latency_distribution not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency_ms = max(0.0, latency_ms)
+        self.latency_jitter_ms = max(0.0, latency_jitter_ms)
+        self.latency_distribution = latency_distribution
+        self.rtf = max(0.0, rtf)
+        self.text = text or "合成"
+        self.chars_per_second = chars_per_second
+        self.seed = seed
+        self.sample_rate = sample_rate
+        self.default_response_mode = default_response_mode
+        logger.info(f"Synthetic ASR backend: latency={latency_ms}ms ({latency_distribution}, jitter={latency_jitter_ms}ms), "
+                    f"rtf={rtf}, chars_per_second={chars_per_second}, seed={seed}")
+
+    def _sample_latency_ms(self, rng: np.random.Generator) -> float:
+        if self.latency_distribution == "uniform":
+            return max(0.0, rng.uniform(self.latency_ms - self.latency_jitter_ms, self.latency_ms + self.latency_jitter_ms))
+        if self.latency_distribution == "lognormal" and self.latency_ms > 0:
+            sigma = np.sqrt(np.log1p((self.latency_jitter_ms / self.latency_ms) ** 2))
+            mu = np.log(self.latency_ms) - sigma ** 2 / 2
+            return float(rng.lognormal(mu, sigma))
+        return self.latency_ms
+
+    def _simulate(self, cache: Dict[str, Any], samples: int):
+        rng = cache.get("rng")
+        if rng is None:
+            rng = cache["rng"] = np.random.default_rng(self.seed)
+        delay = self._sample_latency_ms(rng) / 1000 + samples / self.sample_rate * self.rtf
+        if delay > 0:
+            time.sleep(delay)
+
+    def _result(self, cache: Dict[str, Any], is_final: bool) -> Dict[str, Any]:
+        chars = int(cache.get("samples", 0) / self.sample_rate * self.chars_per_second)
+        emitted = cache.get("chars", 0)
+        cache["chars"] = chars
+        repeats = chars // len(self.text) + 1
+        return {
+            "text": (self.text * repeats)[emitted:chars],
+            "cache": cache,
+            "timestamp": [],
+            "sentence_info": [],
+            "is_partial": not is_final,
+            "is_final": is_final
+        }
+
+    def recognize(self, audio_data: np.ndarray, cache: Optional[Dict[str, Any]] = None, is_final: bool = False,
+                  enable_punctuation: bool = True, response_mode: str = "balanced") -> Dict[str, Any]:
+        if cache is None:
+            cache = {}
+        started = time.perf_counter()
+        self._simulate(cache, len(audio_data))
+        self._record_inference(response_mode, time.perf_counter() - started)
+        cache["samples"] = cache.get("samples", 0) + len(audio_data)
+        return self._result(cache, is_final)
+
+    def recognize_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量识别：整批按一次调用模拟耗时（一次基础耗时 + 全部音频时长 * rtf），即批量前向摊薄逐次调用的固定开销"""
+        caches = [request["cache"] if request.get("cache") is not None else {} for request in requests]
+        started = time.perf_counter()
+        self._simulate(caches[0], sum(len(request["audio_data"]) for request in requests))
+        elapsed = time.perf_counter() - started
+        results = []
+        for request, cache in zip(requests, caches):
+            self._record_inference(request.get("response_mode", "balanced"), elapsed)
+            cache["samples"] = cache.get("samples", 0) + len(request["audio_data"])
+            results.append(self._result(cache, request.get("is_final", False)))
+        return results
+
+    def finalize(self, cache: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if cache is None:
+            cache = {}
+        self._simulate(cache, 0)
+        return self._result(cache, True)
+
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """离线批量识别：整批耗时按一次调用模拟，文本按各段音频时长生成"""
+        cache: Dict[str, Any] = {}
+        started = time.perf_counter()
+        self._simulate(cache, sum(len(audio) for audio in audios))
+        self._record_inference("offline", time.perf_counter() - started)
+        return [self._result({"samples": len(audio)}, True)["text"] for audio in audios]
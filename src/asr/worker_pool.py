@@ -0,0 +1,372 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait as wait_for_sentinels
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..monitoring.metrics import MODEL_INFERENCE_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+# 共享内存布局：[read_pos: int64][float32 环形数据区]
+_HEADER_BYTES = 8
+
+
+class SharedAudioRing:
+    """基于 multiprocessing.shared_memory 的单生产者/单消费者音频环形缓冲区
+
+    生产者（前端进程）写入 PCM 样本并通过请求消息告知起始位置与长度，
+    消费者（推理进程）读取后推进共享的 read_pos，生产者据此判断可用空间。
+    位置均为单调递增的绝对样本序号，取模后得到环内偏移。
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self.capacity = capacity
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + capacity * 4)
+            self._owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._header = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf[:_HEADER_BYTES])
+        self._data = np.ndarray((capacity,), dtype=np.float32, buffer=self.shm.buf[_HEADER_BYTES:])
+        if self._owner:
+            self._header[0] = 0
+        self.write_pos = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def free_space(self) -> int:
+        return self.capacity - (self.write_pos - int(self._header[0]))
+
+    def write(self, audio: np.ndarray) -> int:
+        """写入音频，返回写入起始位置；调用方需先确认 free_space 足够"""
+        length = len(audio)
+        pos = self.write_pos
+        start = pos % self.capacity
+        first = min(length, self.capacity - start)
+        self._data[start:start + first] = audio[:first]
+        if first < length:
+            self._data[:length - first] = audio[first:]
+        self.write_pos = pos + length
+        return pos
+
+    def read(self, pos: int, length: int) -> np.ndarray:
+        """读取音频副本并推进 read_pos"""
+        start = pos % self.capacity
+        first = min(length, self.capacity - start)
+        if first == length:
+            audio = self._data[start:start + length].copy()
+        else:
+            audio = np.concatenate((self._data[start:], self._data[:length - first]))
+        self._header[0] = pos + length
+        return audio
+
+    def close(self):
+        # 释放 numpy 视图后才能关闭共享内存
+        self._header = None
+        self._data = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker_main(index: int, model_kwargs: Dict[str, Any], ring_name: str, ring_capacity: int,
+                 request_queue, response_queue, torch_threads: int = 0, backend: str = "funasr",
+                 warmup_seconds: float = 0.0, sample_rate: int = 16000):
+    """推理进程入口：加载一次模型，并在本进程内保存所属会话的流式 cache"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - worker-{index} - %(name)s - %(levelname)s - %(message)s'
+    )
+    if torch_threads > 0:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    from .backend import create_asr_backend
+
+    ring = SharedAudioRing(ring_capacity, name=ring_name)
+    try:
+        model = create_asr_backend(backend, **model_kwargs)
+        if warmup_seconds > 0:
+            model.warmup(warmup_seconds, sample_rate)
+    except Exception as e:
+        response_queue.put((None, False, f"worker {index} failed to load model: {e}"))
+        ring.close()
+        return
+    response_queue.put((None, True, index))
+
+    caches: Dict[str, Dict[str, Any]] = {}
+    while True:
+        message = request_queue.get()
+        if message is None:
+            break
+        request_id, op, session_key, pos, length, kwargs = message
+        try:
+            if op == "recognize":
+                audio = ring.read(pos, length)
+                cache = caches.setdefault(session_key, {})
+                started = time.perf_counter()
+                result = model.recognize(audio, cache, **kwargs)
+                # 推理进程中的指标不会被导出，耗时随结果回传，由前端进程记录
+                result["inference_seconds"] = time.perf_counter() - started
+                result.pop("cache", None)  # cache 留在本进程，不回传，只回传其占用字节数
+                result["cache_bytes"] = model.cache_nbytes(cache)
+            elif op == "compact":
+                cache = caches.get(session_key)
+                model.compact_cache(cache)
+                result = {"cache_bytes": model.cache_nbytes(cache)}
+            elif op == "release":
+                caches.pop(session_key, None)
+                continue
+            else:
+                raise ValueError(f"Unknown worker op: {op}")
+            response_queue.put((request_id, True, result))
+        except Exception as e:
+            logger.error(f"Worker {index} error on {op} for {session_key}: {e}", exc_info=True)
+            response_queue.put((request_id, False, str(e)))
+
+    ring.close()
+
+
+class WorkerUnavailableError(RuntimeError):
+    """会话所在的推理进程已退出，或长时间未消费共享内存中的音频"""
+
+
+class _WorkerHandle:
+
+    def __init__(self, index: int, process, request_queue, ring: SharedAudioRing):
+        self.index = index
+        self.process = process
+        self.request_queue = request_queue
+        self.ring = ring
+        self.sessions = 0
+        self.alive = True
+
+
+class ModelWorkerPool:
+    """多进程模型推理池
+
+    启动 K 个各自加载一次模型的推理进程，前端进程按会话粘性路由请求：
+    一个会话始终由同一个推理进程处理，流式 cache 只存在于该进程中。
+    PCM 音频通过每个进程专属的共享内存环形缓冲区传递，不经过 pickle，
+    请求消息中只携带位置、长度与少量参数。
+
+    监视线程等待各进程的 sentinel：进程意外退出（OOM、段错误等）时，发往该进程的未完成请求
+    立即以 WorkerUnavailableError 失败，新会话不再分配给它；其上已有会话的 cache 随进程丢失，后续请求同样失败。
+    """
+
+    def __init__(self, num_workers: int, model_kwargs: Dict[str, Any], ring_seconds: int = 30,
+                 sample_rate: int = 16000, torch_threads: int = 0, backend: str = "funasr",
+                 warmup_seconds: float = 0.0, model_sample_rate: int = 16000, ring_wait_timeout: float = 5.0):
+        self.num_workers = max(1, num_workers)
+        self.model_kwargs = model_kwargs
+        self.backend = backend
+        self.torch_threads = torch_threads
+        self.warmup_seconds = warmup_seconds  # 大于 0 时每个推理进程加载模型后先预热再报告就绪
+        self.model_sample_rate = model_sample_rate
+        self.ring_capacity = ring_seconds * sample_rate
+        self.ring_wait_timeout = ring_wait_timeout  # 环形缓冲区满时等待推理进程消费的最长时间（秒）
+        self._ctx = mp.get_context("spawn")
+        self._workers: List[_WorkerHandle] = []
+        self._affinity: Dict[str, int] = {}
+        # request_id -> (事件循环, future, 推理进程序号)
+        self._pending: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._response_queue = None
+        self._response_thread: Optional[threading.Thread] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self._closing = False
+
+    def start(self):
+        """启动所有推理进程并等待模型加载（及预热）完成（阻塞调用）"""
+        self._response_queue = self._ctx.Queue()
+        for index in range(self.num_workers):
+            ring = SharedAudioRing(self.ring_capacity)
+            request_queue = self._ctx.Queue()
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(index, self.model_kwargs, ring.name, self.ring_capacity, request_queue,
+                      self._response_queue, self.torch_threads, self.backend,
+                      self.warmup_seconds, self.model_sample_rate),
+                name=f"asr-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self._workers.append(_WorkerHandle(index, process, request_queue, ring))
+            logger.info(f"Started ASR worker process {index}, pid={process.pid}")
+
+        ready = 0
+        while ready < self.num_workers:
+            try:
+                _, ok, payload = self._response_queue.get(timeout=1.0)
+            except queue.Empty:
+                # 加载模型时崩溃的进程不会回报结果
+                dead = [worker for worker in self._workers if not worker.process.is_alive()]
+                if dead:
+                    self.shutdown()
+                    raise RuntimeError(f"ASR worker {dead[0].index} exited during startup "
+                                       f"(exit code {dead[0].process.exitcode})")
+                continue
+            if not ok:
+                self.shutdown()
+                raise RuntimeError(payload)
+            ready += 1
+            logger.info(f"ASR worker {payload} ready")
+
+        self._response_thread = threading.Thread(target=self._drain_responses, name="asr-worker-responses", daemon=True)
+        self._response_thread.start()
+        self._watch_thread = threading.Thread(target=self._watch_workers, name="asr-worker-watch", daemon=True)
+        self._watch_thread.start()
+        logger.info(f"Model worker pool started: workers={self.num_workers}, ring_capacity={self.ring_capacity} samples")
+
+    def _drain_responses(self):
+        while True:
+            message = self._response_queue.get()
+            if message is None:
+                break
+            request_id, ok, payload = message
+            with self._pending_lock:
+                entry = self._pending.pop(request_id, None)
+            if entry is None:
+                continue
+            loop, future, _ = entry
+            loop.call_soon_threadsafe(self._resolve, future, ok, payload)
+
+    def _watch_workers(self):
+        sentinels = {worker.process.sentinel: worker for worker in self._workers}
+        while sentinels and not self._closing:
+            for sentinel in wait_for_sentinels(list(sentinels), timeout=1.0):
+                worker = sentinels.pop(sentinel)
+                if not self._closing:
+                    self._mark_dead(worker)
+
+    def _mark_dead(self, worker: _WorkerHandle):
+        """推理进程退出：标记不可用，并让发往它的未完成请求立即失败"""
+        worker.process.join(timeout=1)  # 回收进程以取得退出码
+        error = WorkerUnavailableError(f"ASR worker {worker.index} exited unexpectedly "
+                                       f"(exit code {worker.process.exitcode})")
+        with self._pending_lock:
+            worker.alive = False
+            failed = [request_id for request_id, entry in self._pending.items() if entry[2] == worker.index]
+            entries = [self._pending.pop(request_id) for request_id in failed]
+        logger.error(f"{error}; failing {len(entries)} pending requests, {worker.sessions} sessions affected")
+        for loop, future, _ in entries:
+            loop.call_soon_threadsafe(self._resolve, future, False, error)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, ok: bool, payload: Any):
+        if future.done():
+            return
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(payload if isinstance(payload, Exception) else RuntimeError(payload))
+
+    def _worker_for(self, session_key: str) -> _WorkerHandle:
+        index = self._affinity.get(session_key)
+        if index is None:
+            alive = [worker for worker in self._workers if worker.alive]
+            if not alive:
+                raise WorkerUnavailableError("No ASR worker process is available")
+            worker = min(alive, key=lambda w: w.sessions)
+            worker.sessions += 1
+            self._affinity[session_key] = worker.index
+            logger.debug(f"Session {session_key} assigned to worker {worker.index}")
+            return worker
+        return self._workers[index]
+
+    async def _request(self, worker: _WorkerHandle, op: str, session_key: str,
+                       audio: Optional[np.ndarray] = None, **kwargs) -> Dict[str, Any]:
+        pos, length = 0, 0
+        if audio is not None:
+            length = len(audio)
+            if length > worker.ring.capacity:
+                raise ValueError(f"Audio chunk of {length} samples exceeds ring capacity {worker.ring.capacity}")
+            await self._wait_ring_space(worker, length)
+            pos = worker.ring.write(audio)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request_id = next(self._request_ids)
+        with self._pending_lock:
+            if not worker.alive:
+                raise WorkerUnavailableError(f"ASR worker {worker.index} is not running")
+            self._pending[request_id] = (loop, future, worker.index)
+        worker.request_queue.put((request_id, op, session_key, pos, length, kwargs))
+        return await future
+
+    async def _wait_ring_space(self, worker: _WorkerHandle, length: int):
+        """环形缓冲区已满时等待推理进程消费，轮询间隔指数退避，超时或进程退出时抛出 WorkerUnavailableError"""
+        if worker.ring.free_space() >= length:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.ring_wait_timeout
+        delay = 0.001
+        while worker.ring.free_space() < length:
+            if not worker.alive:
+                raise WorkerUnavailableError(f"ASR worker {worker.index} is not running")
+            if loop.time() >= deadline:
+                raise WorkerUnavailableError(f"ASR worker {worker.index} did not consume audio "
+                                             f"within {self.ring_wait_timeout:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.02)
+
+    async def recognize(self, session_key: str, audio: np.ndarray, is_final: bool = False,
+                        enable_punctuation: bool = True, response_mode: str = "balanced") -> Dict[str, Any]:
+        worker = self._worker_for(session_key)
+        result = await self._request(
+            worker, "recognize", session_key, np.ascontiguousarray(audio, dtype=np.float32),
+            is_final=is_final, enable_punctuation=enable_punctuation, response_mode=response_mode
+        )
+        MODEL_INFERENCE_SECONDS.labels(response_mode).observe(result.pop("inference_seconds", 0.0))
+        return result
+
+    async def compact_cache(self, session_key: str) -> int:
+        """压缩推理进程中会话的流式 cache，返回压缩后的字节数"""
+        worker = self._worker_for(session_key)
+        result = await self._request(worker, "compact", session_key)
+        return result["cache_bytes"]
+    
+    def release_session(self, session_key: str):
+        """会话结束后释放推理进程中的 cache 与路由关系"""
+        index = self._affinity.pop(session_key, None)
+        if index is None:
+            return
+        worker = self._workers[index]
+        worker.sessions -= 1
+        if worker.alive:
+            worker.request_queue.put((None, "release", session_key, 0, 0, {}))
+
+    def shutdown(self):
+        self._closing = True
+        for worker in self._workers:
+            worker.request_queue.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.ring.close()
+        self._workers = []
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+        if self._response_thread is not None:
+            self._response_queue.put(None)
+            self._response_thread.join(timeout=5)
+            self._response_thread = None
+        logger.info("Model worker pool shut down")
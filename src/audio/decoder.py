@@ -0,0 +1,208 @@
+import logging
+import struct
+from typing import Dict, Optional, Type
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def _build_mulaw_table() -> np.ndarray:
+    """G.711 µ-law → 16bit 线性 PCM 查找表"""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(sign != 0, -magnitude, magnitude).astype(np.int16)
+
+
+def _build_alaw_table() -> np.ndarray:
+    """G.711 A-law → 16bit 线性 PCM 查找表"""
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = np.where(
+        exponent == 0,
+        (mantissa << 4) + 8,
+        ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0)
+    )
+    return np.where(sign != 0, magnitude, -magnitude).astype(np.int16)
+
+
+_MULAW_TABLE = _build_mulaw_table()
+_ALAW_TABLE = _build_alaw_table()
+
+
+class StreamDecoder:
+    """流式音频解码器基类
+
+    decode 接收一条 WebSocket 二进制消息，返回解码出的单声道 16bit PCM 样本。
+    sample_rate 为解码器确定的实际输入采样率（例如从 WAV 头中读到），
+    为 None 表示沿用会话声明的采样率。
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate: Optional[int] = None
+        self.declared_sample_rate = sample_rate
+
+    def decode(self, data: bytes) -> np.ndarray:
+        raise NotImplementedError
+
+
+class PcmDecoder(StreamDecoder):
+    """16bit 小端 PCM，跨消息保留不完整的奇数字节"""
+
+    def __init__(self, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        self._pending = b""
+
+    def decode(self, data: bytes) -> np.ndarray:
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+        if len(data) % 2:
+            self._pending = data[-1:]
+            data = data[:-1]
+        return np.frombuffer(data, dtype=np.int16)
+
+
+class MuLawDecoder(StreamDecoder):
+    """G.711 µ-law，每字节一个样本，查表解码"""
+
+    table = _MULAW_TABLE
+
+    def decode(self, data: bytes) -> np.ndarray:
+        return self.table[np.frombuffer(data, dtype=np.uint8)]
+
+
+class ALawDecoder(MuLawDecoder):
+    """G.711 A-law，每字节一个样本，查表解码"""
+
+    table = _ALAW_TABLE
+
+
+class WavDecoder(StreamDecoder):
+    """WAV 流：解析并剥离 RIFF 头，之后的数据按 fmt 块描述解码
+
+    支持 16bit PCM（多声道取平均混为单声道）以及 G.711 µ-law/A-law 编码的 WAV。
+    """
+
+    _FORMAT_PCM = 1
+    _FORMAT_ALAW = 6
+    _FORMAT_MULAW = 7
+
+    def __init__(self, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        self._header = b""
+        self._body: Optional[StreamDecoder] = None
+        self._channels = 1
+        self._frame_pending = np.zeros(0, dtype=np.int16)
+
+    def _parse_header(self) -> Optional[bytes]:
+        """尝试解析头部，成功时返回 data 块之后的剩余字节"""
+        data = self._header
+        if len(data) < 12:
+            return None
+        if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+            raise ValueError("Invalid WAV stream: missing RIFF/WAVE header")
+
+        offset = 12
+        fmt = None
+        while offset + 8 <= len(data):
+            chunk_id = data[offset:offset + 4]
+            chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+            body_start = offset + 8
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("Invalid WAV stream: data chunk before fmt chunk")
+                self._configure(*fmt)
+                return data[body_start:]
+            if body_start + chunk_size > len(data):
+                return None
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack_from("<HHIIHH", data, body_start)
+            offset = body_start + chunk_size + (chunk_size & 1)
+        return None
+
+    def _configure(self, format_tag, channels, sample_rate, byte_rate, block_align, bits_per_sample):
+        if format_tag == self._FORMAT_PCM and bits_per_sample == 16:
+            self._body = PcmDecoder(sample_rate)
+        elif format_tag == self._FORMAT_MULAW:
+            self._body = MuLawDecoder(sample_rate)
+        elif format_tag == self._FORMAT_ALAW:
+            self._body = ALawDecoder(sample_rate)
+        else:
+            raise ValueError(f"Unsupported WAV encoding: format_tag={format_tag}, bits={bits_per_sample}")
+        self._channels = max(1, channels)
+        self.sample_rate = sample_rate
+        logger.info(f"WAV stream header: format_tag={format_tag}, channels={channels}, "
+                    f"sample_rate={sample_rate}, bits={bits_per_sample}")
+
+    def _downmix(self, samples: np.ndarray) -> np.ndarray:
+        if self._channels == 1:
+            return samples
+        if len(self._frame_pending):
+            samples = np.concatenate((self._frame_pending, samples))
+        usable = len(samples) - len(samples) % self._channels
+        self._frame_pending = samples[usable:].copy()
+        frames = samples[:usable].reshape(-1, self._channels)
+        return frames.mean(axis=1, dtype=np.float32).astype(np.int16)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        if self._body is None:
+            self._header += data
+            remainder = self._parse_header()
+            if remainder is None:
+                return np.zeros(0, dtype=np.int16)
+            self._header = b""
+            data = remainder
+        return self._downmix(self._body.decode(data))
+
+
+class OpusDecoder(StreamDecoder):
+    """Opus，每条 WebSocket 二进制消息为一个 Opus 包，依赖本地 opuslib/libopus"""
+
+    _OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+    _MAX_FRAME_MS = 120
+
+    def __init__(self, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        try:
+            import opuslib
+        except ImportError as e:
+            raise ValueError("Opus decoding requires the opuslib package and libopus") from e
+        # Opus 可直接解码到其支持的任一采样率，其余采样率解码到 48kHz 后再重采样
+        rate = sample_rate if sample_rate in self._OPUS_RATES else 48000
+        self._decoder = opuslib.Decoder(rate, 1)
+        self._max_frame = rate * self._MAX_FRAME_MS // 1000
+        self.sample_rate = rate
+
+    def decode(self, data: bytes) -> np.ndarray:
+        if not data:
+            return np.zeros(0, dtype=np.int16)
+        return np.frombuffer(self._decoder.decode(data, self._max_frame), dtype=np.int16)
+
+
+DECODERS: Dict[str, Type[StreamDecoder]] = {
+    "pcm": PcmDecoder,
+    "wav": WavDecoder,
+    "mulaw": MuLawDecoder,
+    "ulaw": MuLawDecoder,
+    "alaw": ALawDecoder,
+    "opus": OpusDecoder,
+}
+
+
+def create_decoder(audio_format: str, sample_rate: int = 16000) -> StreamDecoder:
+    """根据会话的 format 参数创建流式解码器
+
+    Raises:
+        ValueError: 不支持的音频格式，或缺少所需的解码库
+    """
+    decoder_class = DECODERS.get((audio_format or "pcm").lower())
+    if decoder_class is None:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+    return decoder_class(sample_rate)
@@ -0,0 +1,231 @@
+import io
+import logging
+import mmap
+import tempfile
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .decoder import create_decoder
+from .resampler import StreamingResampler
+
+try:
+    try:
+        from python_multipart.multipart import MultipartParser, parse_options_header
+    except ModuleNotFoundError:
+        from multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:
+    MultipartParser = None
+    parse_options_header = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class AudioSpool:
+    """上传音频的缓存：累计不超过 max_memory 字节时留在内存，超过后整体转存到临时文件
+
+    自行记录写入的字节数与是否已落盘，读取端据此选择内存缓冲区或内存映射。
+    """
+
+    def __init__(self, max_memory: int):
+        self.max_memory = max(0, max_memory)
+        self.file = io.BytesIO()
+        self.size = 0
+        self.on_disk = False
+
+    def write(self, data: bytes):
+        if not data:
+            return
+        if not self.on_disk and self.size + len(data) > self.max_memory:
+            disk = tempfile.TemporaryFile()
+            disk.write(self.file.getbuffer())
+            self.file.close()
+            self.file = disk
+            self.on_disk = True
+        self.file.write(data)
+        self.size += len(data)
+
+    def close(self):
+        try:
+            self.file.close()
+        except BufferError:
+            # 仍有读取线程引用内存缓冲区，由其释放后回收
+            logger.debug("Audio spool buffer still referenced, leaving it to the garbage collector")
+
+
+class MultipartAudioExtractor:
+    """流式解析 multipart/form-data 请求体，只把 file 字段的内容写入 AudioSpool
+
+    边接收边解析，不先缓存整个表单，请求体大小可以在接收过程中累计检查。
+    """
+
+    def __init__(self, content_type: str, spool: AudioSpool, field_name: str = "file"):
+        if MultipartParser is None:
+            raise ValueError("Multipart uploads require the python-multipart package")
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Missing boundary in multipart request")
+        self.spool = spool
+        self.field_name = field_name.encode("latin-1")
+        self.found = False
+        self._ended = False
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end,
+        })
+
+    def _on_part_begin(self):
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._in_file = not self.found and options.get(b"name") == self.field_name
+        self.found = self.found or self._in_file
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.spool.write(data[start:end])
+
+    def _on_part_end(self):
+        self._in_file = False
+
+    def _on_end(self):
+        self._ended = True
+
+    def write(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finish(self):
+        """请求体接收完毕，检查表单完整且包含 file 字段
+
+        Raises:
+            ValueError: 表单被截断或缺少 file 字段
+        """
+        self._parser.finalize()
+        if not self._ended:
+            raise ValueError("Truncated multipart request body")
+        if not self.found:
+            raise ValueError(f"Multipart request must contain a '{self.field_name.decode()}' field")
+
+
+class AudioFileReader:
+    """整段音频文件的分块读取器，供 HTTP 文件转写使用
+
+    上传内容已落盘时直接内存映射，分块解码只引用映射页，不把整个文件读入进程内存；
+    仍在内存中的小文件直接引用其缓冲区。创建时校验内容（WAV 头完整、含有音频数据）与采样率，
+    解码复用流式解码器（pcm/wav/mulaw/alaw），采样率与模型不一致时流式重采样。
+    关闭读取器时一并关闭 spool。
+    """
+
+    _HEADER_PROBE_BYTES = 4096
+
+    def __init__(self, spool: AudioSpool, audio_format: Optional[str] = None, sample_rate: int = 16000,
+                 target_sample_rate: int = 16000, chunk_ms: int = 100):
+        self.spool = spool
+        self._mmap: Optional[mmap.mmap] = None
+        self._closed = False
+        self.data = self._map(spool)
+        try:
+            if not audio_format:
+                audio_format = "wav" if self.data[:4] == b"RIFF" else "pcm"
+            self.audio_format = audio_format.lower()
+            self.sample_rate = sample_rate
+            self.target_sample_rate = target_sample_rate
+            self.chunk_ms = chunk_ms
+            self.decoder = create_decoder(self.audio_format, sample_rate)
+            # 输入采样率（WAV 以文件头为准）在创建时确定，无效的采样率在此处报错
+            self.input_sample_rate = self._validate()
+            self.resampler: Optional[StreamingResampler] = None
+            if self.input_sample_rate != target_sample_rate:
+                self.resampler = StreamingResampler(self.input_sample_rate, target_sample_rate)
+        except BaseException:
+            self.close()
+            raise
+
+    def _map(self, spool: AudioSpool) -> memoryview:
+        if not spool.on_disk:
+            return spool.file.getbuffer()
+        spool.file.flush()
+        self._mmap = mmap.mmap(spool.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def _validate(self) -> int:
+        """校验内容能解码出音频，截断或格式错误的文件在开始转写前报错
+
+        Returns:
+            输入音频的实际采样率
+
+        Raises:
+            ValueError: 空文件、WAV 头不完整或无效、没有音频数据
+        """
+        probe = create_decoder(self.audio_format, self.sample_rate)
+        for offset in range(0, len(self.data), self._HEADER_PROBE_BYTES):
+            with self.data[offset:offset + self._HEADER_PROBE_BYTES] as view:
+                if len(probe.decode(bytes(view))):
+                    return probe.sample_rate or self.sample_rate
+        if self.audio_format == "wav" and probe.sample_rate is None:
+            raise ValueError("Truncated or malformed WAV file: incomplete header")
+        raise ValueError("Audio file contains no audio data")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def iter_chunks(self) -> Iterator[np.ndarray]:
+        """按 chunk_ms 分块产出模型采样率的 float32 音频（[-1, 1]），读取器关闭后停止"""
+        # 按输入编码估算每块字节数：pcm/wav 每样本 2 字节，G.711 每样本 1 字节；WAV 头在首块中剥离
+        bytes_per_sample = 1 if self.audio_format in ("mulaw", "ulaw", "alaw") else 2
+        chunk_bytes = max(2, int(self.input_sample_rate * self.chunk_ms / 1000) * bytes_per_sample)
+        for offset in range(0, len(self.data), chunk_bytes):
+            if self._closed:
+                return
+            # 切片视图用完立即释放，避免关闭映射时仍有导出的缓冲区
+            with self.data[offset:offset + chunk_bytes] as view:
+                raw = bytes(view)
+            pcm = self.decoder.decode(raw)
+            if not len(pcm):
+                continue
+            audio = pcm.astype(np.float32) * np.float32(1.0 / 32768.0)
+            if self.resampler is not None:
+                audio = self.resampler.process(audio)
+            if len(audio):
+                yield audio
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # 先释放对映射页/内存缓冲区的引用，之后才能关闭映射与临时文件
+            self.data.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # 客户端断开时读取线程可能正在复制当前块；映射在最后一个引用释放后由垃圾回收关闭
+            logger.debug("Audio file buffer still referenced by a reader thread, deferring release")
+        self._mmap = None
+        self.spool.close()
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class AudioFrameQueue:
+    """会话级有界音频帧队列
+
+    位于 WebSocket 接收循环与推理之间，推理跟不上实时时按策略处理积压：
+        block: 队列满时阻塞接收循环，由 TCP 流控向客户端施加反压（默认）
+        coalesce: 队列满时把新帧合并进队尾元素，推理侧一次拿到更大的音频块
+        drop: 队列满时丢弃新帧并计数上报
+
+    队列元素为帧列表（合并时追加到列表），因此对 Opus 这类按包解码的格式同样适用。
+    """
+
+    POLICIES = ("block", "coalesce", "drop")
+
+    def __init__(self, maxsize: int = 50, policy: str = "block"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown audio queue policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self._items: Deque[List[bytes]] = deque()
+        self._condition = asyncio.Condition()
+        self._closed = False
+        self.dropped_frames = 0
+        self.coalesced_frames = 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def put(self, frame: bytes) -> bool:
+        """放入一帧音频，被丢弃或队列已关闭时返回 False"""
+        async with self._condition:
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.policy == "drop":
+                    self.dropped_frames += 1
+                    return False
+                if self.policy == "coalesce":
+                    self._items[-1].append(frame)
+                    self.coalesced_frames += 1
+                    return True
+                await self._condition.wait_for(lambda: len(self._items) < self.maxsize or self._closed)
+                if self._closed:
+                    return False
+            self._items.append([frame])
+            self._condition.notify_all()
+            return True
+
+    async def get(self) -> Optional[List[bytes]]:
+        """取出一组帧；队列关闭且已取空时返回 None"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._items or self._closed)
+            if not self._items:
+                return None
+            frames = self._items.popleft()
+            self._condition.notify_all()
+            return frames
+
+    async def close(self):
+        """关闭队列，已入队的帧仍可被取出"""
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
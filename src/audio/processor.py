@@ -2,56 +2,112 @@ import numpy as np
 import logging
 from typing import Optional
 
+from .ring_buffer import AudioRingBuffer
+from .resampler import StreamingResampler
+from .decoder import create_decoder
+
 
 logger = logging.getLogger(__name__)
 
 
 class AudioProcessor:
     
-    def __init__(self, sample_rate: int = 16000, chunk_size_ms: int = 100):
+    def __init__(self, sample_rate: int = 16000, chunk_size_ms: int = 100, buffer_seconds: int = 30,
+                 overflow: str = "drop_oldest", buffer_dtype: str = "float32", target_sample_rate: int = 16000,
+                 audio_format: str = "pcm"):
         self.sample_rate = sample_rate
+        self.target_sample_rate = target_sample_rate
         self.chunk_size_ms = chunk_size_ms
-        self.chunk_size = int(sample_rate * chunk_size_ms / 1000)
-        self.buffer = []
+        # 缓冲区与分块均以模型采样率计
+        self.chunk_size = int(target_sample_rate * chunk_size_ms / 1000)
+        
+        # 按会话的 format 参数选择流式解码器，解码结果统一为 16bit PCM
+        self.audio_format = audio_format
+        self.decoder = create_decoder(audio_format, sample_rate)
+        if self.decoder.sample_rate:
+            self.sample_rate = self.decoder.sample_rate
+        
+        # 输入采样率与模型采样率不一致时，在服务端流式重采样
+        # 此时重采样输出为 float32，缓冲区不再保留原始 PCM
+        self.resampler: Optional[StreamingResampler] = None
+        self._configure_resampler()
+        if self.resampler is not None:
+            buffer_dtype = "float32"
+        
+        # 预分配的环形缓冲区，避免每帧 concatenate 带来的分配与拷贝
+        # buffer_dtype 为 int16 时保留原始 PCM，交给模型前再转换为 float32，常驻内存减半
+        self.buffer = AudioRingBuffer(max(int(target_sample_rate * buffer_seconds), self.chunk_size), buffer_dtype, overflow)
         self.total_samples = 0
     
-    def add_audio(self, audio_data: bytes) -> np.ndarray:
+    def _configure_resampler(self):
+        if self.sample_rate == self.target_sample_rate:
+            self.resampler = None
+            return
+        self.resampler = StreamingResampler(self.sample_rate, self.target_sample_rate)
+        logger.info(f"Resampling audio {self.sample_rate}Hz -> {self.target_sample_rate}Hz")
+    
+    def add_audio(self, audio_data: bytes) -> int:
+        """解码一帧音频，转换与缩放直接写入缓冲区，返回写入的样本数
+
+        Raises:
+            BufferError: 缓冲区已满且溢出策略为 error，由调用方以协议错误结束会话
+        """
         try:
-            audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-            self.buffer.append(audio_array)
-            self.total_samples += len(audio_array)
-            return audio_array
+            pcm = self.decoder.decode(audio_data)
+            if self.decoder.sample_rate and self.decoder.sample_rate != self.sample_rate:
+                # WAV 头等流内信息给出的采样率与会话声明不一致时，以流内信息为准
+                logger.info(f"Stream sample rate {self.decoder.sample_rate}Hz overrides declared {self.sample_rate}Hz")
+                self.sample_rate = self.decoder.sample_rate
+                self._configure_resampler()
+                if self.resampler is not None and self.buffer.dtype != np.float32:
+                    self.buffer = AudioRingBuffer(self.buffer.capacity, np.float32, self.buffer.overflow)
+            if self.resampler is not None:
+                self.total_samples += len(pcm)
+                return self.buffer.append(self.resampler.process(pcm * np.float32(1.0 / 32768.0)))
+            written = self.buffer.append_pcm16(pcm)
+            self.total_samples += written
+            return written
+        except BufferError:
+            raise
         except Exception as e:
             logger.error(f"Error processing audio: {e}")
-            return np.array([])
+            return 0
     
     def get_buffered_audio(self) -> np.ndarray:
-        if not self.buffer:
+        if len(self.buffer) == 0:
             return np.array([])
         
-        result = np.concatenate(self.buffer)
-        self.buffer = []
-        return result
+        # 返回的数据会交给推理线程/进程，因此拷贝出缓冲区
+        return self.buffer.read_float32(len(self.buffer))
     
-    def get_chunk_audio(self) -> np.ndarray:
-        if not self.buffer:
-            return np.array([])
-        
-        result = np.concatenate(self.buffer)
+    def get_chunk_audio(self, stride: Optional[int] = None, max_samples: Optional[int] = None) -> np.ndarray:
+        """取出下一段待推理的音频
         
+        Args:
+            stride: 模型的推理步长（采样点数）；缓冲区积压超过两个块时，
+                一次取出尽可能多的完整步长，交给模型在一次调用内处理
+            max_samples: 单次最多取出的采样点数
+        """
+        available = len(self.buffer)
         # 只有当累积的音频数据达到指定大小时才返回处理块
         # 这样可以避免过于频繁的模型调用
-        if len(result) >= self.chunk_size:
-            chunk = result[:self.chunk_size]
-            self.buffer = [result[self.chunk_size:]]
-            return chunk
-        else:
+        if available < self.chunk_size:
             # 如果累积的数据不足一个块大小，则不返回任何数据
             # 等待更多音频数据到达
             return np.array([])
+        
+        if stride and available >= 2 * self.chunk_size:
+            limit = min(available, max_samples) if max_samples else available
+            coalesced = limit // stride * stride
+            if coalesced > self.chunk_size:
+                logger.debug(f"Coalescing backlog: {available} samples buffered, taking {coalesced}")
+                return self.buffer.read_float32(coalesced)
+        return self.buffer.read_float32(self.chunk_size)
     
     def clear_buffer(self):
-        self.buffer = []
+        self.buffer.clear()
+        if self.resampler is not None:
+            self.resampler.reset()
         self.total_samples = 0
     
     def get_duration_ms(self) -> int:
@@ -0,0 +1,156 @@
+import logging
+from typing import Optional, Union
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+_PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+
+class AudioRingBuffer:
+    """预分配、固定容量的音频环形缓冲区
+
+    支持 float32（归一化样本）与 int16（原始 PCM）两种存储类型。
+    写入为 O(1) 的切片拷贝，不产生新的数组；读取时若数据在环内连续则直接返回视图，
+    跨越环尾时拷贝到预分配的临时区。返回的视图只在下一次写入前有效。
+
+    溢出策略：
+        drop_oldest: 丢弃最旧的样本，为新数据腾出空间（默认）
+        drop_newest: 丢弃放不下的新样本
+        error: 抛出 BufferError
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "error")
+
+    def __init__(self, capacity: int, dtype=np.float32, overflow: str = "drop_oldest"):
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.overflow = overflow
+        self._data = np.zeros(capacity, dtype=self.dtype)
+        self._scratch = np.empty(capacity, dtype=self.dtype)
+        self._start = 0
+        self._size = 0
+        self.dropped_samples = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free_space(self) -> int:
+        return self.capacity - self._size
+
+    def _make_room(self, length: int) -> slice:
+        """按溢出策略腾出空间，返回输入中实际需要写入的样本范围"""
+        if length <= self.free_space:
+            return slice(0, length)
+
+        if self.overflow == "error":
+            raise BufferError(f"Ring buffer overflow: {length} samples, {self.free_space} free")
+        if self.overflow == "drop_newest":
+            dropped = length - self.free_space
+            keep = slice(0, self.free_space)
+        elif length >= self.capacity:
+            # 新数据本身就超过容量，只保留最后 capacity 个样本
+            dropped = self._size + length - self.capacity
+            keep = slice(length - self.capacity, length)
+            self._start = 0
+            self._size = 0
+        else:
+            dropped = length - self.free_space
+            keep = slice(0, length)
+            self._start = (self._start + dropped) % self.capacity
+            self._size -= dropped
+        self.dropped_samples += dropped
+        logger.warning(f"Audio ring buffer overflow ({self.overflow}): dropped {dropped} samples")
+        return keep
+
+    def _write(self, samples: np.ndarray, scale: Optional[float] = None) -> int:
+        keep = self._make_room(len(samples))
+        samples = samples[keep]
+        length = len(samples)
+        if length == 0:
+            return 0
+
+        end = (self._start + self._size) % self.capacity
+        first = min(length, self.capacity - end)
+        parts = ((self._data[end:end + first], samples[:first]),)
+        if first < length:
+            parts += ((self._data[:length - first], samples[first:]),)
+        for dest, src in parts:
+            # 类型转换直接写入目标区域，再原地缩放，不产生中间数组
+            dest[...] = src
+            if scale is not None:
+                dest *= scale
+        self._size += length
+        return length
+
+    def append(self, samples: np.ndarray) -> int:
+        """写入样本，返回实际写入的样本数"""
+        if len(samples) == 0:
+            return 0
+        return self._write(samples)
+
+    def append_pcm16(self, pcm: Union[bytes, np.ndarray]) -> int:
+        """直接写入 16bit PCM 字节或 int16 样本
+
+        float32 缓冲区在写入时完成 int16→float32 的转换与 1/32768 缩放；
+        int16 缓冲区按原样保存，读取时再转换，常驻内存减半。
+        """
+        samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+        if len(samples) == 0:
+            return 0
+        if self.dtype == np.int16:
+            return self._write(samples)
+        return self._write(samples, _PCM16_SCALE)
+
+    def peek(self, length: int) -> np.ndarray:
+        """返回前 length 个样本（视图或临时区），不移动读指针"""
+        length = min(length, self._size)
+        first = min(length, self.capacity - self._start)
+        if first == length:
+            return self._data[self._start:self._start + length]
+        out = self._scratch[:length]
+        out[:first] = self._data[self._start:]
+        out[first:] = self._data[:length - first]
+        return out
+
+    def consume(self, length: int):
+        """丢弃前 length 个样本"""
+        length = min(length, self._size)
+        self._start = (self._start + length) % self.capacity
+        self._size -= length
+        if self._size == 0:
+            self._start = 0
+
+    def read(self, length: int) -> np.ndarray:
+        """读取并移除前 length 个样本，返回视图，下一次写入前有效"""
+        chunk = self.peek(length)
+        self.consume(len(chunk))
+        return chunk
+
+    def read_float32(self, length: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """读取并移除前 length 个样本，以归一化 float32 返回
+
+        Args:
+            length: 样本数
+            out: 可选的目标数组；为 None 时分配新数组
+        """
+        chunk = self.read(length)
+        if out is None:
+            out = np.empty(len(chunk), dtype=np.float32)
+        else:
+            out = out[:len(chunk)]
+        out[...] = chunk
+        if self.dtype == np.int16:
+            out *= _PCM16_SCALE
+        return out
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
@@ -0,0 +1,158 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+_EMPTY = np.zeros(0, dtype=np.float32)
+
+
+class EnergyVAD:
+    """向量化的能量/过零率语音检测器
+
+    按 10ms 帧计算对数能量与过零率：能量高于阈值的帧视为语音，
+    能量只略高于阈值但过零率很高的帧（气流、摩擦类噪声）视为静音。
+    阈值取固定下限与自适应噪声底加裕量中的较大值，噪声底由静音帧能量平滑更新。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 10, threshold_db: float = -45.0,
+                 noise_margin_db: float = 10.0, max_zcr: float = 0.4, min_speech_frames: int = 3):
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.max_zcr = max_zcr
+        self.min_speech_frames = min_speech_frames
+        self.noise_floor_db = threshold_db - noise_margin_db
+        self._remainder = _EMPTY
+
+    def contains_speech(self, audio: np.ndarray) -> bool:
+        """判断一段音频（float32，[-1, 1]）中是否包含语音，不足一帧的尾部留到下一次判断"""
+        samples = np.concatenate((self._remainder, audio)) if len(self._remainder) else audio
+        num_frames = len(samples) // self.frame_length
+        self._remainder = samples[num_frames * self.frame_length:].copy()
+        if num_frames == 0:
+            return False
+
+        frames = samples[:num_frames * self.frame_length].reshape(num_frames, self.frame_length)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        speech = (energy_db > threshold) & ((zcr < self.max_zcr) | (energy_db > threshold + self.noise_margin_db))
+
+        silence_energy = energy_db[~speech]
+        if len(silence_energy):
+            self.noise_floor_db = 0.9 * self.noise_floor_db + 0.1 * float(np.mean(silence_energy))
+        return int(np.count_nonzero(speech)) >= self.min_speech_frames
+
+
+class FsmnVAD:
+    """FunASR fsmn-vad 流式检测器
+
+    模型由所有会话共享，检测状态（cache）按会话保存。
+    fsmn-vad 输出 [起点, 终点] 毫秒片段，-1 表示该端点尚未出现，据此维护语音中/静音状态。
+    """
+
+    def __init__(self, model: Any, sample_rate: int = 16000):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.cache: Dict[str, Any] = {}
+        self.in_speech = False
+
+    def contains_speech(self, audio: np.ndarray) -> bool:
+        chunk_ms = max(1, int(len(audio) * 1000 / self.sample_rate))
+        result = self.model.generate(input=audio, cache=self.cache, is_final=False, chunk_size=chunk_ms, disable_pbar=True)
+        segments = result[0].get("value", []) if result else []
+        detected = False
+        for begin, end in segments:
+            if begin != -1:
+                self.in_speech = True
+                detected = True
+            if end != -1:
+                self.in_speech = False
+                detected = True
+        return detected or self.in_speech
+
+
+def load_fsmn_vad_model(model: str = "fsmn-vad", device: str = "cpu", model_revision: Optional[str] = None):
+    """加载 FunASR fsmn-vad 模型，供所有会话共享"""
+    from funasr import AutoModel
+
+    kwargs = {"model_revision": model_revision} if model_revision else {}
+    logger.info(f"Loading VAD model: {model}")
+    return AutoModel(model=model, device=device, disable_update=True, disable_pbar=True, **kwargs)
+
+
+class StreamingVADGate:
+    """会话级流式 VAD 闸门，位于 AudioProcessor 与识别模型之间
+
+    静音期间不调用模型，只在前导缓冲中保留最近 pre_speech_ms 的音频；
+    检测到语音时把前导音频与当前块一起送入模型，保证语音起始处的上下文完整；
+    语音中出现的短暂停顿照常送入模型，连续静音达到 end_silence_ms 时判定语音结束，
+    由调用方以 is_final=True 完成该句识别。
+    """
+
+    def __init__(self, detector: Any, sample_rate: int = 16000, pre_speech_ms: int = 300, end_silence_ms: int = 800):
+        self.detector = detector
+        self.sample_rate = sample_rate
+        self.pre_speech_samples = int(sample_rate * pre_speech_ms / 1000)
+        self.end_silence_samples = max(1, int(sample_rate * end_silence_ms / 1000))
+        self.in_speech = False
+        self._pre_roll: List[np.ndarray] = []
+        self._pre_roll_samples = 0
+        self._silence_samples = 0
+        # 统计：跳过推理的样本数与检测到的语音段数
+        self.skipped_samples = 0
+        self.speech_segments = 0
+
+    @property
+    def offload(self) -> bool:
+        """检测器是否需要在推理线程中执行（模型类检测器会阻塞事件循环）"""
+        return not isinstance(self.detector, EnergyVAD)
+
+    def _push_pre_roll(self, audio: np.ndarray):
+        self._pre_roll.append(audio)
+        self._pre_roll_samples += len(audio)
+        while self._pre_roll and self._pre_roll_samples - len(self._pre_roll[0]) >= self.pre_speech_samples:
+            self._pre_roll_samples -= len(self._pre_roll.pop(0))
+        if self._pre_roll_samples > self.pre_speech_samples:
+            # 最早一块只保留落在前导窗口内的部分
+            excess = self._pre_roll_samples - self.pre_speech_samples
+            self._pre_roll[0] = self._pre_roll[0][excess:]
+            self._pre_roll_samples -= excess
+
+    def process(self, audio: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """处理一段音频
+
+        Returns:
+            (需要送入模型的音频, 是否在此段检测到语音结束)；静音期间返回空数组
+        """
+        has_speech = self.detector.contains_speech(audio)
+        if not self.in_speech:
+            if not has_speech:
+                buffered = self._pre_roll_samples
+                self._push_pre_roll(audio)
+                # 被挤出前导缓冲的音频不会再送入模型
+                self.skipped_samples += buffered + len(audio) - self._pre_roll_samples
+                return _EMPTY, False
+            self.in_speech = True
+            self.speech_segments += 1
+            self._silence_samples = 0
+            if self._pre_roll:
+                audio = np.concatenate(self._pre_roll + [audio])
+                self._pre_roll = []
+                self._pre_roll_samples = 0
+            return audio, False
+
+        if has_speech:
+            self._silence_samples = 0
+            return audio, False
+        self._silence_samples += len(audio)
+        if self._silence_samples >= self.end_silence_samples:
+            self.in_speech = False
+            self._silence_samples = 0
+            return audio, True
+        return audio, False
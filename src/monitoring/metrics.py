@@ -0,0 +1,277 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 推理/延迟类直方图的默认分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+# 实时率分桶（推理耗时 / 音频时长）
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+# 队列深度分桶（帧）
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class MetricsRegistry:
+    """指标注册表，负责按 Prometheus 文本格式（0.0.4）导出全部指标"""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Duplicate metric name: {metric.name}")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    """指标基类
+
+    无标签的指标直接调用 inc/set/observe；带标签的指标先 labels(...) 取得子指标。
+    子指标按标签值缓存，热路径上只有一次字典查找和一次加锁累加。
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[MetricsRegistry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        try:
+            return self._children[()]
+        except KeyError:
+            raise ValueError(f"{self.name} has labels {self.labelnames}, use labels()") from None
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            children = list(self._children.items())
+        lines: List[str] = []
+        for key, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, key))
+        return lines
+
+
+class _ValueChild:
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def get(self) -> float:
+        return self._value
+
+    def samples(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> List[str]:
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self._value)}"]
+
+
+class _HistogramChild:
+
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # 最后一个桶为 +Inf
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def get_count(self) -> int:
+        return sum(self._counts)
+
+    def samples(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> List[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = []
+        cumulative = 0
+        bucket_labels = tuple(labelnames) + ("le",)
+        for bound, count in zip(self._upper_bounds + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(bucket_labels, tuple(key) + (_format_value(bound),))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, key)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class Histogram(_Metric):
+    """固定分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional[MetricsRegistry] = REGISTRY):
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+
+def render_metrics() -> str:
+    """导出全局注册表中的全部指标"""
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------------
+# 服务指标
+# ---------------------------------------------------------------------------
+
+SESSIONS_ACTIVE = Gauge(
+    "asr_sessions_active", "Number of recognition sessions currently held by the server")
+SESSIONS_STARTED = Counter(
+    "asr_sessions_started_total", "Recognition sessions started", ["response_mode"])
+SESSIONS_REJECTED = Counter(
+    "asr_sessions_rejected_total", "Recognition sessions rejected by admission control")
+SESSION_CACHE_BYTES = Gauge(
+    "asr_session_cache_bytes", "Total tensor bytes held in streaming caches of active sessions")
+SESSION_CACHE_COMPACTIONS = Counter(
+    "asr_session_cache_compactions_total", "Streaming cache compactions", ["reason"])
+
+AUDIO_FRAMES_RECEIVED = Counter(
+    "asr_audio_frames_received_total", "Binary audio frames received from clients", ["protocol"])
+AUDIO_FRAMES_DROPPED = Counter(
+    "asr_audio_frames_dropped_total", "Audio frames dropped because inference fell behind")
+AUDIO_QUEUE_DEPTH = Histogram(
+    "asr_audio_queue_depth", "Per-session audio queue depth observed when a frame arrives",
+    buckets=QUEUE_DEPTH_BUCKETS)
+BYTES_RECEIVED = Counter(
+    "asr_bytes_received_total", "WebSocket payload bytes received", ["kind"])
+BYTES_SENT = Counter(
+    "asr_bytes_sent_total", "WebSocket payload bytes sent")
+
+VAD_SKIPPED_SECONDS = Counter(
+    "asr_vad_skipped_audio_seconds_total", "Seconds of audio the VAD gate kept away from the model")
+VAD_SPEECH_SEGMENTS = Counter(
+    "asr_vad_speech_segments_total", "Speech segments detected by the VAD gate")
+
+MODEL_INFERENCE_SECONDS = Histogram(
+    "asr_model_inference_seconds", "Time spent in the ASR backend recognize call", ["response_mode"])
+CHUNK_LATENCY_SECONDS = Histogram(
+    "asr_chunk_latency_seconds", "Per-chunk recognition latency seen by the handler, including queueing",
+    ["response_mode"])
+FIRST_PARTIAL_SECONDS = Histogram(
+    "asr_time_to_first_partial_seconds", "Time from session start to the first result event",
+    ["response_mode"])
+FINAL_LATENCY_SECONDS = Histogram(
+    "asr_final_latency_seconds", "Time from the stop command to the final result being sent",
+    ["response_mode"])
+SESSION_RTF = Histogram(
+    "asr_session_rtf", "Per-session real-time factor (inference time / audio duration)",
+    ["response_mode"], buckets=RTF_BUCKETS)
+
+FILE_AUDIO_SECONDS = Counter(
+    "asr_file_audio_seconds_total", "Seconds of audio transcribed through the HTTP file endpoint")
+FILE_TRANSCRIPTION_RTF = Histogram(
+    "asr_file_transcription_rtf", "Per-file real-time factor (wall time / audio duration) of HTTP transcription",
+    buckets=RTF_BUCKETS)
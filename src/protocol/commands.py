@@ -0,0 +1,122 @@
+from typing import Any, Dict, List, Optional
+
+
+_TRUE_STRINGS = {"1", "true", "t", "yes", "y", "on"}
+_FALSE_STRINGS = {"0", "false", "f", "no", "n", "off"}
+
+
+def _as_str(value: Any, field: str) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value
+
+
+def _as_optional_str(value: Any, field: str) -> Optional[str]:
+    return None if value is None else _as_str(value, field)
+
+
+def _as_int(value: Any, field: str) -> int:
+    # 与 pydantic 宽松模式一致：接受整数、整数值的浮点数和数字字符串
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"{field} must be an integer")
+
+
+def _as_bool(value: Any, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+    raise ValueError(f"{field} must be a boolean")
+
+
+def _as_dict(value: Any, field: str) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ValueError(f"{field} must be an object")
+    return value
+
+
+class StartTranscription:
+    """阿里云 StartTranscription 指令"""
+
+    __slots__ = (
+        "task_id", "message_id", "appkey", "audio_format", "sample_rate",
+        "enable_intermediate_result", "enable_punctuation_prediction",
+        "enable_inverse_text_normalization", "enable_disfluency_removal",
+        "max_sentence_silence", "enable_words", "enable_semantic_sentence_detection",
+        "response_mode", "payload",
+    )
+
+    def __init__(self, header: Dict[str, Any], payload: Dict[str, Any]):
+        self.task_id = _as_str(header.get("task_id"), "header.task_id")
+        self.message_id = _as_str(header.get("message_id"), "header.message_id")
+        self.appkey = _as_optional_str(header.get("appkey"), "header.appkey")
+        self.audio_format = _as_str(payload.get("format", "pcm"), "payload.format")
+        self.sample_rate = _as_int(payload.get("sample_rate", 16000), "payload.sample_rate")
+        self.enable_intermediate_result = _as_bool(payload.get("enable_intermediate_result", False), "payload.enable_intermediate_result")
+        self.enable_punctuation_prediction = _as_bool(payload.get("enable_punctuation_prediction", False), "payload.enable_punctuation_prediction")
+        self.enable_inverse_text_normalization = _as_bool(payload.get("enable_inverse_text_normalization", False), "payload.enable_inverse_text_normalization")
+        self.enable_disfluency_removal = _as_bool(payload.get("enable_disfluency_removal", False), "payload.enable_disfluency_removal")
+        self.max_sentence_silence = _as_int(payload.get("max_sentence_silence", 800), "payload.max_sentence_silence")
+        self.enable_words = _as_bool(payload.get("enable_words", False), "payload.enable_words")
+        self.enable_semantic_sentence_detection = _as_bool(payload.get("enable_semantic_sentence_detection", False), "payload.enable_semantic_sentence_detection")
+        self.response_mode = _as_str(payload.get("response_mode", "fast"), "payload.response_mode")
+        self.payload = payload
+
+
+class StopTranscription:
+    """阿里云 StopTranscription 指令"""
+
+    __slots__ = ("task_id", "message_id")
+
+    def __init__(self, header: Dict[str, Any]):
+        self.task_id = _as_str(header.get("task_id"), "header.task_id")
+        self.message_id = _as_str(header.get("message_id"), "header.message_id")
+
+
+class RunTask:
+    """旧版 run-task 指令"""
+
+    __slots__ = (
+        "task_id", "audio_format", "sample_rate", "language_hints",
+        "punctuation_prediction_enabled", "inverse_text_normalization_enabled", "response_mode",
+    )
+
+    def __init__(self, header: Dict[str, Any], payload: Dict[str, Any]):
+        self.task_id = _as_str(header.get("task_id"), "header.task_id")
+        parameters = _as_dict(payload.get("parameters"), "payload.parameters")
+        self.audio_format = _as_str(parameters.get("format", "pcm"), "parameters.format")
+        self.sample_rate = _as_int(parameters.get("sample_rate", 16000), "parameters.sample_rate")
+        language_hints = parameters.get("language_hints")
+        if language_hints is not None and not (
+            isinstance(language_hints, list) and all(isinstance(hint, str) for hint in language_hints)
+        ):
+            raise ValueError("parameters.language_hints must be a list of strings")
+        self.language_hints: Optional[List[str]] = language_hints
+        self.punctuation_prediction_enabled = _as_bool(parameters.get("punctuation_prediction_enabled", True), "parameters.punctuation_prediction_enabled")
+        self.inverse_text_normalization_enabled = _as_bool(parameters.get("inverse_text_normalization_enabled", True), "parameters.inverse_text_normalization_enabled")
+        self.response_mode = _as_str(parameters.get("response_mode", "balanced"), "parameters.response_mode")
+
+
+class FinishTask:
+    """旧版 finish-task 指令"""
+
+    __slots__ = ("task_id",)
+
+    def __init__(self, header: Dict[str, Any], payload: Dict[str, Any]):
+        self.task_id = _as_str(header.get("task_id"), "header.task_id")
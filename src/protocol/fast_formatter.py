@@ -0,0 +1,166 @@
+import itertools
+import logging
+import os
+from json.encoder import encode_basestring
+from typing import Optional
+
+from .formatter import ProtocolFormatter
+
+
+logger = logging.getLogger(__name__)
+
+
+# 消息ID：进程级随机前缀 + 自增计数，共32位十六进制字符，避免每条消息调用 uuid4
+_MESSAGE_ID_PREFIX = os.urandom(8).hex()
+_message_counter = itertools.count(1)
+
+_SUCCESS_STATUS = ',"status":20000000,"status_message":"GATEWAY|SUCCESS|Success."}'
+
+
+def _aliyun_header(message_id: str, task_id: str, namespace: str, name: str, tail: str = _SUCCESS_STATUS) -> str:
+    return (
+        '{"header":{"message_id":"' + message_id
+        + '","task_id":' + encode_basestring(task_id)
+        + ',"namespace":"' + namespace + '","name":"' + name + '"' + tail
+    )
+
+
+def _legacy_header(task_id: str, event: str) -> str:
+    return '{"header":{"task_id":' + encode_basestring(task_id) + ',"event":"' + event + '","attributes":{}}'
+
+
+def _aliyun_words(words: Optional[list]) -> str:
+    if not words:
+        return ""
+    return ',"words":[' + ",".join(
+        '{"text":' + encode_basestring(w["text"])
+        + ',"startTime":' + str(int(w["begin_time"]))
+        + ',"endTime":' + str(int(w["end_time"])) + "}"
+        for w in words
+    ) + "]"
+
+
+def _legacy_words(words: Optional[list]) -> str:
+    if not words:
+        return ""
+    return ',"words":[' + ",".join(
+        '{"begin_time":' + str(int(w["begin_time"]))
+        + ',"end_time":' + str(int(w["end_time"]))
+        + ',"text":' + encode_basestring(w["text"])
+        + ',"punctuation":""}'
+        for w in words
+    ) + "]"
+
+
+class FastProtocolFormatter(ProtocolFormatter):
+    """事件序列化快速路径
+
+    与 ProtocolFormatter 接口一致，输出与 pydantic model_dump_json(exclude_none=True)
+    逐字节相同的 JSON，但直接由预先拼好的固定片段和转义后的字段值拼接而成，
+    不构建、校验 pydantic 模型。字符串转义使用标准库 C 实现的 encode_basestring，
+    与 pydantic 一样只转义引号、反斜杠和控制字符，不转义非 ASCII 字符。
+    """
+
+    @staticmethod
+    def generate_message_id() -> str:
+        """生成唯一的消息ID
+
+        Returns:
+            32位的消息ID
+        """
+        return _MESSAGE_ID_PREFIX + format(next(_message_counter) & 0xFFFFFFFFFFFFFFFF, "016x")
+
+    @staticmethod
+    def create_task_started_event(task_id: str, protocol: str = "aliyun") -> str:
+        if protocol == "aliyun":
+            return (
+                _aliyun_header(FastProtocolFormatter.generate_message_id(), task_id,
+                               "SpeechTranscriber", "TranscriptionStarted")
+                + ',"payload":{"session_id":"' + FastProtocolFormatter.generate_message_id() + '"}}'
+            )
+        return _legacy_header(task_id, "task-started") + ',"payload":{}}'
+
+    @staticmethod
+    def create_result_generated_event(
+        task_id: str,
+        text: str,
+        begin_time: int,
+        end_time: Optional[int] = None,
+        sentence_end: bool = False,
+        words: Optional[list] = None,
+        duration: Optional[int] = None,
+        is_final: bool = False,
+        protocol: str = "aliyun",
+        sentence_index: int = 1
+    ) -> str:
+        if protocol == "aliyun":
+            if not sentence_end:
+                # 中间结果
+                return (
+                    _aliyun_header(FastProtocolFormatter.generate_message_id(), task_id,
+                                   "SpeechTranscriber", "TranscriptionResultChanged")
+                    + ',"payload":{"index":' + str(int(sentence_index))
+                    + ',"time":' + str(int(duration or 0))
+                    + ',"result":' + encode_basestring(text)
+                    + _aliyun_words(words) + "}}"
+                )
+            # 句子结束事件
+            return (
+                _aliyun_header(FastProtocolFormatter.generate_message_id(), task_id,
+                               "SpeechTranscriber", "SentenceEnd")
+                + ',"payload":{"index":' + str(int(sentence_index))
+                + ',"time":' + str(int(duration or 0))
+                + ',"begin_time":' + str(int(begin_time))
+                + ',"result":' + encode_basestring(text)
+                + _aliyun_words(words) + ',"status":20000000}}'
+            )
+
+        # 旧版协议
+        sentence = '{"begin_time":' + str(int(begin_time))
+        if end_time is not None:
+            sentence += ',"end_time":' + str(int(end_time))
+        sentence += (
+            ',"text":' + encode_basestring(text)
+            + ',"sentence_end":' + ("true" if sentence_end else "false")
+            + ',"is_final":' + ("true" if is_final else "false")
+            + _legacy_words(words) + "}"
+        )
+        usage = ',"usage":{"duration":' + str(int(duration)) + "}" if duration is not None else ""
+        return (
+            _legacy_header(task_id, "result-generated")
+            + ',"payload":{"output":{"sentence":' + sentence + "}" + usage + "}}"
+        )
+
+    @staticmethod
+    def create_task_finished_event(task_id: str, protocol: str = "aliyun") -> str:
+        if protocol == "aliyun":
+            return (
+                _aliyun_header(FastProtocolFormatter.generate_message_id(), task_id,
+                               "SpeechTranscriber", "TranscriptionCompleted")
+                + ',"payload":{}}'
+            )
+        return _legacy_header(task_id, "task-finished") + ',"payload":{}}'
+
+    @staticmethod
+    def create_task_failed_event(
+        task_id: str,
+        error_code: str,
+        error_message: str,
+        status: int = 40000000,
+        protocol: str = "aliyun"
+    ) -> str:
+        if protocol == "aliyun":
+            tail = (
+                ',"status":' + str(int(status))
+                + ',"status_message":' + encode_basestring(f"GATEWAY|{error_code}|{error_message}") + "}"
+            )
+            return (
+                _aliyun_header(FastProtocolFormatter.generate_message_id(), task_id, "Default", "TaskFailed", tail)
+                + ',"payload":{}}'
+            )
+        return (
+            '{"header":{"task_id":' + encode_basestring(task_id)
+            + ',"event":"task-failed","error_code":' + encode_basestring(error_code)
+            + ',"error_message":' + encode_basestring(error_message)
+            + ',"attributes":{}},"payload":{}}'
+        )
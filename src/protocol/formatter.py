@@ -14,6 +14,8 @@ from .types import (
     SentenceEndEvent,
     TranscriptionCompletedEvent,
     WordInfo,
+    TaskFailedEvent,
+    LegacyTaskFailedEvent,
 )
 
 
@@ -245,3 +247,53 @@ class ProtocolFormatter:
         result = event.model_dump_json(exclude_none=True)
         logger.debug(f"Serialized task finished event for task: {task_id}")
         return result
+    
+    @staticmethod
+    def create_task_failed_event(
+        task_id: str,
+        error_code: str,
+        error_message: str,
+        status: int = 40000000,
+        protocol: str = "aliyun"
+    ) -> str:
+        """创建任务失败事件
+        
+        Args:
+            task_id: 任务ID
+            error_code: 错误类型，例如 "TOO_MANY_REQUESTS"、"IDLE_TIMEOUT"
+            error_message: 具体错误原因
+            status: 阿里云协议的状态码
+            protocol: 协议类型，可选值："aliyun" 或 "legacy"
+            
+        Returns:
+            JSON格式的事件消息
+        """
+        logger.debug(f"Creating task failed event for task: {task_id}, error: {error_code}, protocol: {protocol}")
+        
+        if protocol == "aliyun":
+            # 生成符合阿里云规范的事件
+            event = TaskFailedEvent(
+                header={
+                    "message_id": ProtocolFormatter.generate_message_id(),
+                    "task_id": task_id,
+                    "namespace": "Default",
+                    "name": "TaskFailed",
+                    "status": status,
+                    "status_message": f"GATEWAY|{error_code}|{error_message}"
+                },
+                payload={}
+            )
+        else:
+            # 生成符合旧版规范的事件
+            event = LegacyTaskFailedEvent(
+                header={
+                    "task_id": task_id,
+                    "event": "task-failed",
+                    "error_code": error_code,
+                    "error_message": error_message,
+                    "attributes": {}
+                },
+                payload={}
+            )
+        
+        return event.model_dump_json(exclude_none=True)
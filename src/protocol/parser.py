@@ -7,10 +7,27 @@ from .types import (
     StartTranscriptionCommand,
     StopTranscriptionCommand,
 )
+from .commands import (
+    StartTranscription,
+    StopTranscription,
+    RunTask,
+    FinishTask,
+    _as_dict,
+)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSON_DECODE_ERRORS = (orjson.JSONDecodeError, json.JSONDecodeError)
+except ImportError:
+    _json_loads = json.loads
+    _JSON_DECODE_ERRORS = (json.JSONDecodeError,)
 
 
 logger = logging.getLogger(__name__)
 
+Command = Union[StartTranscription, StopTranscription, RunTask, FinishTask]
+
 
 class ProtocolParser:
     
@@ -73,6 +90,45 @@ class ProtocolParser:
             logger.error(f"Parse command error: {e}")
             return None
     
+    @staticmethod
+    def parse(message: Union[str, bytes]) -> Optional[Command]:
+        """解析客户端指令，一次解码、一次校验，直接返回带类型的指令对象
+        
+        安装了 orjson 时使用 orjson 解码。
+        
+        Returns:
+            StartTranscription / StopTranscription / RunTask / FinishTask，无法识别或校验失败时返回 None
+        """
+        try:
+            data = _as_dict(_json_loads(message), "message")
+            header = _as_dict(data.get("header", {}), "header")
+            
+            # 检查是否为阿里云WebSocket API规范的指令
+            if header.get("namespace") == "SpeechTranscriber":
+                name = header.get("name")
+                if name == "StartTranscription":
+                    return StartTranscription(header, _as_dict(data.get("payload"), "payload"))
+                if name == "StopTranscription":
+                    payload = data.get("payload")
+                    if payload is not None:
+                        _as_dict(payload, "payload")
+                    return StopTranscription(header)
+            
+            # 检查是否为旧版指令
+            action = header.get("action", "")
+            if action == "run-task":
+                return RunTask(header, _as_dict(data.get("payload"), "payload"))
+            if action == "finish-task":
+                return FinishTask(header, _as_dict(data.get("payload"), "payload"))
+            logger.warning(f"Unknown action: {action}")
+            return None
+        except _JSON_DECODE_ERRORS as e:
+            logger.error(f"JSON decode error: {e}")
+            return None
+        except ValueError as e:
+            logger.error(f"Invalid command: {e}")
+            return None
+    
     @staticmethod
     def validate_task_id(task_id: str) -> bool:
         if not task_id:
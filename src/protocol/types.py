@@ -144,6 +144,20 @@ class TranscriptionCompletedEvent(BaseModel):
     payload: Optional[TranscriptionCompletedPayload] = Field(default=None)
 
 
+class TaskFailedHeader(BaseModel):
+    message_id: str
+    task_id: str
+    namespace: str = Field(default="Default")
+    name: str = Field(default="TaskFailed")
+    status: int = Field(default=40000000)
+    status_message: str = Field(default="GATEWAY|CLIENT_ERROR|Client error.")
+
+
+class TaskFailedEvent(BaseModel):
+    header: TaskFailedHeader
+    payload: Dict[str, Any] = Field(default_factory=dict)
+
+
 # 兼容旧版本的类型定义（用于向后兼容）
 class RunTaskHeader(BaseModel):
     action: str = Field(default="run-task")
@@ -249,3 +263,16 @@ class TaskFinishedHeader(BaseModel):
 class TaskFinishedEvent(BaseModel):
     header: TaskFinishedHeader
     payload: Dict[str, Any] = Field(default_factory=dict)
+
+
+class LegacyTaskFailedHeader(BaseModel):
+    task_id: str
+    event: str = Field(default="task-failed")
+    error_code: str
+    error_message: str
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+
+
+class LegacyTaskFailedEvent(BaseModel):
+    header: LegacyTaskFailedHeader
+    payload: Dict[str, Any] = Field(default_factory=dict)
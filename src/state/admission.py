@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """会话准入控制
+
+    限制同时进行的识别会话数量。容量已满时，新会话最多排队等待 queue_timeout 秒，
+    期间有会话结束则按到达顺序移交名额；超时或 queue_timeout 为 0 时直接拒绝。
+    """
+
+    def __init__(self, max_sessions: int, queue_timeout: float = 0.0):
+        self.max_sessions = max(1, max_sessions)
+        self.queue_timeout = max(0.0, queue_timeout)
+        self._active: Set[str] = set()
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self.rejected_count = 0
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, task_id: str) -> bool:
+        """为会话申请名额，成功返回 True；task_id 已持有或正在等待名额时拒绝"""
+        if task_id in self._active or any(waiter_id == task_id for waiter_id, _ in self._waiters):
+            self.rejected_count += 1
+            logger.warning(f"Admission rejected for task {task_id}: task_id is already active")
+            return False
+        if len(self._active) < self.max_sessions and not self._waiters:
+            self._active.add(task_id)
+            return True
+        if self.queue_timeout <= 0:
+            self.rejected_count += 1
+            logger.warning(f"Admission rejected for task {task_id}: {len(self._active)}/{self.max_sessions} sessions active")
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (task_id, future)
+        self._waiters.append(entry)
+        logger.info(f"Task {task_id} queued for admission, queue length: {len(self._waiters)}")
+        try:
+            return await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_count += 1
+            logger.warning(f"Admission timed out for task {task_id} after {self.queue_timeout}s")
+            return False
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+
+    def release(self, task_id: str):
+        """释放会话名额，并移交给排队中的下一个会话"""
+        if task_id not in self._active:
+            return
+        self._active.discard(task_id)
+        while self._waiters and len(self._active) < self.max_sessions:
+            waiter_id, future = self._waiters.popleft()
+            if not future.done():
+                self._active.add(waiter_id)
+                future.set_result(True)
@@ -1,8 +1,13 @@
 import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from enum import Enum
 
+import numpy as np
+
+from .admission import AdmissionController
+from ..monitoring.metrics import SESSIONS_ACTIVE, SESSIONS_STARTED, SESSIONS_REJECTED, SESSION_RTF, SESSION_CACHE_BYTES
+
 
 class SessionStateEnum(Enum):
     IDLE = "idle"
@@ -15,30 +20,104 @@ logger = logging.getLogger(__name__)
 
 class SessionState:
     
-    def __init__(self, task_id: str, sample_rate: int = 16000, punctuation_enabled: bool = True, response_mode: str = "balanced"):
+    def __init__(self, task_id: str, sample_rate: int = 16000, punctuation_enabled: bool = True, response_mode: str = "balanced", audio_format: str = "pcm"):
         self.task_id = task_id
         self.state = SessionStateEnum.IDLE
         self.sample_rate = sample_rate
+        self.audio_format = audio_format
         self.punctuation_enabled = punctuation_enabled
         self.response_mode = response_mode
         self.cache = {}
         self.last_text = ""
         self.last_timestamp = []
+        # 当前句子已识别的文本（各次识别的增量拼接而成），句末结果后清空
+        self.sentence_text = ""
         self.start_time: Optional[float] = None
         self.end_time: Optional[float] = None
+        # 收到结束指令的时间，用于统计结束到最终结果的延迟
+        self.stop_time: Optional[float] = None
         self.total_duration_ms = 0
+        # 已结束的句子数（SentenceEnd 序号从 1 开始）与识别出新文本的次数
         self.sentence_count = 0
+        self.result_count = 0
+        self.last_activity = time.time()
+        # 推理实时率统计：已处理音频时长与推理耗时（毫秒）
+        self.audio_ms_processed = 0.0
+        self.inference_ms = 0.0
+        self.dropped_frames = 0
+        # 流式 cache 内存统计（张量字节数）
+        self.cache_bytes = 0
+        self.peak_cache_bytes = 0
+        self.cache_compactions = 0
+        # cache 超过单会话上限后等待在下一个句末压缩
+        self.cache_compaction_pending = False
+        # 流式 VAD 闸门（未启用 VAD 时为 None）
+        self.vad_gate = None
+        # 两遍识别：当前句子已送入流式模型的音频；以及等待后处理（两遍识别、标点）的 SentenceEnd 任务
+        self.sentence_audio: List[np.ndarray] = []
+        self.sentence_samples = 0
+        self.sentence_overflow = False
+        self.sentence_tasks: set = set()
+        # SentenceEnd 按句子顺序发出：最近一个句末任务，以及等待它发出后再发送的下一句中间结果（句子序号, 文本）
+        self.last_sentence_task = None
+        self.held_partial: Optional[Tuple[int, str]] = None
     
     def start(self):
         self.state = SessionStateEnum.RUNNING
         self.start_time = time.time()
+        self.last_activity = self.start_time
         logger.info(f"Session started: {self.task_id}, sample_rate={self.sample_rate}, punctuation_enabled={self.punctuation_enabled}, response_mode={self.response_mode}")
     
     def finish(self):
         self.state = SessionStateEnum.FINISHED
         self.end_time = time.time()
         duration = self.get_duration_ms()
-        logger.info(f"Session finished: {self.task_id}, total_duration={duration}ms, sentences_processed={self.sentence_count}")
+        if self.audio_ms_processed > 0:
+            SESSION_RTF.labels(self.response_mode).observe(self.get_rtf())
+        logger.info(f"Session finished: {self.task_id}, total_duration={duration}ms, sentences_processed={self.sentence_count}, "
+                    f"rtf={self.get_rtf():.3f}, dropped_frames={self.dropped_frames}, "
+                    f"peak_cache_bytes={self.peak_cache_bytes}, cache_compactions={self.cache_compactions}")
+    
+    def touch(self):
+        """记录会话活动（收到音频），用于空闲超时判断"""
+        self.last_activity = time.time()
+    
+    def idle_seconds(self) -> float:
+        return time.time() - self.last_activity
+    
+    def record_inference(self, audio_ms: float, inference_ms: float):
+        self.audio_ms_processed += audio_ms
+        self.inference_ms += inference_ms
+    
+    def record_cache_bytes(self, nbytes: int):
+        self.cache_bytes = nbytes
+        self.peak_cache_bytes = max(self.peak_cache_bytes, nbytes)
+    
+    def append_sentence_audio(self, audio: np.ndarray, max_samples: int):
+        """累积当前句子的音频，超过 max_samples 后该句放弃第二遍识别"""
+        if self.sentence_overflow or len(audio) == 0:
+            return
+        if self.sentence_samples + len(audio) > max_samples:
+            self.sentence_overflow = True
+            self.sentence_audio = []
+            self.sentence_samples = 0
+            return
+        self.sentence_audio.append(audio)
+        self.sentence_samples += len(audio)
+    
+    def take_sentence_audio(self) -> np.ndarray:
+        """取出当前句子的完整音频并开始新的句子；句子过长被放弃时返回空数组"""
+        audio = np.concatenate(self.sentence_audio) if self.sentence_audio else np.zeros(0, dtype=np.float32)
+        self.sentence_audio = []
+        self.sentence_samples = 0
+        self.sentence_overflow = False
+        return audio
+    
+    def get_rtf(self) -> float:
+        """实时率（推理耗时 / 音频时长），大于 1 表示推理跟不上实时"""
+        if self.audio_ms_processed <= 0:
+            return 0.0
+        return self.inference_ms / self.audio_ms_processed
     
     def is_running(self) -> bool:
         return self.state == SessionStateEnum.RUNNING
@@ -46,11 +125,31 @@ class SessionState:
     def is_finished(self) -> bool:
         return self.state == SessionStateEnum.FINISHED
     
-    def update_result(self, text: str, timestamp: list):
-        if text != self.last_text:
-            self.last_text = text
+    def update_result(self, text: str, timestamp: list) -> str:
+        """追加一次识别新增的文本，返回当前句子的完整文本"""
+        if text:
+            self.sentence_text += text
+            self.last_text = self.sentence_text
             self.last_timestamp = timestamp
-            self.sentence_count += 1
+            self.result_count += 1
+        return self.sentence_text
+    
+    @property
+    def sentence_index(self) -> int:
+        """当前（未结束）句子的序号，从 1 开始"""
+        return self.sentence_count + 1
+    
+    def end_sentence(self, reserve_index: bool = False) -> Tuple[int, str]:
+        """结束当前句子，返回该句的序号与完整文本
+        
+        没有文本的句子不占用序号；reserve_index 为 True 时（后处理可能产生文本）仍然占用。
+        """
+        index = self.sentence_index
+        text = self.sentence_text
+        self.sentence_text = ""
+        if text or reserve_index:
+            self.sentence_count = index
+        return index, text
     
     def get_duration_ms(self) -> int:
         if self.start_time is None:
@@ -63,24 +162,63 @@ class SessionState:
         self.cache = {}
         self.last_text = ""
         self.last_timestamp = []
+        self.sentence_text = ""
         self.start_time = None
         self.end_time = None
+        self.stop_time = None
         self.total_duration_ms = 0
         self.sentence_count = 0
+        self.result_count = 0
+        self.last_sentence_task = None
+        self.held_partial = None
+        self.audio_ms_processed = 0.0
+        self.inference_ms = 0.0
+        self.dropped_frames = 0
+        self.cache_bytes = 0
+        self.peak_cache_bytes = 0
+        self.cache_compactions = 0
+        self.cache_compaction_pending = False
+        self.vad_gate = None
+        self.sentence_audio = []
+        self.sentence_samples = 0
+        self.sentence_overflow = False
+        self.sentence_tasks = set()
 
 
 class SessionManager:
     
-    def __init__(self):
+    def __init__(self, max_sessions: Optional[int] = None, admission_queue_timeout: float = 0.0,
+                 max_cache_bytes: int = 0):
         self.sessions: Dict[str, SessionState] = {}
+        # 单个会话流式 cache 的字节上限，0 表示不限制
+        self.max_cache_bytes = max_cache_bytes
+        self.total_cache_bytes = 0
+        # 设置 max_sessions 时启用准入控制，会话结束（remove_session）时自动释放名额
+        self.admission: Optional[AdmissionController] = None
+        if max_sessions:
+            self.admission = AdmissionController(max_sessions, admission_queue_timeout)
     
-    def create_session(self, task_id: str, sample_rate: int = 16000, punctuation_enabled: bool = True, response_mode: str = "balanced") -> SessionState:
+    async def acquire_slot(self, task_id: str) -> bool:
+        """为新会话申请准入名额，未启用准入控制时总是成功"""
+        if self.admission is None:
+            return True
+        admitted = await self.admission.acquire(task_id)
+        if not admitted:
+            SESSIONS_REJECTED.inc()
+        return admitted
+    
+    def create_session(self, task_id: str, sample_rate: int = 16000, punctuation_enabled: bool = True, response_mode: str = "balanced", audio_format: str = "pcm") -> SessionState:
         if task_id in self.sessions:
             logger.warning(f"Session {task_id} already exists, replacing. Previous session state: {self.sessions[task_id].state}")
         
-        session = SessionState(task_id, sample_rate, punctuation_enabled, response_mode)
+        previous = self.sessions.get(task_id)
+        if previous is not None:
+            self.total_cache_bytes -= previous.cache_bytes
+        session = SessionState(task_id, sample_rate, punctuation_enabled, response_mode, audio_format)
         self.sessions[task_id] = session
-        logger.info(f"Created new session: {task_id}, sample_rate={sample_rate}, punctuation_enabled={punctuation_enabled}, response_mode={response_mode}")
+        SESSIONS_ACTIVE.set(len(self.sessions))
+        SESSIONS_STARTED.labels(response_mode).inc()
+        logger.info(f"Created new session: {task_id}, format={audio_format}, sample_rate={sample_rate}, punctuation_enabled={punctuation_enabled}, response_mode={response_mode}")
         logger.info(f"Active sessions count: {len(self.sessions)}")
         return session
     
@@ -91,6 +229,11 @@ class SessionManager:
         if task_id in self.sessions:
             session = self.sessions[task_id]
             del self.sessions[task_id]
+            SESSIONS_ACTIVE.set(len(self.sessions))
+            self.total_cache_bytes -= session.cache_bytes
+            SESSION_CACHE_BYTES.set(self.total_cache_bytes)
+            if self.admission is not None:
+                self.admission.release(task_id)
             logger.info(f"Removed session: {task_id}, final_state={session.state.value}, total_duration={session.get_duration_ms()}ms")
             logger.info(f"Remaining active sessions count: {len(self.sessions)}")
             return True
@@ -98,6 +241,50 @@ class SessionManager:
             logger.warning(f"Attempted to remove non-existent session: {task_id}")
             return False
     
+    def update_cache_usage(self, session: SessionState, nbytes: int) -> bool:
+        """记录会话流式 cache 的当前占用
+        
+        Args:
+            session: 会话
+            nbytes: cache 中张量占用的字节数
+        
+        Returns:
+            是否超过单会话上限
+        """
+        if self.sessions.get(session.task_id) is session:
+            self.total_cache_bytes += nbytes - session.cache_bytes
+            SESSION_CACHE_BYTES.set(self.total_cache_bytes)
+        session.record_cache_bytes(nbytes)
+        return self.max_cache_bytes > 0 and nbytes > self.max_cache_bytes
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """会话与流式 cache 内存统计"""
+        return {
+            "sessions": len(self.sessions),
+            "active_sessions": sum(1 for session in self.sessions.values() if session.is_running()),
+            "cache_bytes_total": self.total_cache_bytes,
+            "cache_bytes_limit": self.max_cache_bytes,
+            "session_details": {
+                task_id: {
+                    "state": session.state.value,
+                    "response_mode": session.response_mode,
+                    "duration_ms": session.get_duration_ms(),
+                    "cache_bytes": session.cache_bytes,
+                    "peak_cache_bytes": session.peak_cache_bytes,
+                    "cache_compactions": session.cache_compactions,
+                }
+                for task_id, session in self.sessions.items()
+            },
+        }
+    
+    def get_idle_sessions(self, timeout: float) -> Dict[str, SessionState]:
+        """返回超过 timeout 秒未收到音频的运行中会话"""
+        return {
+            task_id: session
+            for task_id, session in self.sessions.items()
+            if session.is_running() and session.idle_seconds() >= timeout
+        }
+    
     def get_all_sessions(self) -> Dict[str, SessionState]:
         return self.sessions.copy()
     
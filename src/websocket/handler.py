@@ -1,15 +1,39 @@
 import logging
 import asyncio
+import time
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 import numpy as np
 
+from config import settings
 from ..protocol.parser import ProtocolParser
 from ..protocol.formatter import ProtocolFormatter
-from ..protocol.types import RunTaskCommand, FinishTaskCommand
+from ..protocol.fast_formatter import FastProtocolFormatter
+from ..protocol.commands import StartTranscription, StopTranscription, RunTask, FinishTask
 from ..audio.processor import AudioProcessor
-from ..asr.model import ASRModel
+from ..audio.frame_queue import AudioFrameQueue
+from ..audio.vad import EnergyVAD, FsmnVAD, StreamingVADGate
+from ..asr.backend import ASRBackend
+from ..asr.model import get_chunk_stride_samples
+from ..asr.executor import InferenceExecutor
+from ..asr.batching import BatchScheduler
+from ..asr.worker_pool import ModelWorkerPool, WorkerUnavailableError
+from ..asr.rescoring import SentenceRescorer
+from ..asr.punctuation import PunctuationService
 from ..state.session import SessionManager, SessionState
+from ..monitoring.metrics import (
+    AUDIO_FRAMES_RECEIVED,
+    AUDIO_FRAMES_DROPPED,
+    AUDIO_QUEUE_DEPTH,
+    BYTES_RECEIVED,
+    BYTES_SENT,
+    CHUNK_LATENCY_SECONDS,
+    FIRST_PARTIAL_SECONDS,
+    FINAL_LATENCY_SECONDS,
+    SESSION_CACHE_COMPACTIONS,
+    VAD_SKIPPED_SECONDS,
+    VAD_SPEECH_SEGMENTS,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -17,11 +41,36 @@ logger = logging.getLogger(__name__)
 
 class WebSocketHandler:
     
-    def __init__(self, asr_model: ASRModel, session_manager: SessionManager):
+    def __init__(
+        self,
+        asr_model: Optional[ASRBackend],
+        session_manager: SessionManager,
+        inference_executor: Optional[InferenceExecutor] = None,
+        batch_scheduler: Optional[BatchScheduler] = None,
+        worker_pool: Optional[ModelWorkerPool] = None,
+        vad_model: Optional[Any] = None,
+        rescorer: Optional[SentenceRescorer] = None,
+        punctuator: Optional[PunctuationService] = None
+    ):
         self.asr_model = asr_model
         self.session_manager = session_manager
+        # 模型推理统一提交到推理执行器，避免阻塞事件循环
+        self.inference_executor = inference_executor or InferenceExecutor()
+        # 启用微批调度时，流式音频块先汇集到调度器再批量推理
+        self.batch_scheduler = batch_scheduler
+        # 多进程模式下模型在推理进程中，会话按粘性路由，本进程不持有模型与 cache
+        self.worker_pool = worker_pool
+        # vad_backend 为 fsmn 时所有会话共享的 fsmn-vad 模型
+        self.vad_model = vad_model
+        # 启用两遍识别时，句末整句音频交给离线模型重新识别
+        self.rescorer = rescorer
+        # 启用标点服务时，请求了标点的会话在句末批量加标点
+        self.punctuator = punctuator
         self.parser = ProtocolParser()
-        self.formatter = ProtocolFormatter()
+        # 快速路径输出与 pydantic 序列化逐字节一致，省去模型构建与校验
+        self.formatter = FastProtocolFormatter() if settings.fast_serializer else ProtocolFormatter()
+        # 运行中会话对应的连接与协议，供空闲回收时通知并断开客户端
+        self._session_sockets: Dict[str, Tuple[WebSocket, str]] = {}
     
     async def handle_connection(self, websocket: WebSocket):
         await websocket.accept()
@@ -31,62 +80,97 @@ class WebSocketHandler:
         session: Optional[SessionState] = None
         audio_processor: Optional[AudioProcessor] = None
         protocol: str = "aliyun"  # 默认使用阿里云协议
+        # 接收循环与推理之间的有界队列及其消费任务
+        audio_queue: Optional[AudioFrameQueue] = None
+        audio_consumer: Optional[asyncio.Task] = None
         
         try:
             logger.info(f"Starting WebSocket message loop for client: {client_info}")
             while True:
                 message = await websocket.receive()
                 logger.debug(f"Received message from {client_info}: {list(message.keys())}")
+                if message.get("type") == "websocket.disconnect":
+                    logger.info(f"WebSocket disconnected: {client_info}, code: {message.get('code')}")
+                    break
                 
                 if "text" in message:
+                    BYTES_RECEIVED.labels("text").inc(len(message["text"].encode("utf-8")))
                     logger.debug(f"Processing text message: {message['text'][:100]}...")  # 只记录前100字符
-                    command = self.parser.parse_command(message["text"])
+                    command = self.parser.parse(message["text"])
                     logger.debug(f"Parsed command type: {type(command).__name__}")
                     
-                    if isinstance(command, RunTaskCommand):
+                    if isinstance(command, RunTask):
                         # 处理旧版run-task命令
                         logger.info(f"Handling legacy run-task command for client: {client_info}")
+                        self._cancel_audio_pipeline(audio_consumer)
+                        audio_queue, audio_consumer = None, None
+                        if session:
+                            # 上一个任务未结束就开始新任务：先释放上一个会话的准入名额、推理资源与连接映射
+                            logger.warning(f"New task on {client_info} while task {session.task_id} is still active, discarding it")
+                            self._discard_session(session)
+                            session, audio_processor = None, None
                         session = await self._handle_run_task(websocket, command)
                         if session:
-                            audio_processor = AudioProcessor(session.sample_rate)
-                            await websocket.send_text(self.formatter.create_task_started_event(
-                                command.header.task_id, 
+                            audio_processor = await self._create_audio_processor(websocket, session, protocol="legacy")
+                            if audio_processor is None:
+                                session = None
+                        if session:
+                            await self._send_text(websocket, self.formatter.create_task_started_event(
+                                command.task_id, 
                                 protocol="legacy"
                             ))
-                            logger.info(f"Sent task-started event for legacy protocol, task: {command.header.task_id}")
+                            logger.info(f"Sent task-started event for legacy protocol, task: {command.task_id}")
                             protocol = "legacy"
+                            audio_queue, audio_consumer = self._start_audio_pipeline(websocket, session, audio_processor, protocol)
                     
-                    elif isinstance(command, FinishTaskCommand):
+                    elif isinstance(command, FinishTask):
                         # 处理旧版finish-task命令
-                        logger.info(f"Handling legacy finish-task command for client: {client_info}, task: {command.header.task_id}")
+                        logger.info(f"Handling legacy finish-task command for client: {client_info}, task: {command.task_id}")
                         if session:
+                            session.stop_time = time.time()
+                            await self._drain_audio_pipeline(audio_queue, audio_consumer)
+                            audio_queue, audio_consumer = None, None
                             await self._handle_finish_task(websocket, command, session, audio_processor, protocol="legacy")
                             session = None
                             audio_processor = None
-                            logger.info(f"Legacy task completed, task: {command.header.task_id}")
+                            logger.info(f"Legacy task completed, task: {command.task_id}")
                         # 不跳出循环，继续等待客户端的下一条消息
                     
-                    elif isinstance(command, dict) and command.get("type") == "StartTranscription":
+                    elif isinstance(command, StartTranscription):
                         # 处理阿里云StartTranscription命令
-                        logger.info(f"Handling aliyun StartTranscription command for client: {client_info}, task: {command['task_id']}")
+                        logger.info(f"Handling aliyun StartTranscription command for client: {client_info}, task: {command.task_id}")
+                        self._cancel_audio_pipeline(audio_consumer)
+                        audio_queue, audio_consumer = None, None
+                        if session:
+                            # 上一个任务未结束就开始新任务：先释放上一个会话的准入名额、推理资源与连接映射
+                            logger.warning(f"New task on {client_info} while task {session.task_id} is still active, discarding it")
+                            self._discard_session(session)
+                            session, audio_processor = None, None
                         session = await self._handle_start_transcription(websocket, command)
                         if session:
-                            audio_processor = AudioProcessor(session.sample_rate)
-                            await websocket.send_text(self.formatter.create_task_started_event(
-                                command["task_id"], 
+                            audio_processor = await self._create_audio_processor(websocket, session, protocol="aliyun")
+                            if audio_processor is None:
+                                session = None
+                        if session:
+                            await self._send_text(websocket, self.formatter.create_task_started_event(
+                                command.task_id, 
                                 protocol="aliyun"
                             ))
-                            logger.info(f"Sent TranscriptionStarted event for aliyun protocol, task: {command['task_id']}")
+                            logger.info(f"Sent TranscriptionStarted event for aliyun protocol, task: {command.task_id}")
                             protocol = "aliyun"
+                            audio_queue, audio_consumer = self._start_audio_pipeline(websocket, session, audio_processor, protocol)
                     
-                    elif isinstance(command, dict) and command.get("type") == "StopTranscription":
+                    elif isinstance(command, StopTranscription):
                         # 处理阿里云StopTranscription命令
-                        logger.info(f"Handling aliyun StopTranscription command for client: {client_info}, task: {command['task_id']}")
+                        logger.info(f"Handling aliyun StopTranscription command for client: {client_info}, task: {command.task_id}")
                         if session:
+                            session.stop_time = time.time()
+                            await self._drain_audio_pipeline(audio_queue, audio_consumer)
+                            audio_queue, audio_consumer = None, None
                             await self._handle_stop_transcription(websocket, command, session, audio_processor, protocol="aliyun")
                             session = None
                             audio_processor = None
-                            logger.info(f"Aliyun transcription stopped, task: {command['task_id']}")
+                            logger.info(f"Aliyun transcription stopped, task: {command.task_id}")
                         # 不主动关闭WebSocket连接，让客户端决定何时关闭
                         # 不跳出循环，继续等待客户端的下一条消息
                     
@@ -94,9 +178,17 @@ class WebSocketHandler:
                         logger.warning(f"Unknown command type from {client_info}: {type(command)}, command: {command}")
                 
                 elif "bytes" in message:
-                    if session and audio_processor:
-                        logger.debug(f"Processing audio data: {len(message['bytes'])} bytes for task: {session.task_id}")
-                        await self.handle_audio_data(websocket, message["bytes"], session, audio_processor, protocol)
+                    AUDIO_FRAMES_RECEIVED.labels(protocol).inc()
+                    BYTES_RECEIVED.labels("audio").inc(len(message["bytes"]))
+                    if session and audio_queue:
+                        AUDIO_QUEUE_DEPTH.observe(audio_queue.qsize())
+                        logger.debug(f"Queueing audio data: {len(message['bytes'])} bytes for task: {session.task_id}, queue size: {audio_queue.qsize()}")
+                        if not await audio_queue.put(message["bytes"]) and audio_queue.policy == "drop":
+                            AUDIO_FRAMES_DROPPED.inc()
+                            session.dropped_frames = audio_queue.dropped_frames
+                            if session.dropped_frames == 1 or session.dropped_frames % 50 == 0:
+                                logger.warning(f"Inference falling behind for task {session.task_id}: "
+                                               f"dropped {session.dropped_frames} audio frames, rtf={session.get_rtf():.2f}")
                     else:
                         logger.warning(f"Ignoring audio data from {client_info}: no active session")
         
@@ -110,52 +202,232 @@ class WebSocketHandler:
         except Exception as e:
             logger.error(f"WebSocket error for {client_info}: {e}", exc_info=True)
         finally:
+            self._cancel_audio_pipeline(audio_consumer)
             if session:
-                task_id = session.task_id
-                logger.info(f"Cleaning up session for {client_info}, task: {task_id}")
-                self.session_manager.remove_session(task_id)
+                logger.info(f"Cleaning up session for {client_info}, task: {session.task_id}")
+                self._discard_session(session)
             logger.info(f"WebSocket connection closed for {client_info}")
     
-    async def _handle_run_task(self, websocket: WebSocket, command: RunTaskCommand) -> Optional[SessionState]:
-        task_id = command.header.task_id
-        parameters = command.payload.parameters
+    async def _send_text(self, websocket: WebSocket, text: str):
+        BYTES_SENT.inc(len(text.encode("utf-8")))
+        await websocket.send_text(text)
+    
+    def _observe_final_latency(self, session: SessionState):
+        """记录 stop-to-final 延迟：从收到结束指令到最终结果发出"""
+        if session.stop_time is not None:
+            latency = time.time() - session.stop_time
+            FINAL_LATENCY_SECONDS.labels(session.response_mode).observe(latency)
+            logger.info(f"Stop-to-final latency for task {session.task_id}: {latency * 1000:.1f}ms")
+    
+    def _start_audio_pipeline(
+        self,
+        websocket: WebSocket,
+        session: SessionState,
+        audio_processor: AudioProcessor,
+        protocol: str
+    ) -> Tuple[AudioFrameQueue, asyncio.Task]:
+        audio_queue = AudioFrameQueue(settings.audio_queue_size, settings.audio_queue_policy)
+        consumer = asyncio.create_task(
+            self._consume_audio(websocket, audio_queue, session, audio_processor, protocol)
+        )
+        return audio_queue, consumer
+    
+    async def _consume_audio(
+        self,
+        websocket: WebSocket,
+        audio_queue: AudioFrameQueue,
+        session: SessionState,
+        audio_processor: AudioProcessor,
+        protocol: str
+    ):
+        """会话的音频消费任务：从队列取帧并执行推理，直到队列关闭且取空"""
+        try:
+            while True:
+                frames = await audio_queue.get()
+                if frames is None:
+                    break
+                if len(frames) == 1:
+                    await self.handle_audio_data(websocket, frames[0], session, audio_processor, protocol)
+                    continue
+                # 合并过的多帧先全部写入缓冲区，再一次性推理积压的音频
+                if not session.is_running():
+                    continue
+                session.touch()
+                for frame in frames:
+                    audio_processor.add_audio(frame)
+                await self._process_buffered_audio(websocket, session, audio_processor, protocol)
+        except asyncio.CancelledError:
+            raise
+        except BufferError as e:
+            # audio_buffer_overflow=error：缓冲区溢出时不静默丢弃音频，以协议错误结束会话
+            logger.warning(f"Audio buffer overflow for task {session.task_id}: {e}")
+            await audio_queue.close()
+            await self._fail_session(websocket, session, protocol, "AUDIO_BUFFER_OVERFLOW", str(e), 40000000)
+        except WorkerUnavailableError as e:
+            # 推理进程退出后会话 cache 已丢失，无法继续识别：以错误结束会话
+            logger.error(f"Audio consumer for task {session.task_id} lost its inference worker: {e}")
+            await audio_queue.close()
+            await self._fail_session(websocket, session, protocol, "MODEL_UNAVAILABLE", str(e), 50000000)
+        except Exception as e:
+            logger.error(f"Audio consumer error for task {session.task_id}: {e}", exc_info=True)
+            # 关闭队列，避免接收循环在已退出的消费者上阻塞
+            await audio_queue.close()
+    
+    async def _drain_audio_pipeline(self, audio_queue: Optional[AudioFrameQueue], consumer: Optional[asyncio.Task]):
+        """关闭队列并等待已入队的音频全部处理完成，保证结束指令在音频之后执行"""
+        if audio_queue is None or consumer is None:
+            return
+        await audio_queue.close()
+        await consumer
+    
+    def _cancel_audio_pipeline(self, consumer: Optional[asyncio.Task]):
+        if consumer is not None and not consumer.done():
+            consumer.cancel()
+    
+    async def _create_audio_processor(self, websocket: WebSocket, session: SessionState, protocol: str) -> Optional[AudioProcessor]:
+        """创建会话的音频管线；音频格式或采样率无效时返回任务失败事件并放弃会话"""
+        try:
+            return AudioProcessor(
+                session.sample_rate,
+                buffer_seconds=settings.audio_buffer_seconds,
+                overflow=settings.audio_buffer_overflow,
+                buffer_dtype=settings.audio_buffer_dtype,
+                target_sample_rate=settings.model_sample_rate,
+                audio_format=session.audio_format
+            )
+        except ValueError as e:
+            # 不支持的音频格式或采样率，放弃本次会话
+            logger.warning(f"Cannot create audio pipeline for task {session.task_id}: {e}")
+            session.finish()
+            self.session_manager.remove_session(session.task_id)
+            self._release_session(session.task_id)
+            await self._send_text(websocket, self.formatter.create_task_failed_event(
+                session.task_id,
+                error_code="INVALID_PARAMETER",
+                error_message=str(e),
+                status=40000003,
+                protocol=protocol
+            ))
+            return None
+    
+    async def _admit(self, websocket: WebSocket, task_id: str, protocol: str) -> bool:
+        """准入控制：task_id 已被进行中的会话使用或推理容量已满时，返回任务失败事件并拒绝会话"""
+        if self.session_manager.get_session(task_id) is not None:
+            # 替换进行中的同名会话会让两个连接互相释放对方的名额与推理状态
+            logger.warning(f"Rejecting task {task_id}: task_id is already in use by an active session")
+            await self._send_text(websocket, self.formatter.create_task_failed_event(
+                task_id,
+                error_code="DUPLICATE_TASK_ID",
+                error_message=f"Task {task_id} is already running.",
+                status=40000003,
+                protocol=protocol
+            ))
+            return False
+        if await self.session_manager.acquire_slot(task_id):
+            return True
+        await self._send_text(websocket, self.formatter.create_task_failed_event(
+            task_id,
+            error_code="TOO_MANY_REQUESTS",
+            error_message="Too many concurrent sessions, please retry later.",
+            status=40000005,
+            protocol=protocol
+        ))
+        return False
+    
+    async def reap_idle_sessions(self, timeout: float) -> int:
+        """关闭超过 timeout 秒未收到音频的会话，释放其 FunASR cache，返回回收数量"""
+        idle_sessions = self.session_manager.get_idle_sessions(timeout)
+        for task_id, session in idle_sessions.items():
+            logger.warning(f"Reaping idle session {task_id}: no audio for {session.idle_seconds():.0f}s")
+            websocket, protocol = self._session_sockets.get(task_id, (None, "aliyun"))
+            await self._fail_session(websocket, session, protocol, "IDLE_TIMEOUT",
+                                     f"Session is idle for more than {timeout:.0f} seconds.", 40000004,
+                                     close_code=1000, close_reason="idle timeout")
+        return len(idle_sessions)
+    
+    async def _fail_session(self, websocket: Optional[WebSocket], session: SessionState, protocol: str,
+                            error_code: str, error_message: str, status: int,
+                            close_code: int = 1011, close_reason: str = ""):
+        """以错误结束会话：释放会话与推理侧资源，发送失败事件并关闭连接"""
+        task_id = session.task_id
+        session.finish()
+        session.cache = {}
+        if self.session_manager.get_session(task_id) is session:
+            self.session_manager.remove_session(task_id)
+            self._release_session(task_id)
+        if websocket is None:
+            return
+        try:
+            await self._send_text(websocket, self.formatter.create_task_failed_event(
+                task_id,
+                error_code=error_code,
+                error_message=error_message,
+                status=status,
+                protocol=protocol
+            ))
+            await websocket.close(code=close_code, reason=close_reason or error_code.lower())
+        except Exception as e:
+            logger.debug(f"Failed to notify failed session {task_id}: {e}")
+    
+    async def run_idle_reaper(self, timeout: float, interval: float = 10.0):
+        """后台空闲会话回收循环"""
+        logger.info(f"Idle session reaper started: timeout={timeout}s, interval={interval}s")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap_idle_sessions(timeout)
+            except Exception as e:
+                logger.error(f"Idle session reaper error: {e}", exc_info=True)
+    
+    async def _handle_run_task(self, websocket: WebSocket, command: RunTask) -> Optional[SessionState]:
+        task_id = command.task_id
         
         if not self.parser.validate_task_id(task_id):
             logger.warning(f"Invalid task_id: {task_id}")
             return None
         
+        if not await self._admit(websocket, task_id, protocol="legacy"):
+            return None
+        
         session = self.session_manager.create_session(
             task_id,
-            sample_rate=parameters.sample_rate,
-            punctuation_enabled=parameters.punctuation_prediction_enabled,
-            response_mode=parameters.response_mode
+            sample_rate=command.sample_rate,
+            punctuation_enabled=command.punctuation_prediction_enabled,
+            response_mode=command.response_mode,
+            audio_format=command.audio_format
         )
         session.start()
+        session.vad_gate = self._create_vad_gate(settings.max_sentence_silence)
+        self._session_sockets[task_id] = (websocket, "legacy")
         
-        logger.info(f"Task started: {task_id}, punctuation_enabled={parameters.punctuation_prediction_enabled}, response_mode={parameters.response_mode}")
+        logger.info(f"Task started: {task_id}, punctuation_enabled={command.punctuation_prediction_enabled}, response_mode={command.response_mode}")
         
         return session
     
-    async def _handle_start_transcription(self, websocket: WebSocket, command: dict) -> Optional[SessionState]:
-        task_id = command["task_id"]
-        payload = command.get("payload", {})
+    async def _handle_start_transcription(self, websocket: WebSocket, command: StartTranscription) -> Optional[SessionState]:
+        task_id = command.task_id
         
         logger.info(f"Processing StartTranscription command for task: {task_id}")
-        logger.info(f"Request payload: {payload}")
+        logger.info(f"Request payload: {command.payload}")
         
         if not self.parser.validate_task_id(task_id):
             logger.warning(f"Invalid task_id: {task_id}")
             return None
         
-        sample_rate = payload.get("sample_rate", 16000)
-        enable_punctuation_prediction = payload.get("enable_punctuation_prediction", False)
-        enable_inverse_text_normalization = payload.get("enable_inverse_text_normalization", False)
-        enable_disfluency_removal = payload.get("enable_disfluency_removal", False)
-        max_sentence_silence = payload.get("max_sentence_silence", 200)
-        enable_semantic_sentence_detection = payload.get("enable_semantic_sentence_detection", False)
-        response_mode = payload.get("response_mode", "fast")  # 默认使用fast模式以获得最快响应
+        if not await self._admit(websocket, task_id, protocol="aliyun"):
+            return None
+        
+        sample_rate = command.sample_rate
+        audio_format = command.audio_format
+        enable_punctuation_prediction = command.enable_punctuation_prediction
+        enable_inverse_text_normalization = command.enable_inverse_text_normalization
+        enable_disfluency_removal = command.enable_disfluency_removal
+        max_sentence_silence = command.max_sentence_silence
+        enable_semantic_sentence_detection = command.enable_semantic_sentence_detection
+        response_mode = command.response_mode  # 默认使用fast模式以获得最快响应
         
         logger.info(f"Creating session with parameters: "
+                   f"format={audio_format}, "
                    f"sample_rate={sample_rate}, "
                    f"punctuation_enabled={enable_punctuation_prediction}, "
                    f"inverse_text_normalization_enabled={enable_inverse_text_normalization}, "
@@ -168,90 +440,170 @@ class WebSocketHandler:
             task_id,
             sample_rate=sample_rate,
             punctuation_enabled=enable_punctuation_prediction,
-            response_mode=response_mode
+            response_mode=response_mode,
+            audio_format=audio_format
         )
         session.start()
+        session.vad_gate = self._create_vad_gate(max_sentence_silence)
+        self._session_sockets[task_id] = (websocket, "aliyun")
         
         logger.info(f"Transcription started successfully: {task_id}")
         
         return session
     
+    def _create_vad_gate(self, end_silence_ms: int) -> Optional[StreamingVADGate]:
+        """按配置为会话创建流式 VAD 闸门，连续静音达到 end_silence_ms 时判定句子结束"""
+        if not settings.vad_enabled:
+            return None
+        if self.vad_model is not None:
+            detector = FsmnVAD(self.vad_model, settings.model_sample_rate)
+        else:
+            detector = EnergyVAD(
+                settings.model_sample_rate,
+                threshold_db=settings.vad_energy_threshold_db,
+                noise_margin_db=settings.vad_noise_margin_db
+            )
+        return StreamingVADGate(
+            detector,
+            settings.model_sample_rate,
+            pre_speech_ms=settings.vad_pre_speech_ms,
+            end_silence_ms=end_silence_ms
+        )
+    
     async def _handle_finish_task(
         self, 
         websocket: WebSocket, 
-        command: FinishTaskCommand, 
+        command: FinishTask, 
         session: SessionState,
         audio_processor: Optional[AudioProcessor],
         protocol: str = "legacy"
     ):
-        task_id = command.header.task_id
+        task_id = command.task_id
         
         if session is None:
             logger.warning(f"No session found for task: {task_id}")
             return
         
-        session.finish()
-        
-        # 先发送task-finished事件，符合阿里云规范，确保客户端能立即收到停止响应
-        await websocket.send_text(self.formatter.create_task_finished_event(task_id, protocol=protocol))
-        
-        # 然后异步处理最终的音频数据和结果
-        async def process_final_audio():
-            if audio_processor:
-                audio_data = audio_processor.get_buffered_audio()
-                if len(audio_data) > 0:
-                    try:
-                        result = self.asr_model.finalize(session.cache)
-                        if result["text"]:
-                            # 注意：按照阿里云规范，任务结束后不应该再发送结果事件
-                            # 这里我们只记录日志，不发送额外的结果
-                            logger.info(f"Final result for task {task_id}: {result['text']}")
-                    except Exception as e:
-                        logger.error(f"Error processing final audio: {e}")
-            
-            self.session_manager.remove_session(task_id)
-            logger.info(f"Task finished: {task_id}")
-        
-        # 异步执行，不阻塞WebSocket连接
-        asyncio.create_task(process_final_audio())
+        await self._complete_session(websocket, session, audio_processor, protocol)
+        logger.info(f"Task finished: {task_id}")
     
     async def _handle_stop_transcription(
         self, 
         websocket: WebSocket, 
-        command: dict, 
+        command: StopTranscription, 
         session: SessionState,
         audio_processor: Optional[AudioProcessor],
         protocol: str = "aliyun"
     ):
-        task_id = command["task_id"]
+        task_id = command.task_id
         
         if session is None:
             logger.warning(f"No session found for task: {task_id}")
             return
         
+        await self._complete_session(websocket, session, audio_processor, protocol)
+        logger.info(f"Transcription stopped: {task_id}")
+    
+    async def _complete_session(
+        self,
+        websocket: WebSocket,
+        session: SessionState,
+        audio_processor: Optional[AudioProcessor],
+        protocol: str
+    ):
+        """结束会话：先解码剩余音频并发送最终句子结果，再发送结束事件并释放会话资源
+        
+        按照阿里云规范，TranscriptionCompleted / task-finished 之后不再发送结果事件，
+        因此最终结果必须在结束事件之前发出。
+        """
+        task_id = session.task_id
+        await self._flush_final_result(websocket, session, audio_processor, protocol)
         session.finish()
+        await self._send_text(websocket, self.formatter.create_task_finished_event(task_id, protocol=protocol))
+        self.session_manager.remove_session(task_id)
+        self._release_session(task_id)
+    
+    async def _flush_final_result(
+        self,
+        websocket: WebSocket,
+        session: SessionState,
+        audio_processor: Optional[AudioProcessor],
+        protocol: str
+    ):
+        """以 is_final=True 解码缓冲区中剩余的音频，发送最终的句子结果
         
-        # 先发送TranscriptionCompleted事件，符合阿里云规范，确保客户端能立即收到停止响应
-        await websocket.send_text(self.formatter.create_task_finished_event(task_id, protocol=protocol))
+        解码经由推理执行器/推理进程执行，不阻塞事件循环，并与该会话之前的推理任务串行；
+        从收到结束指令到最终结果发出的耗时记为 stop-to-final 延迟。
+        """
+        tail = audio_processor.get_buffered_audio() if audio_processor else np.zeros(0, dtype=np.float32)
+        pending = True
+        gate = session.vad_gate
+        if gate is not None:
+            in_speech = gate.in_speech
+            if len(tail) > 0:
+                tail, _ = await self._apply_vad(session, tail)
+            # 静音期间模型中没有未完成的句子，尾部也没有语音时无需最终解码
+            pending = in_speech or len(tail) > 0
         
-        # 立即删除会话，避免后续访问
-        self.session_manager.remove_session(task_id)
-        logger.info(f"Transcription stopped: {task_id}")
+        if pending:
+            try:
+                tail = tail.astype(np.float32, copy=False)
+                self._collect_sentence_audio(session, tail)
+                started = time.perf_counter()
+                result = await self._recognize(session, tail, is_final=True)
+                session.record_inference(len(tail) * 1000 / settings.model_sample_rate, (time.perf_counter() - started) * 1000)
+                await self._emit_result(websocket, session, result, True, protocol)
+            except Exception as e:
+                logger.error(f"Error decoding final audio for task {session.task_id}: {e}", exc_info=True)
         
-        # 同步处理最终的音频数据和结果，避免异步任务导致的阻塞
-        if audio_processor:
-            audio_data = audio_processor.get_buffered_audio()
-            if len(audio_data) > 0:
-                try:
-                    result = self.asr_model.finalize(session.cache)
-                    if result["text"]:
-                        # 注意：按照阿里云规范，任务结束后不应该再发送结果事件
-                        # 这里我们只记录日志，不发送额外的结果
-                        logger.info(f"Final result for task {task_id}: {result['text']}")
-                except Exception as e:
-                    logger.error(f"Error processing final audio: {e}")
-        
-        logger.info(f"Final audio processing completed for task {task_id}")
+        # 经过后处理的 SentenceEnd 都要在结束事件之前发出
+        await self._wait_sentence_tasks(session)
+        self._observe_final_latency(session)
+    
+    async def _recognize(self, session: SessionState, chunk_audio: np.ndarray, is_final: bool = False) -> dict:
+        """按部署模式分发流式识别：多进程推理池 > 微批调度器 > 推理线程池"""
+        if self.worker_pool:
+            return await self.worker_pool.recognize(
+                session.task_id,
+                chunk_audio,
+                is_final=is_final,
+                enable_punctuation=session.punctuation_enabled,
+                response_mode=session.response_mode
+            )
+        if self.batch_scheduler:
+            return await self.batch_scheduler.submit(
+                session.task_id,
+                chunk_audio,
+                session.cache,
+                is_final=is_final,
+                enable_punctuation=session.punctuation_enabled,
+                response_mode=session.response_mode
+            )
+        return await self.inference_executor.submit(
+            session.task_id,
+            self.asr_model.recognize,
+            chunk_audio,
+            session.cache,
+            is_final=is_final,
+            enable_punctuation=session.punctuation_enabled,
+            response_mode=session.response_mode
+        )
+    
+    def _discard_session(self, session: SessionState):
+        """放弃未正常结束的会话：取消句末后处理任务，从会话管理器移除并释放推理侧资源"""
+        for task in list(session.sentence_tasks):
+            task.cancel()
+        session.finish()
+        if self.session_manager.get_session(session.task_id) is session:
+            self.session_manager.remove_session(session.task_id)
+            self._release_session(session.task_id)
+    
+    def _release_session(self, task_id: str):
+        """会话结束后释放推理侧资源（cache、会话锁、进程路由）"""
+        self._session_sockets.pop(task_id, None)
+        if self.worker_pool:
+            self.worker_pool.release_session(task_id)
+        self.inference_executor.release_session(task_id)
     
     async def handle_audio_data(
         self, 
@@ -266,40 +618,219 @@ class WebSocketHandler:
             return
         
         logger.debug(f"Received audio data: {len(audio_data)} bytes for task {session.task_id}")
+        session.touch()
         audio_processor.add_audio(audio_data)
-        
+        await self._process_buffered_audio(websocket, session, audio_processor, protocol)
+    
+    async def _process_buffered_audio(
+        self,
+        websocket: WebSocket,
+        session: SessionState,
+        audio_processor: AudioProcessor,
+        protocol: str = "aliyun"
+    ):
         # 使用模型内置的 VAD 和智能缓冲
-        chunk_audio = audio_processor.get_chunk_audio()
+        # 出现积压时按模型步长一次取出全部完整块，减少模型调用次数并快速消化延迟尖峰
+        chunk_audio = audio_processor.get_chunk_audio(
+            stride=get_chunk_stride_samples(session.response_mode),
+            max_samples=int(audio_processor.target_sample_rate * settings.max_coalesce_ms / 1000)
+        )
         if len(chunk_audio) == 0:
             logger.debug(f"No audio chunk ready for processing, task: {session.task_id}")
             return
         
+        speech_end = False
+        if session.vad_gate is not None:
+            chunk_audio, speech_end = await self._apply_vad(session, chunk_audio)
+            if len(chunk_audio) == 0:
+                logger.debug(f"Skipping silent audio chunk for task: {session.task_id}")
+                return
+        
         logger.debug(f"Processing audio chunk: {len(chunk_audio)} samples for task: {session.task_id}")
-        result = self.asr_model.recognize(
-            chunk_audio, 
-            session.cache, 
-            is_final=False,
-            enable_punctuation=session.punctuation_enabled,
-            response_mode=session.response_mode
-        )
+        self._collect_sentence_audio(session, chunk_audio)
+        started = time.perf_counter()
+        result = await self._recognize(session, chunk_audio, is_final=speech_end)
+        elapsed = time.perf_counter() - started
+        CHUNK_LATENCY_SECONDS.labels(session.response_mode).observe(elapsed)
+        session.record_inference(len(chunk_audio) * 1000 / audio_processor.target_sample_rate, elapsed * 1000)
         
         logger.debug(f"Recognition result for task {session.task_id}: text='{result['text']}', is_final={result.get('is_final', False)}")
         
-        if result["text"] and result["text"] != session.last_text:
-            logger.info(f"New recognition result for task {session.task_id}: '{result['text']}' (is_final: {result.get('is_final', False)})")
-            session.update_result(result["text"], result["timestamp"])
-            
-            logger.debug(f"Sending result generated event for task: {session.task_id}")
-            await websocket.send_text(
-                self.formatter.create_result_generated_event(
-                    task_id=session.task_id,
-                    text=result["text"],
-                    begin_time=0,
-                    end_time=session.get_duration_ms(),
-                    sentence_end=result.get("is_final", False),
-                    is_final=result.get("is_final", False),
-                    protocol=protocol,
-                    sentence_index=session.sentence_count
-                )
+        await self._emit_result(websocket, session, result, result.get("is_final", False), protocol)
+        await self._update_cache_usage(websocket, session, result, protocol)
+    
+    async def _emit_result(self, websocket: WebSocket, session: SessionState, result: dict, sentence_end: bool, protocol: str):
+        """把一次识别的增量文本拼接到当前句子并发送
+        
+        中间结果发送当前句子的完整文本；句末结果结束该句，直接发送或交给后处理后发送 SentenceEnd。
+        前一句的 SentenceEnd 仍在后处理时，下一句的中间结果暂存，等它发出后再发送，客户端收到的事件保持句子顺序。
+        """
+        text = session.sentence_text
+        if result["text"]:
+            text = session.update_result(result["text"], result["timestamp"])
+            logger.info(f"New recognition result for task {session.task_id}: '{text}' (is_final: {sentence_end})")
+            if session.result_count == 1 and session.start_time is not None:
+                FIRST_PARTIAL_SECONDS.labels(session.response_mode).observe(time.time() - session.start_time)
+        
+        if sentence_end:
+            if self._defers_sentence_end(session):
+                # 两遍识别可能从流式结果为空的句子中识别出文本，为其保留序号
+                index, text = session.end_sentence(reserve_index=bool(self.rescorer) and session.sentence_samples > 0)
+                # 暂存的中间结果属于本句，由本句的 SentenceEnd 取代
+                session.held_partial = None
+                self._schedule_sentence_end(websocket, session, text, index, protocol)
+            else:
+                index, text = session.end_sentence()
+                if text:
+                    await self._send_result_event(websocket, session, text, protocol, sentence_end=True, sentence_index=index)
+        elif result["text"]:
+            if session.sentence_tasks:
+                session.held_partial = (session.sentence_index, text)
+            else:
+                await self._send_result_event(websocket, session, text, protocol)
+    
+    def _collect_sentence_audio(self, session: SessionState, audio: np.ndarray):
+        if self.rescorer:
+            session.append_sentence_audio(audio, settings.two_pass_max_sentence_seconds * settings.model_sample_rate)
+    
+    def _defers_sentence_end(self, session: SessionState) -> bool:
+        """句末结果是否需要后处理（两遍识别、标点）后再发送"""
+        return bool(self.rescorer or (self.punctuator and session.punctuation_enabled))
+    
+    def _schedule_sentence_end(self, websocket: WebSocket, session: SessionState, streaming_text: str,
+                               sentence_index: int, protocol: str):
+        """句末在后台完成后处理并发送 SentenceEnd：两遍识别替换整句文本，再按会话设置加标点
+        
+        在后台任务中等待，不阻塞该会话后续音频的流式识别；各句的后处理并发进行，
+        发送按句子顺序串行（每个任务等待前一句发出）。会话结束前等待所有未完成的任务。
+        """
+        task = asyncio.create_task(self._finish_sentence(
+            websocket, session, session.take_sentence_audio(), streaming_text, sentence_index, protocol,
+            session.last_sentence_task
+        ))
+        session.last_sentence_task = task
+        session.sentence_tasks.add(task)
+        task.add_done_callback(session.sentence_tasks.discard)
+    
+    async def _finish_sentence(self, websocket: WebSocket, session: SessionState, audio: np.ndarray,
+                               streaming_text: str, sentence_index: int, protocol: str,
+                               previous: Optional[asyncio.Task]):
+        text = await self._postprocess_sentence(session, audio, streaming_text, sentence_index)
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            if text:
+                await self._send_result_event(websocket, session, text, protocol, sentence_end=True, sentence_index=sentence_index)
+            # 最近一句已发出，补发期间暂存的下一句中间结果
+            if session.last_sentence_task is asyncio.current_task() and session.held_partial:
+                (index, partial), session.held_partial = session.held_partial, None
+                await self._send_result_event(websocket, session, partial, protocol, sentence_index=index)
+        except Exception as e:
+            logger.debug(f"Failed to send sentence end for task {session.task_id}: {e}")
+    
+    async def _postprocess_sentence(self, session: SessionState, audio: np.ndarray, streaming_text: str,
+                                    sentence_index: int) -> str:
+        """两遍识别与标点，超时或失败时退回流式识别的整句文本"""
+        text = streaming_text
+        if self.rescorer and len(audio) > 0:
+            started = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(self.rescorer.rescore(audio), settings.two_pass_timeout_ms / 1000)
+                logger.info(f"Rescored sentence {sentence_index} for task {session.task_id} in "
+                            f"{(time.perf_counter() - started) * 1000:.1f}ms: '{streaming_text}' -> '{text}'")
+            except asyncio.TimeoutError:
+                logger.warning(f"Rescoring timed out for task {session.task_id}, sending streaming result")
+            except Exception as e:
+                logger.error(f"Rescoring failed for task {session.task_id}: {e}, sending streaming result")
+        if not text:
+            return text
+        if self.punctuator and session.punctuation_enabled:
+            try:
+                text = await asyncio.wait_for(self.punctuator.punctuate(text), settings.punctuation_timeout_ms / 1000)
+            except asyncio.TimeoutError:
+                logger.warning(f"Punctuation timed out for task {session.task_id}, sending unpunctuated text")
+            except Exception as e:
+                logger.error(f"Punctuation failed for task {session.task_id}: {e}, sending unpunctuated text")
+        return text
+    
+    async def _wait_sentence_tasks(self, session: SessionState):
+        if session.sentence_tasks:
+            await asyncio.gather(*list(session.sentence_tasks), return_exceptions=True)
+    
+    async def _send_result_event(self, websocket: WebSocket, session: SessionState, text: str, protocol: str,
+                                 sentence_end: bool = False, sentence_index: Optional[int] = None):
+        logger.debug(f"Sending result generated event for task: {session.task_id}")
+        await self._send_text(
+            websocket,
+            self.formatter.create_result_generated_event(
+                task_id=session.task_id,
+                text=text,
+                begin_time=0,
+                end_time=session.get_duration_ms(),
+                sentence_end=sentence_end,
+                is_final=sentence_end,
+                protocol=protocol,
+                sentence_index=sentence_index if sentence_index is not None else session.sentence_index
             )
-            logger.debug(f"Sent result generated event for task: {session.task_id}")
+        )
+    
+    async def _apply_vad(self, session: SessionState, chunk_audio: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """经过会话的 VAD 闸门，返回需要推理的音频以及是否检测到语音结束"""
+        gate = session.vad_gate
+        skipped = gate.skipped_samples
+        segments = gate.speech_segments
+        if gate.offload:
+            # 模型类检测器在推理执行器中运行，与该会话的推理任务串行
+            chunk_audio, speech_end = await self.inference_executor.submit(session.task_id, gate.process, chunk_audio)
+        else:
+            chunk_audio, speech_end = gate.process(chunk_audio)
+        if gate.skipped_samples > skipped:
+            VAD_SKIPPED_SECONDS.inc((gate.skipped_samples - skipped) / gate.sample_rate)
+        if gate.speech_segments > segments:
+            VAD_SPEECH_SEGMENTS.inc()
+        if speech_end:
+            logger.debug(f"VAD detected end of speech for task: {session.task_id}")
+        return chunk_audio, speech_end
+    
+    async def _update_cache_usage(self, websocket: WebSocket, session: SessionState, result: dict, protocol: str):
+        """统计会话流式 cache 占用，只在句子边界（is_final 结果）压缩
+        
+        句中清空 cache 会丢失尚未输出的文本，超过单会话上限时先标记，等到下一个句末再压缩；
+        没有 VAD 断句时句末可能迟迟不来，超过两倍上限时先以 is_final 解码结束当前句子再压缩。
+        """
+        if self.worker_pool:
+            nbytes = result.get("cache_bytes", 0)
+        else:
+            nbytes = self.asr_model.cache_nbytes(session.cache)
+        over_limit = self.session_manager.update_cache_usage(session, nbytes)
+        if result.get("is_final", False):
+            if session.cache_compaction_pending:
+                session.cache_compaction_pending = False
+                await self._compact_cache(session, "limit")
+            elif settings.cache_compaction_enabled:
+                await self._compact_cache(session, "sentence_end")
+            return
+        if not over_limit:
+            return
+        if not session.cache_compaction_pending:
+            session.cache_compaction_pending = True
+            logger.warning(f"Streaming cache of task {session.task_id} exceeds limit: {nbytes} bytes, compacting at next sentence end")
+        if nbytes > 2 * self.session_manager.max_cache_bytes:
+            logger.warning(f"Streaming cache of task {session.task_id} reached {nbytes} bytes without a sentence end, "
+                           f"forcing one before compacting")
+            result = await self._recognize(session, np.zeros(0, dtype=np.float32), is_final=True)
+            await self._emit_result(websocket, session, result, True, protocol)
+            session.cache_compaction_pending = False
+            await self._compact_cache(session, "limit")
+    
+    async def _compact_cache(self, session: SessionState, reason: str):
+        """在推理侧压缩会话 cache，与该会话的推理任务串行"""
+        if self.worker_pool:
+            nbytes = await self.worker_pool.compact_cache(session.task_id)
+        else:
+            await self.inference_executor.submit(session.task_id, self.asr_model.compact_cache, session.cache)
+            nbytes = self.asr_model.cache_nbytes(session.cache)
+        session.cache_compactions += 1
+        SESSION_CACHE_COMPACTIONS.labels(reason).inc()
+        self.session_manager.update_cache_usage(session, nbytes)
+        logger.debug(f"Compacted streaming cache of task {session.task_id} ({reason}): {nbytes} bytes")
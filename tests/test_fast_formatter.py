@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+事件序列化一致性测试
+逐条对比 FastProtocolFormatter 与基于 pydantic 的 ProtocolFormatter 的输出，要求两者逐字节一致
+"""
+
+import itertools
+
+import pytest
+
+from src.protocol.formatter import ProtocolFormatter
+from src.protocol.fast_formatter import FastProtocolFormatter
+
+
+TASK_IDS = ["0123456789abcdef0123456789abcdef", 'task"with\\quotes', "任务-中文-id"]
+
+TEXTS = [
+    "",
+    "你好世界",
+    "hello, world!",
+    'quote " backslash \\ slash /',
+    "control \n\t\r\b\f \x00\x1f\x7f",
+    "emoji 😀 and 日本語",
+]
+
+WORDS = [
+    None,
+    [],
+    [{"text": "你好", "begin_time": 0, "end_time": 320}, {"text": 'w"2', "begin_time": 320, "end_time": 800}],
+]
+
+FAILURES = [
+    ("TOO_MANY_REQUESTS", "Too many concurrent sessions, please retry later.", 40000005),
+    ("IDLE_TIMEOUT", 'Session "idle" 中文', 40000004),
+]
+
+
+def cases():
+    for task_id, protocol in itertools.product(TASK_IDS, ("aliyun", "legacy")):
+        yield "create_task_started_event", (task_id,), {"protocol": protocol}
+        yield "create_task_finished_event", (task_id,), {"protocol": protocol}
+        for error_code, error_message, status in FAILURES:
+            yield "create_task_failed_event", (task_id, error_code, error_message), {"status": status, "protocol": protocol}
+        for text, words, sentence_end, is_final, end_time, duration in itertools.product(
+            TEXTS, WORDS, (False, True), (False, True), (None, 1500), (None, 0, 2300)
+        ):
+            if end_time is None and protocol == "legacy":
+                # 旧版协议的 end_time 为必填字段，参考实现要求提供
+                continue
+            yield "create_result_generated_event", (), {
+                "task_id": task_id,
+                "text": text,
+                "begin_time": 120,
+                "end_time": end_time,
+                "sentence_end": sentence_end,
+                "words": words,
+                "duration": duration,
+                "is_final": is_final,
+                "protocol": protocol,
+                "sentence_index": 3,
+            }
+
+
+@pytest.fixture
+def fixed_message_id(monkeypatch):
+    """两个实现使用相同的 message_id，输出才可逐字节比较"""
+    message_id = staticmethod(lambda: "f" * 32)
+    monkeypatch.setattr(ProtocolFormatter, "generate_message_id", message_id)
+    monkeypatch.setattr(FastProtocolFormatter, "generate_message_id", message_id)
+
+
+@pytest.mark.parametrize("method,args,kwargs", list(cases()))
+def test_fast_formatter_matches_reference(fixed_message_id, method, args, kwargs):
+    expected = getattr(ProtocolFormatter, method)(*args, **kwargs)
+    actual = getattr(FastProtocolFormatter, method)(*args, **kwargs)
+    assert actual == expected
+
+
+def test_message_ids_are_unique_hex():
+    ids = {FastProtocolFormatter.generate_message_id() for _ in range(10000)}
+    assert len(ids) == 10000
+    assert all(len(i) == 32 and int(i, 16) >= 0 for i in ids)